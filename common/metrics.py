@@ -0,0 +1,290 @@
+"""
+가벼운 계측 모듈 (web / data_processing / learning 공용)
+
+- 히스토그램: 단계별 소요 시간 (with timer("app_stage_seconds", stage="infer"): ...)
+- 카운터: 처리 수, 클래스별 탐지 수 (inc("app_detections_total", cls="PET"))
+- 출력: Prometheus 텍스트 형식(render_prometheus) / JSON(snapshot, dump_json)
+        start_http_server(port) 로 /metrics (텍스트), /metrics.json 제공 (백그라운드 스레드)
+- 프로파일링: with profile("cprofile" | "sample", out_dir): ... 로 요청 하나만 켜기
+    cprofile : <이름>.prof (python -m pstats, snakeviz 로 보기)
+    sample   : <이름>.folded (py-spy --format raw 와 같은 collapsed stack 형식 -> flamegraph.pl, speedscope)
+- 프로세스 풀 워커에서는 snapshot()을 돌려주고 부모에서 merge()로 합침
+
+다른 폴더의 스크립트에서는 저장소 루트를 sys.path에 넣고 from common import metrics 로 사용.
+"""
+
+from __future__ import annotations
+
+import bisect
+import cProfile
+import json
+import sys
+import threading
+import time
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 초 단위 (10us ~ 10s): 파일 하나 파싱 같은 짧은 단계도 분위수가 의미 있도록 아래쪽을 촘촘하게
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_hist: dict[tuple, list] = {}     # (이름, 라벨) -> [버킷별 개수..., +Inf 개수, 합, 개수]
+_count: dict[tuple, float] = {}   # (이름, 라벨) -> 값
+_help: dict[str, str] = {}
+_start = time.time()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def describe(name: str, text: str) -> None:
+    _help[name] = text
+
+
+def observe(name: str, value: float, **labels) -> None:
+    k = _key(name, labels)
+    i = bisect.bisect_left(LATENCY_BUCKETS, value)
+    with _lock:
+        h = _hist.get(k)
+        if h is None:
+            h = _hist[k] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+        h[i] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    k = _key(name, labels)
+    with _lock:
+        _count[k] = _count.get(k, 0) + value
+
+
+@contextmanager
+def timer(name: str, **labels):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - t0, **labels)
+
+
+def reset() -> None:
+    with _lock:
+        _hist.clear()
+        _count.clear()
+
+
+# =========================
+# 내보내기
+# =========================
+
+def snapshot() -> dict:
+    """pickle / json 가능한 현재 값 (워커 -> 부모 전달, JSON 덤프에 사용)"""
+    with _lock:
+        return {
+            "hist": [[n, list(lb), list(v)] for (n, lb), v in _hist.items()],
+            "count": [[n, list(lb), v] for (n, lb), v in _count.items()],
+        }
+
+
+def merge(snap: dict) -> None:
+    with _lock:
+        for n, lb, v in snap["hist"]:
+            k = (n, tuple(tuple(x) for x in lb))
+            h = _hist.setdefault(k, [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0])
+            for i, x in enumerate(v):
+                h[i] += x
+        for n, lb, v in snap["count"]:
+            k = (n, tuple(tuple(x) for x in lb))
+            _count[k] = _count.get(k, 0) + v
+
+
+def _quantile(h: list, q: float) -> float:
+    # 버킷 안에서는 선형 보간 (Prometheus histogram_quantile 과 같은 방식)
+    total = h[-1]
+    if total == 0:
+        return 0.0
+    rank, cum, lo = q * total, 0, 0.0
+    for i, ub in enumerate(LATENCY_BUCKETS):
+        if cum + h[i] >= rank:
+            return lo + (ub - lo) * (rank - cum) / h[i] if h[i] else ub
+        cum += h[i]
+        lo = ub
+    return LATENCY_BUCKETS[-1]
+
+
+def summary() -> dict:
+    """사람이 읽는 요약: 히스토그램은 count / mean / p50 / p95 (ms), 카운터는 값과 초당 처리량"""
+    up = max(time.time() - _start, 1e-9)
+    out = {"uptime_s": round(up, 1), "hist": {}, "count": {}}
+    with _lock:
+        for (n, lb), h in sorted(_hist.items()):
+            out["hist"][_fmt(n, lb)] = {
+                "count": h[-1], "mean_ms": round(h[-2] / h[-1] * 1000, 3) if h[-1] else 0.0,
+                "p50_ms": round(_quantile(h, 0.5) * 1000, 3), "p95_ms": round(_quantile(h, 0.95) * 1000, 3),
+            }
+        for (n, lb), v in sorted(_count.items()):
+            out["count"][_fmt(n, lb)] = {"value": v, "per_s": round(v / up, 3)}
+    return out
+
+
+def _fmt(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    body = ",".join(f'{k}="{str(v)}"' for k, v in labels)
+    return f"{name}{{{body}}}"
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        hist = sorted(_hist.items())
+        count = sorted(_count.items())
+    seen = set()
+    for (n, lb), h in hist:
+        if n not in seen:
+            seen.add(n)
+            if n in _help:
+                lines.append(f"# HELP {n} {_help[n]}")
+            lines.append(f"# TYPE {n} histogram")
+        cum = 0
+        for ub, c in zip(LATENCY_BUCKETS, h):
+            cum += c
+            lines.append(f"{_fmt(n + '_bucket', lb + (('le', repr(ub)),))} {cum}")
+        lines.append(f"{_fmt(n + '_bucket', lb + (('le', '+Inf'),))} {h[-1]}")
+        lines.append(f"{_fmt(n + '_sum', lb)} {h[-2]}")
+        lines.append(f"{_fmt(n + '_count', lb)} {h[-1]}")
+    for (n, lb), v in count:
+        if n not in seen:
+            seen.add(n)
+            if n in _help:
+                lines.append(f"# HELP {n} {_help[n]}")
+            lines.append(f"# TYPE {n} counter")
+        lines.append(f"{_fmt(n, lb)} {v}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_json(path: Path) -> None:
+    path = Path(path)
+    data = {"summary": summary(), "raw": snapshot(), "buckets": list(LATENCY_BUCKETS)}
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def print_summary() -> None:
+    s = summary()
+    print("=" * 50)
+    for name, h in s["hist"].items():
+        print(f"{name:<48} n={h['count']:<8} mean {h['mean_ms']:8.3f} ms | p50 {h['p50_ms']:8.3f} | p95 {h['p95_ms']:8.3f}")
+    for name, c in s["count"].items():
+        print(f"{name:<48} {c['value']:<10g} ({c['per_s']:.1f}/s)")
+    print("=" * 50)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/metrics.json"):
+            body, ctype = json.dumps(summary(), ensure_ascii=False).encode("utf-8"), "application/json"
+        elif self.path.startswith("/metrics"):
+            body, ctype = render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server: ThreadingHTTPServer | None = None
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """프로세스당 한 번만 띄움 (두 번째 호출부터는 기존 서버 반환). 다른 호스트에서 수집하려면 host를 직접 지정"""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+# =========================
+# 요청 단위 프로파일링
+# =========================
+
+class _Sampler(threading.Thread):
+    """대상 스레드의 스택을 주기적으로 찍어서 collapsed stack 으로 모음 (py-spy raw 출력과 같은 형식)"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: _Counter = _Counter()
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                co = frame.f_code
+                names.append(f"{co.co_name} ({co.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+def _prune(out_dir: Path, keep: int) -> None:
+    files = sorted((p for p in out_dir.iterdir() if p.suffix in (".prof", ".folded")), key=lambda p: p.stat().st_mtime)
+    for p in files[:max(0, len(files) - keep)]:
+        p.unlink(missing_ok=True)
+
+
+@contextmanager
+def profile(mode: str | None, out_dir: Path = Path("profiles"), name: str | None = None, interval: float = 0.005,
+            keep: int | None = None):
+    """
+    mode: None / "" 면 아무것도 안 함 (평소 경로 비용 0), "cprofile" 또는 "sample"
+    결과 파일 경로는 yield 값의 "path" 에 들어감. keep을 주면 out_dir에 최근 keep개만 남김
+    """
+    info: dict = {"path": None}
+    if not mode:
+        yield info
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"알 수 없는 profile 모드: {mode} (cprofile / sample)")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if keep is not None:
+        _prune(out_dir, keep - 1)
+    name = name or time.strftime("%Y%m%d_%H%M%S") + f"_{threading.get_ident()}"
+    if mode == "cprofile":
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield info
+        finally:
+            prof.disable()
+            info["path"] = out_dir / f"{name}.prof"
+            prof.dump_stats(info["path"])
+    elif mode == "sample":
+        sampler = _Sampler(threading.get_ident(), interval)
+        sampler.start()
+        try:
+            yield info
+        finally:
+            sampler.stop.set()
+            sampler.join()
+            info["path"] = out_dir / f"{name}.folded"
+            info["path"].write_text("".join(f"{s} {n}\n" for s, n in sampler.stacks.items()), encoding="utf-8")
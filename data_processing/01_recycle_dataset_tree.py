@@ -1,8 +1,20 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
 # === 경로로 바꾸면 됨 ===
 ROOT = Path(r"C:\ROKEY\232.재활용품 분류 및 선별 데이터")
 
+# === inventory 모드 설정 ===
+INVENTORY_JSON = Path("recycle_dataset_inventory.json")  # 폴더별 파일 수 / 용량 / 확장자 집계
+CACHE_VERSION = 1
+CACHE_HEAD = 20      # 캐시에 저장할 폴더별 파일 이름 수 (max_files가 더 크면 그만큼 저장)
+WORKERS = 16         # scandir 스레드 수 (네트워크 드라이브 / HDD 는 I/O 대기가 길어서 CPU 수보다 많게)
+
 
 def print_tree(root: Path, max_files: int = 5) -> None:
     root = root.resolve()
@@ -45,5 +57,230 @@ def print_tree(root: Path, max_files: int = 5) -> None:
     walk(root)
 
 
+# ------------------------------------------------------------
+# inventory 모드: 폴더마다 scandir 한 번 (DirEntry의 is_dir / stat 은 Windows에서 추가 시스템 호출 없음)
+# 폴더들을 스레드 풀로 동시에 읽고, 폴더 mtime이 같으면 캐시의 결과를 그대로 사용
+# (폴더 mtime은 파일 추가/삭제/이름 변경 때 바뀜. 파일 내용만 덮어쓴 경우의 용량 변화는 --no-cache로 다시 읽기)
+# ------------------------------------------------------------
+def scan_dir(path: str, head: int = CACHE_HEAD) -> dict:
+    """폴더 한 개의 직속 항목만 읽기 -> 하위 폴더 이름, 파일 수 / 용량 / 확장자별 (개수, 용량)"""
+    dirs, names = [], []
+    ext = {}
+    n_files = n_bytes = 0
+    error = None
+    try:
+        with os.scandir(path) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        dirs.append(e.name)
+                        continue
+                    if not e.is_file():
+                        continue
+                    size = e.stat().st_size
+                except OSError:
+                    continue
+                n_files += 1
+                n_bytes += size
+                names.append(e.name)
+                x = os.path.splitext(e.name)[1].lower() or "(none)"
+                c = ext.setdefault(x, [0, 0])
+                c[0] += 1
+                c[1] += size
+    except OSError as e:
+        error = f"{type(e).__name__}: {e}"
+    names.sort(key=str.lower)
+    return {"dirs": sorted(dirs, key=str.lower), "files": n_files, "bytes": n_bytes, "ext": ext,
+            "head": names[:head], "error": error}
+
+
+def _cached(path: str, cache: dict, max_files: int) -> tuple[dict | None, int]:
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, 0
+    c = cache.get(path)
+    if c and c["mtime"] == mtime and not c["error"] and (max_files <= len(c["head"]) or c["files"] <= len(c["head"])):
+        return c, mtime
+    return None, mtime
+
+
+def _scan_or_cached(path: str, cache: dict, max_files: int) -> tuple[dict, bool]:
+    hit, mtime = _cached(path, cache, max_files)
+    if hit:
+        return hit, True
+    r = scan_dir(path, max(CACHE_HEAD, max_files))
+    r["mtime"] = mtime
+    return r, False
+
+
+def walk_inventory(root: Path, cache: dict, max_files: int, workers: int) -> tuple[dict, int]:
+    """
+    root 아래 모든 폴더를 동시에 scandir
+    폴더 하나가 끝나면 그 하위 폴더들을 바로 풀에 넣음 (깊이 순서 상관없이 I/O가 계속 겹치도록)
+    returns: {폴더 경로: scan 결과}, 캐시 사용 폴더 수
+    """
+    found, hits = {}, 0
+    with ThreadPoolExecutor(max(1, workers)) as ex:
+        pending = {ex.submit(_scan_or_cached, str(root), cache, max_files): str(root)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                path = pending.pop(f)
+                r, hit = f.result()
+                found[path] = r
+                hits += hit
+                for d in r["dirs"]:
+                    sub = os.path.join(path, d)
+                    pending[ex.submit(_scan_or_cached, sub, cache, max_files)] = sub
+    return found, hits
+
+
+def aggregate(found: dict) -> dict:
+    """하위 폴더까지 합친 total_files / total_bytes / 확장자별 집계 (깊은 폴더부터 부모로 더함)"""
+    totals = {}
+    for path in sorted(found, key=lambda p: p.count(os.sep), reverse=True):
+        r = found[path]
+        files, nbytes = r["files"], r["bytes"]
+        ext_n, ext_b = Counter(), Counter()
+        for x, (n, b) in r["ext"].items():
+            ext_n[x] += n
+            ext_b[x] += b
+        n_dirs = 0
+        for d in r["dirs"]:
+            t = totals.get(os.path.join(path, d))
+            if t is None:
+                continue
+            files += t["total_files"]
+            nbytes += t["total_bytes"]
+            ext_n.update(t["_ext_n"])
+            ext_b.update(t["_ext_b"])
+            n_dirs += 1 + t["total_dirs"]
+        totals[path] = {"total_files": files, "total_bytes": nbytes, "total_dirs": n_dirs, "_ext_n": ext_n, "_ext_b": ext_b}
+    return totals
+
+
+def human(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def print_inventory_tree(root: str, found: dict, totals: dict, max_files: int, max_depth: int | None) -> None:
+    t = totals[root]
+    print(f"{root}  [{t['total_files']} files, {human(t['total_bytes'])}]")
+
+    def walk(path: str, prefix: str, depth: int):
+        r = found[path]
+        if max_depth is not None and depth >= max_depth:
+            return
+        show_files = r["head"][:max_files]
+        file_more = r["files"] - len(show_files)
+        items = [(d, True) for d in r["dirs"] if os.path.join(path, d) in found] + [(f, False) for f in show_files]
+        for i, (name, is_dir) in enumerate(items):
+            is_last = (i == len(items) - 1) and (file_more <= 0)
+            branch = "└── " if is_last else "├── "
+            if is_dir:
+                sub = os.path.join(path, name)
+                st = totals[sub]
+                err = "  [ERROR 읽기 실패]" if found[sub]["error"] else ""
+                print(f"{prefix}{branch}{name}/  [{st['total_files']} files, {human(st['total_bytes'])}]{err}")
+                walk(sub, prefix + ("    " if is_last else "│   "), depth + 1)
+            else:
+                print(prefix + branch + name)
+        if file_more > 0:
+            print(prefix + "└── " + f"… (+{file_more} more files)")
+
+    walk(root, "", 0)
+
+
+def build_inventory(root: str, found: dict, totals: dict) -> dict:
+    dirs = {}
+    for path in sorted(found):
+        r, t = found[path], totals[path]
+        ext = {x: {"files": n, "bytes": t["_ext_b"][x]} for x, n in t["_ext_n"].most_common()}
+        rel = os.path.relpath(path, root).replace(os.sep, "/")
+        dirs[rel] = {"files": r["files"], "bytes": r["bytes"], "subdirs": len(r["dirs"]),
+                     "total_files": t["total_files"], "total_bytes": t["total_bytes"], "total_dirs": t["total_dirs"],
+                     "ext": ext}
+        if r["error"]:
+            dirs[rel]["error"] = r["error"]
+    return dirs
+
+
+def load_cache(path: Path, root: str) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION or data.get("root") != root:
+        return {}
+    return data.get("dirs") or {}
+
+
+def save_cache(path: Path, root: str, found: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "root": root, "dirs": found}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def inventory(root: Path, out_json: Path, max_files: int = 5, max_depth: int | None = None,
+              workers: int = WORKERS, use_cache: bool = True, show_tree: bool = True) -> dict | None:
+    root = root.resolve()
+    if not root.is_dir():
+        print(f"[ERROR] Not a directory: {root}")
+        return None
+    root_s = str(root)
+    cache_path = out_json.with_name(out_json.stem + "_cache.json")
+    cache = load_cache(cache_path, root_s) if use_cache else {}
+
+    t0 = time.perf_counter()
+    found, hits = walk_inventory(root, cache, max_files, workers)
+    t_scan = time.perf_counter() - t0
+    totals = aggregate(found)
+
+    if show_tree:
+        print_inventory_tree(root_s, found, totals, max_files, max_depth)
+
+    t = totals[root_s]
+    report = {"root": root_s, "scanned_at": time.strftime("%Y-%m-%d %H:%M:%S"), "seconds": round(t_scan, 3),
+              "dirs_scanned": len(found) - hits, "dirs_cached": hits, "total_dirs": len(found),
+              "total_files": t["total_files"], "total_bytes": t["total_bytes"],
+              "dirs": build_inventory(root_s, found, totals)}
+    out_json.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    save_cache(cache_path, root_s, found)
+
+    print("=" * 50)
+    print(f"dirs {len(found)} (scandir {len(found) - hits}, cache {hits}) | files {t['total_files']} | "
+          f"{human(t['total_bytes'])} | {t_scan:.2f}s")
+    for x, n in t["_ext_n"].most_common(10):
+        print(f"  {x:<8} {n:>10} files  {human(t['_ext_b'][x]):>10}")
+    errors = [p for p, r in found.items() if r["error"]]
+    if errors:
+        print(f"[WARN] 읽지 못한 폴더 {len(errors)}개 (json의 error 항목 확인)")
+    print(f"[OK] {out_json}")
+    print("=" * 50)
+    return report
+
+
 if __name__ == "__main__":
-    print_tree(ROOT, max_files=5)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("root", nargs="?", default=str(ROOT))
+    ap.add_argument("--max-files", type=int, default=5, help="폴더마다 보여줄 파일 이름 수")
+    ap.add_argument("--inventory", action="store_true", help="병렬 scandir로 폴더별 파일 수 / 용량 / 확장자 집계 + json 저장")
+    ap.add_argument("--json", default=str(INVENTORY_JSON), help="inventory json 경로 (캐시는 <이름>_cache.json)")
+    ap.add_argument("--max-depth", type=int, default=None, help="트리 출력 깊이 제한 (집계는 전체)")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--no-cache", action="store_true", help="캐시를 쓰지 않고 전부 다시 읽기")
+    ap.add_argument("--no-tree", action="store_true", help="트리 출력 없이 요약과 json만")
+    args = ap.parse_args()
+
+    if args.inventory:
+        inventory(Path(args.root), Path(args.json), args.max_files, args.max_depth, args.workers,
+                  use_cache=not args.no_cache, show_tree=not args.no_tree)
+    else:
+        print_tree(Path(args.root), max_files=args.max_files)
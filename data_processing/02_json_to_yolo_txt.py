@@ -1,5 +1,13 @@
 from pathlib import Path
 import json
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import metrics  # noqa: E402  (단계별 소요 시간: scan / parse / convert / write)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import taxonomy  # noqa: E402  (클래스 목록: taxonomy.yaml)
 
 # =======================
 # 1) 여기 경로만 맞게 설정
@@ -12,16 +20,9 @@ LABEL_DIRS = [
 ]
 
 # =======================
-# 2) 클래스 매핑(DETAILS 15종)
+# 2) 클래스 매핑(DETAILS 15종) - taxonomy.yaml의 classes 순서 = class id
 # =======================
-DETAILS_15 = [
-    "철캔", "알루미늄캔", "종이",
-    "무색단일", "유색단일",
-    "PE", "PP", "PS",
-    "스티로폼", "비닐",
-    "갈색", "녹색", "투명",
-    "건전지", "형광등",
-]
+DETAILS_15 = taxonomy.details()
 DETAILS_TO_ID = {name: i for i, name in enumerate(DETAILS_15)}
 
 # =======================
@@ -30,6 +31,7 @@ DETAILS_TO_ID = {name: i for i, name in enumerate(DETAILS_15)}
 DELETE_JSON = True              # json 삭제할지
 WRITE_EMPTY_TXT = False         # 박스가 0개여도 빈 txt 파일을 만들지 (False면 txt 안만듦)
 CLAMP_TO_IMAGE = True           # bbox가 이미지 밖으로 나가면 잘라낼지
+METRICS_FILE = Path("02_metrics.json")   # 단계별 시간 / 처리량 기록 (None이면 저장 안 함)
 
 
 def clamp(v: float, lo: float, hi: float) -> float:
@@ -82,14 +84,18 @@ def bbox_from_polygon(points) -> tuple[float, float, float, float] | None:
     return (min(xs), min(ys), max(xs), max(ys))
 
 
-def convert_one(json_path: Path) -> tuple[bool, int, str | None]:
+def convert_one(json_path: Path, txt_path: Path | None = None) -> tuple[bool, int, str | None]:
     """
+    txt_path: 결과 txt 경로 (None이면 json 옆에 같은 이름으로 저장)
     returns: (success, boxes_written, reason_if_failed)
     """
+    t0 = time.perf_counter()
     try:
         data = json.loads(json_path.read_text(encoding="utf-8"))
     except Exception as e:
         return (False, 0, f"json parse fail: {e}")
+    t1 = time.perf_counter()
+    metrics.observe("dp_convert_stage_seconds", t1 - t0, stage="parse")
 
     info = data.get("IMAGE_INFO", {})
     img_w = info.get("IMAGE_WIDTH")
@@ -102,15 +108,20 @@ def convert_one(json_path: Path) -> tuple[bool, int, str | None]:
         return (False, 0, "ANNOTATION_INFO not a list")
 
     lines = []
+    per_class = [0] * len(DETAILS_15)
+    skipped = Counter()  # 버린 annotation 이유별 개수 (lint_labels.py와 함께 보고)
     for ann in anns:
         if not isinstance(ann, dict):
+            skipped["not_dict"] += 1
             continue
 
         details = ann.get("DETAILS")
         if not isinstance(details, str):
+            skipped["no_details"] += 1
             continue
         details = details.strip()
         if details not in DETAILS_TO_ID:
+            skipped["unknown_details"] += 1
             continue
         cid = DETAILS_TO_ID[details]
 
@@ -120,33 +131,53 @@ def convert_one(json_path: Path) -> tuple[bool, int, str | None]:
             pts = ann.get("POINTS")
             # POINTS: [[x,y,w,h]]
             if not (isinstance(pts, list) and len(pts) >= 1 and isinstance(pts[0], list) and len(pts[0]) >= 4):
+                skipped["bad_points"] += 1
                 continue
             try:
                 x, y, w, h = float(pts[0][0]), float(pts[0][1]), float(pts[0][2]), float(pts[0][3])
             except Exception:
+                skipped["bad_points"] += 1
                 continue
             if w <= 0 or h <= 0:
+                skipped["degenerate"] += 1
                 continue
             x1, y1, x2, y2 = x, y, x + w, y + h
             line = yolo_from_xyxy(cid, x1, y1, x2, y2, img_w, img_h)
             if line:
                 lines.append(line)
+                per_class[cid] += 1
+            else:
+                skipped["degenerate"] += 1
 
         elif st == "POLYGON":
             pts = ann.get("POINTS")
             bb = bbox_from_polygon(pts)
             if not bb:
+                skipped["bad_points"] += 1
                 continue
             x1, y1, x2, y2 = bb
             line = yolo_from_xyxy(cid, x1, y1, x2, y2, img_w, img_h)
             if line:
                 lines.append(line)
+                per_class[cid] += 1
+            else:
+                skipped["degenerate"] += 1
 
         else:
             # 다른 타입은 일단 무시
+            skipped["unsupported_shape"] += 1
             continue
 
-    txt_path = json_path.with_suffix(".txt")
+    t2 = time.perf_counter()
+    metrics.observe("dp_convert_stage_seconds", t2 - t1, stage="convert")
+    for cid, n in enumerate(per_class):
+        if n:
+            metrics.inc("dp_boxes_total", n, cls=DETAILS_15[cid])
+    for reason, n in skipped.items():
+        metrics.inc("dp_annotations_skipped_total", n, reason=reason)
+
+    if txt_path is None:
+        txt_path = json_path.with_suffix(".txt")
 
     if lines or WRITE_EMPTY_TXT:
         txt_path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
@@ -156,6 +187,7 @@ def convert_one(json_path: Path) -> tuple[bool, int, str | None]:
             json_path.unlink()
         except Exception as e:
             return (False, len(lines), f"txt ok but json delete fail: {e}")
+    metrics.observe("dp_convert_stage_seconds", time.perf_counter() - t2, stage="write")
 
     return (True, len(lines), None)
 
@@ -177,12 +209,14 @@ def main():
             print("[WARN] missing label dir:", label_root)
             continue
 
-        json_files = sorted(label_root.rglob("*.json"), key=lambda p: str(p).lower())
+        with metrics.timer("dp_convert_stage_seconds", stage="scan"):
+            json_files = sorted(label_root.rglob("*.json"), key=lambda p: str(p).lower())
         print(f"[INFO] {label_root} | json files: {len(json_files)}")
         total_json += len(json_files)
 
         for i, jp in enumerate(json_files, start=1):
             ok, n_boxes, reason = convert_one(jp)
+            metrics.inc("dp_files_total", result="ok" if ok else "failed")
             if ok:
                 converted += 1
                 total_boxes += n_boxes
@@ -201,6 +235,11 @@ def main():
     print("converted:", converted)
     print("failed:", failed)
     print("total boxes written:", total_boxes)
+    print()
+    metrics.print_summary()
+    if METRICS_FILE:
+        metrics.dump_json(METRICS_FILE)
+        print("metrics:", METRICS_FILE.resolve())
 
 
 if __name__ == "__main__":
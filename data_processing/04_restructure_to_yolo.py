@@ -5,23 +5,10 @@ import shutil
 from pathlib import Path
 import sys
 
-YOLO_NAMES = [
-    "can_steel",
-    "can_aluminium",
-    "paper",
-    "PET_transparent",
-    "PET_color",
-    "plastic_PE",
-    "plastic_PP",
-    "plastic_PS",
-    "styrofoam",
-    "plastic_bag",
-    "glass_brown",
-    "glass_green",
-    "glass_transparent",
-    "battery",
-    "light",
-]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import taxonomy  # noqa: E402
+
+YOLO_NAMES = taxonomy.names()  # taxonomy.yaml의 classes 순서 = class id (02와 같은 파일)
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
 
@@ -125,12 +112,18 @@ def find_best_folder(root: Path, must_contain: str, kind: str):
     return candidates[0][1]
 
 
-def process_split(img_root: Path, lbl_root: Path, out_img_dir: Path, out_lbl_dir: Path, mode: str, split: str):
+def process_split(img_root: Path, lbl_root: Path, out_img_dir: Path, out_lbl_dir: Path, mode: str, split: str,
+                  keep_stems: set | None = None):
+    """
+    keep_stems: 주어지면 이 stem의 이미지만 옮김 (03 prune manifest 등)
+    """
     ensure_dir(out_img_dir)
     ensure_dir(out_lbl_dir)
 
     lbl_idx = build_label_index(lbl_root)
     img_files = [p for p in img_root.rglob("*") if p.is_file() and p.suffix.lower() in IMG_EXTS]
+    if keep_stems is not None:
+        img_files = [p for p in img_files if p.stem in keep_stems]
     print(f"[{split}] images found: {len(img_files)}  (img_root={img_root})")
     print(f"[{split}] labels found: {len(lbl_idx)} stems (lbl_root={lbl_root})")
 
@@ -158,6 +151,7 @@ def process_split(img_root: Path, lbl_root: Path, out_img_dir: Path, out_lbl_dir
         moved += 1
 
     print(f"[{split}] done: {moved}, missing_label_txt_created: {missing_label}")
+    return moved, missing_label
 
 
 def main():
@@ -9,6 +9,7 @@ TRAIN_PER_CLASS = 1000
 VAL_PER_CLASS = 200
 SEED = 42
 MODE = "copy"   # "copy" 추천(원본 유지). "move"는 원본에서 빼옴(주의)
+PRIORITY_FLOOR = 0.1  # 우선순위 파일 사용 시 점수 0인 이미지의 가중치 (0이면 어려운 이미지를 먼저 다 뽑고 나머지는 랜덤)
 # ============================================
 
 IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
@@ -56,9 +57,32 @@ def index_split(img_dir: Path, lbl_dir: Path):
     return items, per_class
 
 
-def greedy_select(items, n_classes: int, quota_per_class: int, seed: int):
+def read_priority(path: Path):
+    """learning/hard_mining.py 결과 csv (stem,score,...) -> {stem: score}"""
+    prio = {}
+    with path.open("r", encoding="utf-8") as f:
+        next(f, None)  # 헤더
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) >= 2:
+                prio[parts[0]] = float(parts[1])
+    return prio
+
+
+def greedy_select(items, n_classes: int, quota_per_class: int, seed: int, priority=None):
     rnd = random.Random(seed)
-    rnd.shuffle(items)
+    if priority is None:
+        rnd.shuffle(items)
+    else:
+        # 점수에 비례한 가중 랜덤 순서 (u ** (1/w) 큰 순 = 가중치 비례 비복원 추출)
+        # 어려운 이미지가 앞에 오지만, 점수 0인 이미지도 PRIORITY_FLOOR 만큼 기회가 있음
+        # 가중치 0 (PRIORITY_FLOOR = 0 이고 점수 0) 인 이미지는 가중치 있는 이미지 전부 뒤에 랜덤 순서로
+        keys = {}
+        for it in items:
+            w = max(0.0, PRIORITY_FLOOR + priority.get(it["stem"], 0.0))
+            u = rnd.random()
+            keys[it["stem"]] = (1, u ** (1.0 / w)) if w > 0 else (0, u)
+        items.sort(key=lambda it: keys[it["stem"]], reverse=True)
 
     need = {c: quota_per_class for c in range(n_classes)}
     selected = []
@@ -165,6 +189,11 @@ def main():
     val_per = ask_int("val 클래스당 목표 이미지 수", VAL_PER_CLASS)
     seed = ask_int("랜덤 seed", SEED)
 
+    prio_path = input("train 우선순위 파일(hard_mining.py 결과 csv, 없으면 엔터): ").strip().strip('"')
+    priority = read_priority(Path(prio_path)) if prio_path else None
+    if priority is not None:
+        print(f"[INFO] 우선순위 {len(priority)}개 로드")
+
     mode = input(f"mode(copy/move) (기본 {MODE}): ").strip().lower() or MODE
     if mode not in ("copy", "move"):
         print("[WARN] mode가 이상해서 copy로 진행합니다.")
@@ -186,7 +215,7 @@ def main():
     print(f"[INFO] val   images found: {len(val_items)}")
 
     # 선택
-    train_sel, train_unmet = greedy_select(train_items, n_classes, train_per, seed)
+    train_sel, train_unmet = greedy_select(train_items, n_classes, train_per, seed, priority)
     val_sel, val_unmet = greedy_select(val_items, n_classes, val_per, seed + 1)
 
     print(f"\n[INFO] selected train images: {len(train_sel)}")
@@ -0,0 +1,308 @@
+"""
+YOLO 라벨 검사 (lint) + 선택적 자동 수정
+
+02 변환은 잘못된 annotation을 말없이 건너뛰고, 04는 라벨이 없는 이미지에 이유 없이 빈 txt를 만듦.
+YOLO 데이터셋(images/<split>, labels/<split>)의 모든 이미지 / 라벨을 프로세스 병렬로 검사해서
+규칙별 개수와 전체 목록을 lint_report.json 으로 남김.
+
+규칙 (--fix 일 때 수정 방법):
+    bad_line       열 수가 5가 아니거나 숫자가 아닌 줄                 -> 줄 삭제
+    class_range    class id가 정수 0 ~ nc-1 이 아님                    -> 줄 삭제
+    coord_range    좌표(또는 박스 모서리)가 0~1 밖                      -> 0~1로 자름
+    tiny_box       이미지 기준 가로/세로가 MIN_PIXELS 픽셀 미만         -> 줄 삭제
+    duplicate      같은 클래스, IoU >= DUP_IOU 인 박스 (뒤쪽)           -> 줄 삭제
+    class_conflict 다른 클래스인데 IoU >= DUP_IOU (어느 쪽이 맞는지 모름) -> 보고만
+    empty_label    빈 라벨 (배경 이미지 또는 04가 만든 빈 txt)           -> 보고만
+    missing_label  이미지는 있는데 라벨 파일 없음                        -> 보고만
+    orphan_label   라벨은 있는데 이미지 없음                             -> lint_quarantine/ 로 이동
+    ext_mismatch   확장자와 실제 이미지 형식이 다름                       -> 확장자 바꿈
+    corrupt_image  이미지 헤더를 못 읽음                                 -> 이미지 + 라벨을 lint_quarantine/ 로 이동
+
+사용 예:
+    python lint_labels.py C:\\ROKEY\\recycle_yolo
+    python lint_labels.py C:\\ROKEY\\recycle_yolo --fix --min-pixels 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+import taxonomy
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+SPLITS = ["train", "val"]
+
+MIN_PIXELS = 2       # 이보다 작은 박스는 학습에 의미 없음 (YOLO 기본 필터도 2px)
+DUP_IOU = 0.95
+COORD_EPS = 1e-4     # 반올림 오차 허용
+CHUNK = 1000
+
+RULES = ["bad_line", "class_range", "coord_range", "tiny_box", "duplicate", "class_conflict",
+         "empty_label", "missing_label", "orphan_label", "ext_mismatch", "corrupt_image"]
+INFO_RULES = {"empty_label", "missing_label"}  # 오류는 아니지만 개수는 알아야 하는 것
+IMAGE_RULES = {"missing_label", "ext_mismatch", "corrupt_image"}  # 보고서에 이미지 경로로 기록
+
+# PIL 형식 -> 허용 확장자
+FORMAT_EXTS = {"JPEG": {".jpg", ".jpeg"}, "PNG": {".png"}, "BMP": {".bmp"}, "WEBP": {".webp"}, "MPO": {".jpg", ".jpeg"}}
+FORMAT_EXT = {"JPEG": ".jpg", "PNG": ".png", "BMP": ".bmp", "WEBP": ".webp", "MPO": ".jpg"}
+
+
+def _iou_matrix(b: np.ndarray) -> np.ndarray:
+    """같은 파일 안의 박스끼리 IoU (xyxy, n x n)"""
+    lt = np.maximum(b[:, None, :2], b[None, :, :2])
+    rb = np.minimum(b[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(-1)
+    area = (b[:, 2:] - b[:, :2]).prod(-1)
+    return inter / (area[:, None] + area[None, :] - inter + 1e-9)
+
+
+def check_image(img: Path) -> tuple[list, tuple | None, str | None]:
+    """returns: (issues, (w, h) 또는 None, 올바른 확장자 또는 None)"""
+    from PIL import Image
+
+    try:
+        with Image.open(img) as im:  # 헤더만 읽음
+            fmt, size = im.format, im.size
+    except Exception as e:
+        return [("corrupt_image", 0, type(e).__name__)], None, None
+    if fmt in FORMAT_EXTS and img.suffix.lower() not in FORMAT_EXTS[fmt]:
+        return [("ext_mismatch", 0, f"{img.suffix} but {fmt}")], size, FORMAT_EXT[fmt]
+    return [], size, None
+
+
+def check_label(text: str, nc: int, size: tuple | None, min_px: float, dup_iou: float) -> tuple[list, list | None]:
+    """
+    returns: (issues, 수정된 줄 목록 또는 None(고칠 것 없음))
+    issue = (규칙, 줄 번호(1부터), 설명)
+    """
+    issues = []
+    lines = text.splitlines()
+    rows, keep_idx = [], []
+    for i, ln in enumerate(lines, 1):
+        parts = ln.split()
+        if not parts:
+            continue
+        if len(parts) != 5:
+            issues.append(("bad_line", i, f"{len(parts)} columns"))
+            continue
+        try:
+            v = [float(x) for x in parts]
+        except ValueError:
+            issues.append(("bad_line", i, "not a number"))
+            continue
+        if not np.isfinite(v).all():
+            issues.append(("bad_line", i, "nan/inf"))
+            continue
+        if v[0] != int(v[0]) or not 0 <= v[0] < nc:
+            issues.append(("class_range", i, f"class {parts[0]} (nc={nc})"))
+            continue
+        rows.append(v)
+        keep_idx.append(i)
+
+    if not rows:
+        if not issues:
+            return [("empty_label", 0, "")], None
+        return issues, []
+
+    a = np.array(rows, dtype=np.float64)
+    cls = a[:, 0].astype(np.int64)
+    xyxy = np.stack([a[:, 1] - a[:, 3] / 2, a[:, 2] - a[:, 4] / 2, a[:, 1] + a[:, 3] / 2, a[:, 2] + a[:, 4] / 2], 1)
+    line_no = np.array(keep_idx)
+    changed = False
+
+    out = ((a[:, 1:] < -COORD_EPS) | (a[:, 1:] > 1 + COORD_EPS)).any(1) | \
+          ((xyxy < -COORD_EPS) | (xyxy > 1 + COORD_EPS)).any(1)
+    for j in np.flatnonzero(out):
+        issues.append(("coord_range", int(line_no[j]), " ".join(f"{x:g}" for x in a[j, 1:])))
+    if out.any():
+        xyxy = np.clip(xyxy, 0, 1)
+        changed = True
+
+    # 자른 뒤 크기 기준 (이미지 크기를 모르면 0 넓이만)
+    wh = xyxy[:, 2:] - xyxy[:, :2]
+    px = wh * np.array(size, dtype=np.float64) if size else wh
+    tiny = (px < (min_px if size else 1e-9)).any(1)
+    for j in np.flatnonzero(tiny):
+        issues.append(("tiny_box", int(line_no[j]), f"{px[j, 0]:.1f}x{px[j, 1]:.1f}" + (" px" if size else "")))
+    keep = ~tiny
+
+    # 겹치는 박스: 앞쪽(먼저 나온 줄)을 남김
+    idx = np.flatnonzero(keep)
+    if len(idx) > 1:
+        iou = _iou_matrix(xyxy[idx])
+        hi, lo = np.nonzero(np.triu(iou >= dup_iou, 1))
+        for h, l in zip(hi, lo):
+            jh, jl = idx[h], idx[l]
+            if not keep[jh]:
+                continue
+            if cls[jh] == cls[jl]:
+                if keep[jl]:
+                    issues.append(("duplicate", int(line_no[jl]), f"same as line {line_no[jh]}"))
+                    keep[jl] = False
+            else:
+                issues.append(("class_conflict", int(line_no[jl]),
+                               f"class {cls[jl]} vs {cls[jh]} (line {line_no[jh]}), IoU {iou[h, l]:.2f}"))
+
+    if not (changed or not keep.all() or len(rows) != sum(1 for ln in lines if ln.split())):
+        return issues, None
+
+    fixed = []
+    for j in np.flatnonzero(keep):
+        if out[j]:
+            x1, y1, x2, y2 = xyxy[j]
+            fixed.append(f"{cls[j]} {(x1 + x2) / 2:.6f} {(y1 + y2) / 2:.6f} {x2 - x1:.6f} {y2 - y1:.6f}")
+        else:
+            fixed.append(lines[line_no[j] - 1].strip())
+    return issues, fixed
+
+
+def _quarantine(p: Path, root: Path, qroot: Path) -> None:
+    dst = qroot / p.relative_to(root)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(p, dst)
+
+
+def lint_chunk(args) -> dict:
+    pairs, root, nc, min_px, dup_iou, fix = args
+    root = Path(root)
+    qroot = root / "lint_quarantine"
+    issues, fixed = [], Counter()
+    for img, lbl in pairs:
+        img, lbl = (Path(img) if img else None), (Path(lbl) if lbl else None)
+        found: list = []
+        size = new_ext = None
+        if img is not None:
+            found, size, new_ext = check_image(img)
+
+        if img is None:
+            found.append(("orphan_label", 0, ""))
+            if fix:
+                _quarantine(lbl, root, qroot)
+                fixed["orphan_label"] += 1
+        elif lbl is None:
+            found.append(("missing_label", 0, ""))
+        elif not any(r == "corrupt_image" for r, _, _ in found):
+            text = lbl.read_text(encoding="utf-8", errors="ignore")
+            li, new_lines = check_label(text, nc, size, min_px, dup_iou)
+            found += li
+            if fix and new_lines is not None:
+                tmp = lbl.with_name(lbl.name + ".tmp")
+                tmp.write_text("\n".join(new_lines) + ("\n" if new_lines else ""), encoding="utf-8")
+                os.replace(tmp, lbl)
+                for r in {r for r, _, _ in li} & {"bad_line", "class_range", "coord_range", "tiny_box", "duplicate"}:
+                    fixed[r] += 1
+
+        if fix and img is not None:
+            if any(r == "corrupt_image" for r, _, _ in found):
+                _quarantine(img, root, qroot)
+                if lbl is not None:
+                    _quarantine(lbl, root, qroot)
+                fixed["corrupt_image"] += 1
+            elif new_ext and not img.with_suffix(new_ext).exists():
+                os.replace(img, img.with_suffix(new_ext))
+                fixed["ext_mismatch"] += 1
+
+        for r, line, detail in found:
+            p = img if r in IMAGE_RULES or lbl is None else lbl
+            issues.append([p.relative_to(root).as_posix(), r, line, detail])
+    return {"issues": issues, "fixed": dict(fixed), "files": len(pairs)}
+
+
+def pair_files(root: Path, split: str) -> list[tuple[str | None, str | None]]:
+    """images/<split>, labels/<split> 를 stem 기준으로 짝지음 (scandir 한 번씩)"""
+    def scan(d: Path, exts: set[str]) -> dict:
+        if not d.exists():
+            return {}
+        with os.scandir(d) as it:
+            return {os.path.splitext(e.name)[0]: e.path for e in it
+                    if e.is_file() and os.path.splitext(e.name)[1].lower() in exts}
+
+    imgs = scan(root / "images" / split, IMG_EXTS)
+    lbls = scan(root / "labels" / split, {".txt"})
+    return [(imgs.get(s), lbls.get(s)) for s in sorted(imgs.keys() | lbls.keys())]
+
+
+def lint_split(root: Path, split: str, nc: int, min_px: float = MIN_PIXELS, dup_iou: float = DUP_IOU,
+               fix: bool = False, workers: int = 1) -> dict:
+    pairs = pair_files(root, split)
+    tasks = [(pairs[i:i + CHUNK], str(root), nc, min_px, dup_iou, fix) for i in range(0, len(pairs), CHUNK)]
+    issues, fixed = [], Counter()
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max(1, workers)) as ex:
+        for r in ex.map(lint_chunk, tasks):
+            issues += r["issues"]
+            fixed.update(r["fixed"])
+    counts = Counter(r for _, r, _, _ in issues)
+    return {
+        "files": len(pairs), "seconds": round(time.perf_counter() - t0, 2),
+        "counts": {r: counts.get(r, 0) for r in RULES},
+        "files_with_issues": {r: len({f for f, rr, _, _ in issues if rr == r}) for r in RULES if counts.get(r)},
+        "fixed": dict(fixed), "issues": issues,
+    }
+
+
+def read_nc(root: Path) -> int:
+    y = root / "data.yaml"
+    if y.exists():
+        data = yaml.safe_load(y.read_text(encoding="utf-8")) or {}
+        if data.get("names"):
+            return len(data["names"])
+        if data.get("nc"):
+            return int(data["nc"])
+    return len(taxonomy.names())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("root", help="YOLO 데이터셋 폴더 (images/, labels/, data.yaml)")
+    ap.add_argument("--splits", nargs="+", default=SPLITS)
+    ap.add_argument("--nc", type=int, help="클래스 수 (기본: data.yaml, 없으면 taxonomy.yaml)")
+    ap.add_argument("--min-pixels", type=float, default=MIN_PIXELS)
+    ap.add_argument("--dup-iou", type=float, default=DUP_IOU)
+    ap.add_argument("--fix", action="store_true", help="고칠 수 있는 규칙은 고침 (라벨은 원자적으로 다시 씀)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--report", help="결과 json 경로 (기본: root/lint_report.json)")
+    args = ap.parse_args()
+
+    root = Path(args.root).resolve()
+    nc = args.nc or read_nc(root)
+    report = {"root": str(root), "nc": nc, "min_pixels": args.min_pixels, "dup_iou": args.dup_iou,
+              "fix": args.fix, "splits": {}, "total": {}}
+    total = Counter()
+    for split in args.splits:
+        if not (root / "images" / split).exists() and not (root / "labels" / split).exists():
+            print(f"[WARN] 없음: {root / 'images' / split}")
+            continue
+        r = lint_split(root, split, nc, args.min_pixels, args.dup_iou, args.fix, args.workers)
+        report["splits"][split] = r
+        total.update(r["counts"])
+        print(f"[{split}] files {r['files']} | {r['seconds']}s | issues {sum(r['counts'].values())}"
+              + (f" | fixed {sum(r['fixed'].values())}" if args.fix else ""))
+
+    report["total"] = {r: total.get(r, 0) for r in RULES}
+    print("=" * 50)
+    for r in RULES:
+        fixed = sum(s["fixed"].get(r, 0) for s in report["splits"].values())
+        mark = " (info)" if r in INFO_RULES else ""
+        print(f"{r:<16} {total.get(r, 0):>8}{mark}" + (f"   fixed(files) {fixed}" if args.fix and fixed else ""))
+    print("=" * 50)
+
+    out = Path(args.report) if args.report else root / "lint_report.json"
+    out.write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+    print(f"[OK] {out}")
+
+    errors = sum(n for r, n in total.items() if r not in INFO_RULES)
+    raise SystemExit(1 if errors and not args.fix else 0)
+
+
+if __name__ == "__main__":
+    main()
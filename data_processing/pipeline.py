@@ -0,0 +1,472 @@
+"""
+데이터 전처리 파이프라인 실행기 (02 -> 03 -> 04 -> 05 를 한 번에, 증분 실행)
+
+- 각 stage는 입력 / 출력 / 파라미터를 선언하고, 출력은 work_root/<stage>/<split>/<키>/ 에 저장
+  키 = (stage 이름, 파라미터, 원본 입력 지문, 앞 stage 키, 스크립트 코드) 의 sha1
+  -> 이미 같은 키의 결과가 있으면 건너뜀, 파라미터를 바꾸면 영향받는 stage만 다시 계산
+- 원본(raw_root)은 읽기만 함: json 삭제 / move / prune 삭제 없이, 결과는 hardlink(또는 copy)로 전달
+- split(Training/Validation)끼리, 그리고 서로 독립인 stage(convert / prune)끼리 동시에 실행
+
+stage 구성 (split마다):
+    convert[split]  : 02 convert_one 으로 json -> txt (프로세스 병렬)
+    prune[split]    : 03 방식으로 클래스 폴더마다 남길 stem 목록만 작성
+    restructure     : 04 process_split 로 images/<s>, labels/<s> 구성 (convert + prune 결과 사용)
+    subset[split]   : 05 greedy_select 로 클래스별 목표 수만큼 선택 (enabled일 때, priority 파일이 있으면 점수 높은 이미지 먼저)
+    reencode[split] : reencode_images 로 리사이즈 + 재압축 (enabled일 때)
+    lint[split]     : lint_labels 로 최종 라벨 검사, lint_report.json 만 작성 (enabled일 때, 결과는 안 고침)
+    dataset         : 최종 split들을 가리키는 data.yaml
+
+사용 예:
+    python pipeline.py                       # pipeline.yaml 기준으로 필요한 stage만 실행
+    python pipeline.py --dry-run             # 무엇이 다시 계산될지만 출력
+    python pipeline.py --force prune         # prune과 그 뒤 stage 강제 재계산
+    python pipeline.py --raw-root D:\\data\\01-1.정식개방데이터 --work-root D:\\work
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import metrics  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_CONFIG = HERE / "pipeline.yaml"
+
+# =========================
+# 기존 스크립트 불러오기 (파일 이름이 숫자로 시작해서 import 문으로는 못 불러옴)
+# =========================
+
+SCRIPTS = {
+    "convert": "02_json_to_yolo_txt.py",
+    "prune": "03_prune_keep_random_per_class.py",
+    "restructure": "04_restructure_to_yolo.py",
+    "subset": "05_subset_yolo_per_class.py",
+    "reencode": "reencode_images.py",
+    "lint": "lint_labels.py",
+}
+_loaded: dict[str, object] = {}
+
+
+def load_script(filename: str):
+    if filename not in _loaded:
+        spec = importlib.util.spec_from_file_location("dp_" + Path(filename).stem, HERE / filename)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        _loaded[filename] = mod
+    return _loaded[filename]
+
+
+# 클래스 목록(taxonomy.yaml)을 쓰는 stage: 파일이 바뀌면 다시 계산
+TAXONOMY_STAGES = {"convert", "restructure", "dataset"}
+
+
+def code_hash(stage_name: str) -> str:
+    f = SCRIPTS.get(stage_name)
+    src = (HERE / f).read_bytes() if f else b""
+    if stage_name in TAXONOMY_STAGES:
+        src += (HERE / "taxonomy.yaml").read_bytes()
+    return hashlib.sha1(src + Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+# =========================
+# 입력 지문 (fingerprint)
+# =========================
+
+def _file_sha1(p: str) -> str:
+    h = hashlib.sha1()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fingerprint(root: Path, mode: str, workers: int) -> str:
+    """
+    mtime: 모든 파일의 (상대경로, 크기, 수정 시각)
+    hash : 모든 파일의 (상대경로, 내용 sha1)
+    """
+    if not root.exists():
+        raise FileNotFoundError(f"입력 폴더가 없습니다: {root}")
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        files += [os.path.join(dirpath, fn) for fn in sorted(filenames)]
+
+    h = hashlib.sha1()
+    if mode == "hash":
+        with ThreadPoolExecutor(workers) as ex:
+            digests = list(ex.map(_file_sha1, files, chunksize=64))
+        for p, d in zip(files, digests):
+            h.update(f"{os.path.relpath(p, root)}|{d}\n".encode("utf-8"))
+    else:
+        for p in files:
+            st = os.stat(p)
+            h.update(f"{os.path.relpath(p, root)}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+# =========================
+# stage 정의 / 실행 엔진
+# =========================
+
+@dataclass(eq=False)
+class Stage:
+    name: str
+    split: str
+    run: Callable[["Stage", Path], dict]
+    params: dict
+    inputs: list[Path] = field(default_factory=list)
+    deps: list["Stage"] = field(default_factory=list)
+    opts: dict = field(default_factory=dict)  # 결과에 영향 없는 실행 옵션 (키 계산에서 제외)
+    key: str = ""
+    out: Path | None = None
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}[{self.split}]"
+
+    def dep(self, name: str) -> "Stage":
+        return next(d for d in self.deps if d.name == name)
+
+    def done(self) -> bool:
+        return self.out is not None and (self.out / "_stage.json").exists()
+
+
+def assign_keys(stages: list[Stage], work_root: Path, fp_mode: str, workers: int) -> None:
+    inputs = sorted({p for s in stages for p in s.inputs}, key=str)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max(1, workers)) as ex:
+        fps = dict(zip(inputs, ex.map(lambda p: fingerprint(p, fp_mode, workers), inputs)))
+    print(f"[PLAN] 입력 지문 {len(inputs)}개 ({fp_mode}) {time.perf_counter() - t0:.1f}s")
+
+    for s in stages:  # stages는 의존 순서대로 정렬되어 있음
+        desc = {
+            "stage": s.name, "split": s.split, "params": s.params, "code": code_hash(s.name),
+            "inputs": [fps[p] for p in s.inputs], "deps": [d.key for d in s.deps],
+        }
+        s.key = hashlib.sha1(json.dumps(desc, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        s.out = work_root / s.name / s.split / s.key
+
+
+def run_stage(s: Stage) -> dict:
+    tmp = s.out.with_name(s.out.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    t0 = time.perf_counter()
+    stats = s.run(s, tmp) or {}
+    dt = time.perf_counter() - t0
+    stats["seconds"] = round(dt, 2)
+    metrics.observe("dp_pipeline_stage_seconds", dt, stage=s.name)
+    record = {"stage": s.name, "split": s.split, "key": s.key, "params": s.params,
+              "deps": {d.id: d.key for d in s.deps}, "stats": stats,
+              "time": time.strftime("%Y-%m-%d %H:%M:%S")}
+    (tmp / "_stage.json").write_text(json.dumps(record, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if s.out.exists():  # --force 로 같은 키를 다시 만든 경우
+        shutil.rmtree(s.out)
+    os.replace(tmp, s.out)
+    return stats
+
+
+def needs_run(stages: list[Stage], force: set[str]) -> list[Stage]:
+    # 결과가 없거나, force 됐거나, 앞 stage가 다시 실행되는 stage
+    todo: list[Stage] = []
+    for s in stages:
+        if not s.done() or s.name in force or any(d in todo for d in s.deps):
+            todo.append(s)
+    return todo
+
+
+def execute(stages: list[Stage], workers: int, force: set[str]) -> bool:
+    todo = needs_run(stages, force)
+    for s in stages:
+        if s not in todo:
+            print(f"[SKIP] {s.id:<24} up to date ({s.out})")
+    if not todo:
+        return True
+
+    running: dict = {}
+    ok = True
+    with ThreadPoolExecutor(max(1, workers)) as ex:
+        while todo or running:
+            for s in list(todo):
+                if all(d not in todo and d not in running.values() for d in s.deps):
+                    print(f"[RUN ] {s.id}")
+                    running[ex.submit(run_stage, s)] = s
+                    todo.remove(s)
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                s = running.pop(fut)
+                try:
+                    stats = fut.result()
+                    print(f"[DONE] {s.id:<24} {json.dumps(stats, ensure_ascii=False)}")
+                except Exception as e:
+                    ok = False
+                    print(f"[FAIL] {s.id}: {e!r}")
+            if not ok:
+                todo.clear()  # 실행 중인 stage만 마무리하고 중단
+    return ok
+
+
+# =========================
+# stage 구현
+# =========================
+
+def _convert_chunk(args) -> tuple[int, int, int, list[str], dict]:
+    chunk, params = args
+    metrics.reset()  # 워커 프로세스는 재사용되므로 chunk마다 새로 모아서 부모에 넘김
+    m = load_script(SCRIPTS["convert"])
+    m.DELETE_JSON = False  # 원본은 건드리지 않음
+    m.WRITE_EMPTY_TXT = params["write_empty_txt"]
+    m.CLAMP_TO_IMAGE = params["clamp_to_image"]
+
+    converted = failed = boxes = 0
+    reasons = []
+    for jp, tp in chunk:
+        Path(tp).parent.mkdir(parents=True, exist_ok=True)
+        ok, n, reason = m.convert_one(Path(jp), Path(tp))
+        metrics.inc("dp_files_total", result="ok" if ok else "failed")
+        if ok:
+            converted += 1
+            boxes += n
+        else:
+            failed += 1
+            if len(reasons) < 10:
+                reasons.append(f"{jp}: {reason}")
+    return converted, failed, boxes, reasons, metrics.snapshot()
+
+
+def run_convert(s: Stage, out: Path) -> dict:
+    label_root = s.inputs[0]
+    with metrics.timer("dp_convert_stage_seconds", stage="scan"):
+        jsons = sorted(label_root.rglob("*.json"), key=lambda p: str(p).lower())
+    tasks = [(str(j), str(out / j.relative_to(label_root).with_suffix(".txt"))) for j in jsons]
+    step = 500
+    chunks = [(tasks[i:i + step], s.params) for i in range(0, len(tasks), step)]
+
+    total = {"json": len(tasks), "converted": 0, "failed": 0, "boxes": 0}
+    reasons = []
+    with ProcessPoolExecutor(s.opts["file_workers"]) as ex:
+        for c, f, b, r, snap in ex.map(_convert_chunk, chunks):
+            metrics.merge(snap)
+            total["converted"] += c
+            total["failed"] += f
+            total["boxes"] += b
+            reasons += r
+    for r in reasons[:10]:
+        print(f"  [FAIL] {r}")
+    return total
+
+
+def run_prune(s: Stage, out: Path) -> dict:
+    m = load_script(SCRIPTS["prune"])
+    images_root = s.inputs[0]
+    class_dirs = sorted((p for p in images_root.iterdir() if p.is_dir() and p.name[:3] in ("TS_", "VS_")),
+                        key=lambda p: p.name)
+
+    keep_all = []
+    for d in class_dirs:
+        # 클래스 폴더마다 따로 시드 -> 다른 split/stage 실행 순서와 무관하게 같은 결과
+        rng = random.Random(f"{s.params['seed']}:{d.name}")
+        imgs = sorted(m.list_files_with_ext(d, m.IMG_EXTS), key=lambda p: p.name)
+        keep = sorted(m.choose_keep_stems(imgs, s.params["keep"], rng))
+        (out / f"{d.name}__keep_{len(keep)}.txt").write_text("\n".join(keep), encoding="utf-8")
+        keep_all += keep
+
+    (out / "keep.txt").write_text("\n".join(keep_all) + "\n", encoding="utf-8")
+    return {"classes": len(class_dirs), "kept": len(keep_all)}
+
+
+def run_restructure(s: Stage, out: Path) -> dict:
+    m = load_script(SCRIPTS["restructure"])
+    ys = s.params["yolo_split"]
+    keep_file = s.dep("prune").out / "keep.txt"
+    keep = {ln for ln in keep_file.read_text(encoding="utf-8").splitlines() if ln}
+    moved, missing = m.process_split(s.inputs[0], s.dep("convert").out, out / "images" / ys, out / "labels" / ys,
+                                     s.params["link_mode"], ys, keep_stems=keep)
+    return {"images": moved, "missing_label": missing}
+
+
+def run_subset(s: Stage, out: Path) -> dict:
+    m05 = load_script(SCRIPTS["subset"])
+    m04 = load_script(SCRIPTS["restructure"])
+    ys = s.params["yolo_split"]
+    src = s.dep("restructure").out
+
+    items, _ = m05.index_split(src / "images" / ys, src / "labels" / ys)
+    items.sort(key=lambda it: it["stem"])  # iterdir 순서와 무관하게 재현되도록
+    prio = s.params.get("priority")
+    priority = m05.read_priority(Path(prio["path"])) if prio else None
+    selected, unmet = m05.greedy_select(items, s.params["n_classes"], s.params["per_class"], s.params["seed"],
+                                        priority)
+
+    img_dst, lbl_dst = out / "images" / ys, out / "labels" / ys
+    img_dst.mkdir(parents=True, exist_ok=True)
+    lbl_dst.mkdir(parents=True, exist_ok=True)
+    missing = 0
+    for it in selected:
+        m04.safe_place(it["img"], img_dst / it["img"].name, s.params["link_mode"])
+        if it["lbl"].exists():
+            m04.safe_place(it["lbl"], lbl_dst / it["lbl"].name, s.params["link_mode"])
+        else:
+            (lbl_dst / f"{it['stem']}.txt").write_text("", encoding="utf-8")
+            missing += 1
+    return {"selected": len(selected), "missing_label": missing, "unmet": {str(k): v for k, v in unmet.items()}}
+
+
+def run_reencode(s: Stage, out: Path) -> dict:
+    import reencode_images as m  # 이름이 숫자로 시작하지 않으므로 일반 import (워커 프로세스 pickle 가능)
+    ys = s.params["yolo_split"]
+    r = m.reencode_split(s.deps[0].out, out, ys, s.params["max_side"], s.params["quality"], s.params["format"],
+                         s.opts["file_workers"], s.opts["turbojpeg"])
+    return {k: r[k] for k in ("images", "src_bytes", "dst_bytes", "saved_bytes", "images_per_s")} | {
+        "label_problems": len(r["label_problems"])}
+
+
+def run_lint(s: Stage, out: Path) -> dict:
+    import lint_labels as m  # 워커 프로세스 pickle 가능하도록 일반 import
+    ys = s.params["yolo_split"]
+    r = m.lint_split(s.deps[0].out, ys, s.params["nc"], s.params["min_pixels"], s.params["dup_iou"],
+                     fix=False, workers=s.opts["file_workers"])
+    (out / "lint_report.json").write_text(json.dumps(r, indent=1, ensure_ascii=False), encoding="utf-8")
+    return {k: v for k, v in r["counts"].items() if v}
+
+
+def run_dataset(s: Stage, out: Path) -> dict:
+    names = load_script(SCRIPTS["restructure"]).YOLO_NAMES
+    lines = []
+    for d in s.deps:
+        ys = d.params["yolo_split"]
+        lines.append(f"{ys}: {(d.out / 'images' / ys).as_posix()}")
+    lines += [f"nc: {len(names)}", "names:"] + [f"  - {n}" for n in names]
+    (out / "data.yaml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return {"splits": [d.params["yolo_split"] for d in s.deps]}
+
+
+def build_stages(cfg: dict) -> list[Stage]:
+    raw = Path(cfg["raw_root"])
+    st = cfg.get("stages", {})
+    link_mode = cfg.get("link_mode", "hardlink")
+    if link_mode not in ("hardlink", "copy"):
+        raise ValueError("link_mode는 hardlink / copy 만 가능합니다 (원본 보존)")
+    file_workers = int(cfg.get("file_workers", os.cpu_count() or 1))
+
+    stages: list[Stage] = []
+    finals: list[Stage] = []
+    for i, (split, ys) in enumerate(cfg["splits"].items()):
+        conv_p = st.get("convert", {})
+        convert = Stage("convert", split, run_convert, {
+            "write_empty_txt": bool(conv_p.get("write_empty_txt", False)),
+            "clamp_to_image": bool(conv_p.get("clamp_to_image", True)),
+        }, inputs=[raw / split / "02.라벨링데이터"], opts={"file_workers": file_workers})
+
+        pr_p = st.get("prune", {})
+        prune = Stage("prune", split, run_prune, {
+            "keep": int(pr_p.get("keep", {}).get(split, 10 ** 9)), "seed": int(pr_p.get("seed", 42)),
+        }, inputs=[raw / split / "01.원천데이터"])
+
+        restructure = Stage("restructure", split, run_restructure, {"yolo_split": ys, "link_mode": link_mode},
+                            inputs=[raw / split / "01.원천데이터"], deps=[convert, prune])
+        stages += [convert, prune, restructure]
+        final = restructure
+
+        sub_p = st.get("subset", {})
+        if sub_p.get("enabled", True):
+            sub_params = {
+                "yolo_split": ys, "link_mode": link_mode, "n_classes": int(sub_p.get("n_classes", 15)),
+                "per_class": int(sub_p.get("per_class", {}).get(split, 10 ** 9)),
+                "seed": int(sub_p.get("seed", 42)) + i,  # 05와 같이 train=seed, val=seed+1
+            }
+            prio = (sub_p.get("priority") or {}).get(split)
+            if prio:  # 없을 때는 키에 넣지 않아서 기존 결과를 그대로 재사용
+                sub_params["priority"] = {"path": str(Path(prio).resolve()), "sha1": _file_sha1(prio)}
+            final = Stage("subset", split, run_subset, sub_params, deps=[restructure])
+            stages.append(final)
+
+        re_p = st.get("reencode", {})
+        if re_p.get("enabled", False):
+            final = Stage("reencode", split, run_reencode, {
+                "yolo_split": ys, "max_side": int(re_p.get("max_side", 960)),
+                "quality": int(re_p.get("quality", 90)), "format": re_p.get("format", "jpeg"),
+            }, deps=[final], opts={"file_workers": file_workers, "turbojpeg": bool(re_p.get("turbojpeg", False))})
+            stages.append(final)
+
+        li_p = st.get("lint", {})
+        if li_p.get("enabled", False):
+            stages.append(Stage("lint", split, run_lint, {
+                "yolo_split": ys, "nc": len(load_script(SCRIPTS["restructure"]).YOLO_NAMES),
+                "min_pixels": float(li_p.get("min_pixels", 2)), "dup_iou": float(li_p.get("dup_iou", 0.95)),
+            }, deps=[final], opts={"file_workers": file_workers}))
+        finals.append(final)
+
+    stages.append(Stage("dataset", "all", run_dataset, {}, deps=finals))
+    return stages
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default=str(DEFAULT_CONFIG))
+    ap.add_argument("--raw-root", help="설정 파일의 raw_root 덮어쓰기")
+    ap.add_argument("--work-root", help="설정 파일의 work_root 덮어쓰기")
+    ap.add_argument("--fingerprint", choices=["mtime", "hash"], help="입력 지문 방식 덮어쓰기")
+    ap.add_argument("--force", nargs="*", default=[], help="강제로 다시 실행할 stage 이름 (convert, prune, ...)")
+    ap.add_argument("--dry-run", action="store_true", help="실행하지 않고 계획만 출력")
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load(Path(args.config).read_text(encoding="utf-8"))
+    if args.raw_root:
+        cfg["raw_root"] = args.raw_root
+    if args.work_root:
+        cfg["work_root"] = args.work_root
+    if args.fingerprint:
+        cfg["fingerprint"] = args.fingerprint
+
+    work_root = Path(cfg["work_root"])
+    print("raw_root  =", cfg["raw_root"])
+    print("work_root =", work_root)
+
+    stages = build_stages(cfg)
+    assign_keys(stages, work_root, cfg.get("fingerprint", "mtime"), int(cfg.get("workers", 4)))
+
+    if args.dry_run:
+        todo = needs_run(stages, set(args.force))
+        for s in stages:
+            print(f"  {s.id:<24} {s.key} {'RUN' if s in todo else 'up to date'}")
+        return
+
+    t0 = time.perf_counter()
+    ok = execute(stages, int(cfg.get("workers", 4)), set(args.force))
+    print(f"\n[{'OK' if ok else 'FAILED'}] {time.perf_counter() - t0:.1f}s")
+    if ok:
+        final = stages[-1].out / "data.yaml"
+        shutil.copy2(final, work_root / "data.yaml")
+        print(f"data.yaml: {final}")
+        print(f"(최신 결과 복사본: {work_root / 'data.yaml'})")
+
+    # 이번 실행에서 돌린 stage의 단계별 시간 (스킵한 stage는 기록 없음)
+    metrics.print_summary()
+    metrics.dump_json(work_root / "metrics.json")
+    (work_root / "metrics.prom").write_text(metrics.render_prometheus(), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+이미지 용량 줄이기 (리사이즈 + 재압축) stage
+
+AIHub 원본 이미지는 학습 해상도(imgsz=640)보다 훨씬 큰데 04/05가 원본 크기 그대로 복사함.
+YOLO 데이터셋(images/<split>, labels/<split>)을 새 폴더로 만들면서
+- 긴 변을 MAX_SIDE로 줄이고 (비율 유지, 확대는 안 함)
+- JPEG / WebP 지정 품질로 다시 저장 (EXIF 회전 정보는 그대로 유지)
+- 라벨은 정규화 좌표라 그대로 유효하므로 hardlink로 전달하고, 비율이 바뀌지 않았는지 + 좌표가 0~1인지 검사
+- 출력이 원본보다 새롭고 설정이 같으면 건너뜀 (증분)
+
+디코딩: JPEG는 Pillow draft 모드로 1/2, 1/4, 1/8 축소 디코딩 (Pillow-SIMD 설치 시 리사이즈도 빨라짐)
+        --turbojpeg 를 주면 PyTurboJPEG(libjpeg-turbo)로 축소 디코딩
+
+사용 예:
+    python reencode_images.py C:\\ROKEY\\recycle_yolo C:\\ROKEY\\recycle_yolo_640 --max-side 960 --quality 90
+    python reencode_images.py C:\\ROKEY\\recycle_yolo C:\\ROKEY\\recycle_yolo_webp --format webp --quality 85
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+SPLITS = ["train", "val"]
+
+# 기본값 (원하면 여기만 바꿔도 됨)
+MAX_SIDE = 960
+QUALITY = 90
+FORMAT = "jpeg"   # "jpeg" / "webp"
+
+_turbo = None
+
+
+def _get_turbo():
+    global _turbo
+    if _turbo is None:
+        from turbojpeg import TurboJPEG
+        _turbo = TurboJPEG()
+    return _turbo
+
+
+def load_downscaled(src: Path, max_side: int, use_turbo: bool):
+    """
+    max_side 이상인 범위에서 가장 작게 디코딩 (JPEG만 가능, 나머지는 전체 디코딩)
+    returns: (PIL.Image, 원본 (w, h), exif bytes)
+    """
+    from PIL import Image
+
+    im = Image.open(src)
+    orig = im.size
+    exif = im.info.get("exif", b"")
+
+    if use_turbo and im.format == "JPEG":
+        tj = _get_turbo()
+        from turbojpeg import TJPF_RGB
+
+        factor = (1, 1)
+        for num, den in sorted(tj.scaling_factors, key=lambda f: f[0] / f[1]):
+            if num / den <= 1 and min(orig[0] * num / den, orig[1] * num / den) >= 1 \
+                    and max(orig) * num / den >= max_side:
+                factor = (num, den)
+                break
+        arr = tj.decode(src.read_bytes(), pixel_format=TJPF_RGB, scaling_factor=factor)
+        return Image.fromarray(arr), orig, exif
+
+    if im.format == "JPEG":
+        r = max_side / max(orig)
+        if r < 1:
+            im.draft("RGB", (max(1, int(orig[0] * r)), max(1, int(orig[1] * r))))
+    return im.convert("RGB"), orig, exif
+
+
+def reencode_one(args) -> dict:
+    src, dst, max_side, quality, fmt, use_turbo = args
+    src, dst = Path(src), Path(dst)
+    from PIL import Image
+
+    t0 = time.perf_counter()
+    src_bytes = src.stat().st_size
+    with Image.open(src) as probe:
+        orig = probe.size
+        same_fmt = (probe.format or "").lower() == fmt
+
+    if max(orig) <= max_side and same_fmt:
+        # 이미 작고 형식도 같으면 다시 압축하지 않음 (화질 손실 방지)
+        _link(src, dst)
+        return {"src": str(src), "w": orig[0], "h": orig[1], "ow": orig[0], "oh": orig[1],
+                "src_bytes": src_bytes, "dst_bytes": src_bytes, "sec": time.perf_counter() - t0}
+
+    im, orig, exif = load_downscaled(src, max_side, use_turbo)
+    r = min(1.0, max_side / max(orig))
+    size = (max(1, round(orig[0] * r)), max(1, round(orig[1] * r)))
+    if im.size != size:
+        im = im.resize(size, Image.Resampling.LANCZOS if r > 0.5 else Image.Resampling.BOX)
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(dst.name + ".tmp")
+    save_args = {"quality": quality, "exif": exif} if exif else {"quality": quality}
+    if fmt == "jpeg":
+        im.save(tmp, "JPEG", optimize=True, **save_args)
+    else:
+        im.save(tmp, "WEBP", method=4, **save_args)
+    os.replace(tmp, dst)
+    return {"src": str(src), "w": orig[0], "h": orig[1], "ow": size[0], "oh": size[1],
+            "src_bytes": src_bytes, "dst_bytes": dst.stat().st_size, "sec": time.perf_counter() - t0}
+
+
+def _link(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def check_label(lbl: Path, r: dict) -> str | None:
+    """라벨이 리사이즈 후에도 유효한지 검사. 문제 없으면 None"""
+    # 비율 검사: 반올림 오차(1px) 이내여야 정규화 좌표가 그대로 맞음
+    if abs(r["ow"] / r["oh"] - r["w"] / r["h"]) > (1.0 / min(r["ow"], r["oh"])) * (r["w"] / r["h"]) + 1e-9:
+        return f"aspect changed {r['w']}x{r['h']} -> {r['ow']}x{r['oh']}"
+    if not lbl.exists():
+        return None
+    for i, line in enumerate(lbl.read_text(encoding="utf-8", errors="ignore").splitlines(), 1):
+        parts = line.split()
+        if not parts:
+            continue
+        if len(parts) != 5:
+            return f"line {i}: {len(parts)} columns"
+        try:
+            vals = [float(v) for v in parts[1:]]
+        except ValueError:
+            return f"line {i}: not a number"
+        if any(v < 0 or v > 1 for v in vals):
+            return f"line {i}: coordinate out of 0..1"
+    return None
+
+
+def reencode_split(src_root: Path, dst_root: Path, split: str, max_side: int, quality: int, fmt: str,
+                   workers: int, use_turbo: bool = False) -> dict:
+    ext = ".jpg" if fmt == "jpeg" else ".webp"
+    img_dir, lbl_dir = src_root / "images" / split, src_root / "labels" / split
+    out_img, out_lbl = dst_root / "images" / split, dst_root / "labels" / split
+    out_img.mkdir(parents=True, exist_ok=True)
+    out_lbl.mkdir(parents=True, exist_ok=True)
+
+    imgs = sorted(p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in IMG_EXTS)
+    tasks, skipped = [], 0
+    for p in imgs:
+        dst = out_img / (p.stem + ext)
+        if dst.exists() and dst.stat().st_mtime >= p.stat().st_mtime:
+            skipped += 1
+            continue
+        tasks.append((str(p), str(dst), max_side, quality, fmt, use_turbo))
+
+    t0 = time.perf_counter()
+    src_bytes = dst_bytes = 0
+    problems = []
+    with ProcessPoolExecutor(max(1, workers)) as ex:
+        for i, r in enumerate(ex.map(reencode_one, tasks, chunksize=16), 1):
+            src_bytes += r["src_bytes"]
+            dst_bytes += r["dst_bytes"]
+            lbl = lbl_dir / (Path(r["src"]).stem + ".txt")
+            bad = check_label(lbl, r)
+            if bad:
+                problems.append(f"{r['src']}: {bad}")
+            if i % 2000 == 0:
+                print(f"  [{split}] progress: {i}/{len(tasks)}")
+    dt = time.perf_counter() - t0
+
+    # 라벨은 좌표가 정규화되어 있으므로 그대로 전달
+    for p in imgs:
+        lbl = lbl_dir / f"{p.stem}.txt"
+        dst = out_lbl / lbl.name
+        if lbl.exists() and not (dst.exists() and dst.stat().st_mtime >= lbl.stat().st_mtime):
+            _link(lbl, dst)
+
+    return {
+        "images": len(imgs), "processed": len(tasks), "skipped": skipped,
+        "src_bytes": src_bytes, "dst_bytes": dst_bytes, "saved_bytes": src_bytes - dst_bytes,
+        "images_per_s": round(len(tasks) / dt, 1) if dt > 0 and tasks else 0.0,
+        "label_problems": problems,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("src_root", help="YOLO 데이터셋 폴더 (images/, labels/, data.yaml)")
+    ap.add_argument("dst_root", help="출력 폴더")
+    ap.add_argument("--splits", nargs="+", default=SPLITS)
+    ap.add_argument("--max-side", type=int, default=MAX_SIDE)
+    ap.add_argument("--quality", type=int, default=QUALITY)
+    ap.add_argument("--format", choices=["jpeg", "webp"], default=FORMAT)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--turbojpeg", action="store_true", help="PyTurboJPEG로 축소 디코딩")
+    args = ap.parse_args()
+
+    src, dst = Path(args.src_root), Path(args.dst_root)
+    dst.mkdir(parents=True, exist_ok=True)
+
+    # 설정이 바뀌면 이전 출력은 쓸 수 없으므로 전부 다시 만듦
+    params = {"max_side": args.max_side, "quality": args.quality, "format": args.format}
+    sidecar = dst / "reencode.json"
+    if sidecar.exists() and json.loads(sidecar.read_text(encoding="utf-8")).get("params") != params:
+        print("[INFO] 설정이 바뀌어서 기존 이미지를 다시 만듭니다.")
+        for split in args.splits:
+            shutil.rmtree(dst / "images" / split, ignore_errors=True)
+
+    report = {"params": params, "splits": {}}
+    for split in args.splits:
+        if not (src / "images" / split).exists():
+            print(f"[WARN] 없음: {src / 'images' / split}")
+            continue
+        r = reencode_split(src, dst, split, args.max_side, args.quality, args.format, args.workers, args.turbojpeg)
+        report["splits"][split] = r
+        ratio = r["dst_bytes"] / r["src_bytes"] if r["src_bytes"] else 1.0
+        print(f"[{split}] images {r['images']} | processed {r['processed']} | skipped {r['skipped']} | "
+              f"{r['src_bytes'] / 1e6:.1f} MB -> {r['dst_bytes'] / 1e6:.1f} MB ({ratio:.0%}) | "
+              f"{r['images_per_s']} images/s")
+        for p in r["label_problems"][:10]:
+            print(f"  [LABEL] {p}")
+        if r["label_problems"]:
+            print(f"  [WARN] 라벨 문제 {len(r['label_problems'])}건 (reencode.json 참고)")
+
+    if (src / "data.yaml").exists():
+        text = (src / "data.yaml").read_text(encoding="utf-8")
+        lines = [f"path: {dst.resolve().as_posix()}" if ln.startswith("path:") else ln for ln in text.splitlines()]
+        (dst / "data.yaml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    sidecar.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"[OK] {sidecar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+YOLO 라벨 클래스 체계 변환 (합치기 / 지우기 / 이름 바꾸기) - json에서 다시 변환하지 않음
+
+taxonomy.yaml 의 schemes.<이름> 으로 (원래 class id -> 새 class id) 변환표(LUT)를 만들고
+labels/<split>/*.txt 의 첫 번째 열만 바꿔서 새 데이터셋을 만듦.
+- 파일 묶음(chunk)마다 모든 줄의 class 열을 한 번에 NumPy 배열로 읽어서 LUT로 변환 (좌표 문자열은 그대로 유지)
+- chunk는 프로세스 병렬로 처리, 파일은 임시 파일에 쓰고 os.replace (중간에 끊겨도 반쯤 쓴 라벨 없음)
+- 내용이 안 바뀌는 라벨과 이미지는 hardlink로 전달 (용량 거의 0)
+- --in-place 는 labels/<split>.remap_tmp 에 새 라벨을 다 만든 뒤 remap_state.json 을 쓰고 폴더를 교체
+  (교체 중에 끊기면 다시 실행했을 때 교체만 마저 함. 이미 새 체계인 데이터셋은 다시 변환하지 않음)
+- data.yaml (nc, names)을 새 체계로 다시 쓰고, 변환 내용은 remap.json 에 기록
+
+사용 예:
+    python remap_classes.py C:\\ROKEY\\recycle_yolo C:\\ROKEY\\recycle_yolo_12 --scheme recycle12
+    python remap_classes.py C:\\ROKEY\\recycle_yolo_small --in-place --scheme recycle12
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+import taxonomy
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+SPLITS = ["train", "val"]
+CHUNK = 2000       # 프로세스에 한 번에 넘길 파일 수
+INVALID = -2       # class 열이 숫자가 아니거나 범위 밖인 줄
+STAGE_SUFFIX = ".remap_tmp"   # --in-place 새 라벨을 먼저 만드는 폴더 (labels/<split>.remap_tmp)
+OLD_SUFFIX = ".remap_old"     # 교체할 때 원래 라벨을 잠깐 옮겨두는 폴더
+STATE_FILE = "remap_state.json"
+
+
+def _link(src: Path, dst: Path) -> None:
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _parse_cls(heads: list[str]) -> np.ndarray:
+    try:
+        v = np.array(heads, dtype=np.float64)
+    except ValueError:  # 숫자가 아닌 줄이 섞인 경우만 하나씩
+        v = np.array([_to_float(h) for h in heads], dtype=np.float64)
+    out = np.full(len(v), INVALID, dtype=np.int64)
+    ok = np.isfinite(v) & (v == np.floor(v))
+    out[ok] = v[ok]
+    return out
+
+
+def _to_float(s: str) -> float:
+    try:
+        return float(s)
+    except ValueError:
+        return np.nan
+
+
+def remap_chunk(args) -> dict:
+    names, src_dir, dst_dir, lut = args
+    src_dir, dst_dir = Path(src_dir), Path(dst_dir)
+    lut = np.asarray(lut, dtype=np.int64)
+    in_place = src_dir == dst_dir
+
+    texts = [(src_dir / n).read_text(encoding="utf-8", errors="ignore") for n in names]
+    rows = [[ln.split(None, 1) for ln in t.splitlines() if ln.strip()] for t in texts]
+    counts = np.array([len(r) for r in rows], dtype=np.int64)
+    flat = [r for rs in rows for r in rs]
+
+    # 모든 파일의 class 열을 한 번에 변환
+    old = _parse_cls([r[0] for r in flat])
+    valid = (old >= 0) & (old < len(lut))
+    new = np.full(len(old), INVALID, dtype=np.int64)
+    new[valid] = lut[old[valid]]
+
+    stats = {"files": len(names), "written": 0, "linked": 0, "boxes_in": len(old), "boxes_out": int((new >= 0).sum()),
+             "dropped": int((new == -1).sum()), "invalid": int((new == INVALID).sum()), "emptied": 0,
+             "per_class": np.bincount(new[new >= 0], minlength=int(lut.max(initial=-1)) + 1).tolist()}
+
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    same = (old == new) & (new >= 0)  # 줄마다 안 바뀌었는지 (잘못된 줄은 지워야 하므로 바뀐 것으로)
+    for i, n in enumerate(names):
+        s, e = bounds[i], bounds[i + 1]
+        if same[s:e].all():
+            if not in_place:
+                _link(src_dir / n, dst_dir / n)
+                stats["linked"] += 1
+            continue
+        keep = [f"{c} {flat[j][1] if len(flat[j]) > 1 else ''}".rstrip() for j, c in zip(range(s, e), new[s:e]) if c >= 0]
+        if e > s and not keep:
+            stats["emptied"] += 1
+        _write_atomic(dst_dir / n, "\n".join(keep) + ("\n" if keep else ""))
+        stats["written"] += 1
+    return stats
+
+
+def link_chunk(args) -> int:
+    names, src_dir, dst_dir = args
+    n = 0
+    for name in names:
+        dst = Path(dst_dir) / name
+        if not dst.exists():
+            _link(Path(src_dir) / name, dst)
+            n += 1
+    return n
+
+
+def _list(d: Path, exts: set[str]) -> list[str]:
+    with os.scandir(d) as it:
+        return sorted(e.name for e in it if e.is_file() and os.path.splitext(e.name)[1].lower() in exts)
+
+
+def remap_split(src_root: Path, dst_root: Path, split: str, lut: np.ndarray, workers: int,
+                dst_name: str | None = None) -> dict:
+    src_lbl, dst_lbl = src_root / "labels" / split, dst_root / "labels" / (dst_name or split)
+    dst_lbl.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    labels = _list(src_lbl, {".txt"})
+    tasks = [(labels[i:i + CHUNK], str(src_lbl), str(dst_lbl), lut.tolist()) for i in range(0, len(labels), CHUNK)]
+    stats = {"files": 0, "written": 0, "linked": 0, "boxes_in": 0, "boxes_out": 0, "dropped": 0, "invalid": 0,
+             "emptied": 0, "per_class": np.zeros(int(lut.max(initial=-1)) + 1, np.int64), "images_linked": 0}
+    with ProcessPoolExecutor(max(1, workers)) as ex:
+        for r in ex.map(remap_chunk, tasks):
+            for k, v in r.items():
+                stats[k] = stats[k] + np.asarray(v) if k == "per_class" else stats[k] + v
+
+        src_img, dst_img = src_root / "images" / split, dst_root / "images" / split
+        if src_root != dst_root and src_img.exists():  # 이미지는 그대로 hardlink
+            dst_img.mkdir(parents=True, exist_ok=True)
+            images = _list(src_img, IMG_EXTS)
+            img_tasks = [(images[i:i + CHUNK], str(src_img), str(dst_img)) for i in range(0, len(images), CHUNK)]
+            stats["images_linked"] = sum(ex.map(link_chunk, img_tasks))
+
+    stats["per_class"] = stats["per_class"].tolist()
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    return stats
+
+
+def read_names(data_yaml: Path) -> tuple[dict, list[str]]:
+    if not data_yaml.exists():
+        return {}, taxonomy.names()
+    data = yaml.safe_load(data_yaml.read_text(encoding="utf-8")) or {}
+    names = data.get("names") or taxonomy.names()
+    if isinstance(names, dict):
+        names = [names[k] for k in sorted(names)]
+    return data, list(names)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("src_root", help="YOLO 데이터셋 폴더 (images/, labels/, data.yaml)")
+    ap.add_argument("dst_root", nargs="?", help="출력 폴더 (--in-place면 생략)")
+    ap.add_argument("--scheme", required=True, help="taxonomy.yaml의 schemes 이름 (예: recycle12)")
+    ap.add_argument("--taxonomy", default=str(taxonomy.TAXONOMY_FILE))
+    ap.add_argument("--splits", nargs="+", default=SPLITS)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--in-place", action="store_true", help="원래 라벨을 직접 바꿈 (이미지는 그대로)")
+    args = ap.parse_args()
+
+    src = Path(args.src_root)
+    if args.in_place and (src / STATE_FILE).exists():  # 이전 --in-place가 교체 중에 끊긴 경우
+        print(f"[INFO] {src / STATE_FILE} 발견: 이전 실행의 폴더 교체를 마무리합니다 (다시 변환하지 않음).")
+        finish_in_place(src)
+        return
+    if args.in_place == bool(args.dst_root):
+        raise SystemExit("[ERROR] dst_root 또는 --in-place 중 하나만 주세요.")
+    dst = src if args.in_place else Path(args.dst_root)
+    if not args.in_place and dst.resolve() == src.resolve():
+        raise SystemExit("[ERROR] 출력 폴더가 원본과 같습니다. --in-place를 쓰세요.")
+
+    tax = taxonomy.load(Path(args.taxonomy))
+    if args.scheme not in (tax.get("schemes") or {}):
+        raise SystemExit(f"[ERROR] scheme 없음: {args.scheme} (있는 것: {list(tax.get('schemes') or {})})")
+    data, src_names = read_names(src / "data.yaml")
+    lut, new_names = taxonomy.build_lut(src_names, tax["schemes"][args.scheme])
+    if src_names == new_names:
+        raise SystemExit(f"[ERROR] {src / 'data.yaml'} 가 이미 {args.scheme} 체계입니다. (두 번 변환하지 않음)")
+
+    print("=" * 50)
+    print(f"{len(src_names)} classes -> {len(new_names)} classes ({args.scheme})")
+    for i, n in enumerate(src_names):
+        print(f"  {i:>3} {n:<20} -> {'(drop)' if lut[i] < 0 else f'{lut[i]:>3} {new_names[lut[i]]}'}")
+    unused = [n for i, n in enumerate(new_names) if i not in set(lut.tolist())]
+    if unused:
+        print(f"[WARN] 원래 클래스에서 아무것도 매핑되지 않는 새 클래스: {unused}")
+    print("=" * 50)
+
+    report = {"scheme": args.scheme, "src_names": src_names, "names": new_names, "lut": lut.tolist(), "splits": {}}
+    for split in args.splits:
+        if not (src / "labels" / split).exists():
+            print(f"[WARN] 없음: {src / 'labels' / split}")
+            continue
+        staged = None
+        if args.in_place:  # 원래 라벨은 교체 전까지 그대로 (중간에 끊겨도 다시 실행하면 처음부터)
+            staged = split + STAGE_SUFFIX
+            shutil.rmtree(src / "labels" / staged, ignore_errors=True)
+        r = remap_split(src, dst, split, lut, args.workers, staged)
+        report["splits"][split] = r
+        print(f"[{split}] labels {r['files']} | written {r['written']} | linked {r['linked']} | "
+              f"boxes {r['boxes_in']} -> {r['boxes_out']} (dropped {r['dropped']}, invalid {r['invalid']}) | "
+              f"emptied {r['emptied']} | {r['files'] / max(r['seconds'], 1e-9):.0f} files/s ({r['seconds']}s)")
+        if r["invalid"]:
+            print(f"  [WARN] class 열이 잘못된 줄 {r['invalid']}개는 버렸습니다.")
+
+    data = dict(data)
+    if not args.in_place or "path" in data:
+        data["path"] = dst.resolve().as_posix()
+    for k in ("train", "val", "test"):  # 원본 폴더를 가리키는 절대 경로는 출력 폴더 기준 상대 경로로
+        v = data.get(k)
+        if isinstance(v, str) and Path(v).is_absolute() and Path(v).resolve().is_relative_to(src.resolve()):
+            data[k] = Path(v).resolve().relative_to(src.resolve()).as_posix()
+    data.setdefault("train", "images/train")
+    data.setdefault("val", "images/val")
+    data["nc"] = len(new_names)
+    data["names"] = new_names
+    if args.in_place:
+        # 새 라벨이 다 준비된 뒤에 상태 파일을 쓰고 교체 (이 뒤로 끊기면 다시 실행해서 교체만 마무리)
+        state = {"splits": list(report["splits"]), "data": data, "report": report}
+        _write_atomic(src / STATE_FILE, json.dumps(state, indent=2, ensure_ascii=False))
+        finish_in_place(src)
+        return
+    _write_atomic(dst / "data.yaml", yaml.safe_dump(data, allow_unicode=True, sort_keys=False))
+    (dst / "remap.json").write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"[OK] {dst / 'data.yaml'}")
+    print(f"[OK] {dst / 'remap.json'}")
+
+
+def finish_in_place(root: Path) -> None:
+    """remap_state.json 대로 labels/<split>.remap_tmp -> labels/<split> 교체 후 data.yaml, remap.json 쓰기 (여러 번 불러도 같은 결과)"""
+    state = json.loads((root / STATE_FILE).read_text(encoding="utf-8"))
+    for split in state["splits"]:
+        cur = root / "labels" / split
+        tmp, old = cur.with_name(split + STAGE_SUFFIX), cur.with_name(split + OLD_SUFFIX)
+        if tmp.exists():
+            if cur.exists():
+                shutil.rmtree(old, ignore_errors=True)
+                os.replace(cur, old)
+            os.replace(tmp, cur)
+    _write_atomic(root / "data.yaml", yaml.safe_dump(state["data"], allow_unicode=True, sort_keys=False))
+    (root / "remap.json").write_text(json.dumps(state["report"], indent=2, ensure_ascii=False), encoding="utf-8")
+    for split in state["splits"]:
+        shutil.rmtree(root / "labels" / (split + OLD_SUFFIX), ignore_errors=True)
+    (root / STATE_FILE).unlink()
+    print(f"[OK] {root / 'data.yaml'}")
+    print(f"[OK] {root / 'remap.json'}")
+
+
+if __name__ == "__main__":
+    main()
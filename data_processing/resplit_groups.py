@@ -0,0 +1,336 @@
+"""
+누수(leakage) 없는 train / val 재분할
+
+AIHub Training / Validation 폴더를 그대로 split으로 쓰고 03이 split마다 따로 prune 하기 때문에
+같은 물체를 거의 똑같이 찍은 사진이 train과 val에 동시에 들어가서 val mAP가 부풀려질 수 있음.
+1) 그룹 만들기 (union-find)
+   - (선택) 파일 이름 접두어: --prefix-regex 의 group(1)이 같으면 같은 그룹. 기본은 안 씀
+     IMG_0001, IMG_0002 처럼 번호만 다른 이름이 전부 다른 물체인 데이터셋에서는 전체가 한 그룹이 되므로
+     끝 번호가 "같은 물체의 촬영 번호"일 때만 SEQ_PREFIX_REGEX 같은 규칙을 줄 것
+   - 지각 해시(dHash 64bit): 해밍 거리 HAMMING 이하면 같은 그룹
+     64bit를 HAMMING+1 개 band로 나누면 거리 HAMMING 이하인 쌍은 적어도 한 band가 완전히 같음(비둘기집)
+     -> band 값이 같은 이미지끼리만 비교 (전체 쌍 비교 없이 수십만 장 가능)
+     해시는 dhash_cache.npz 에 (경로, 크기, 수정 시각) 기준으로 캐시
+2) 그룹 단위 층화 분할: 큰 그룹부터 클래스 비율이 목표(val 비율)에 더 가까워지는 쪽에 배정
+   가장 큰 그룹이 val 목표 수(val_frac * 전체)보다 크면 그룹 규칙이 너무 느슨한 것이므로 중단 (--force 로 무시)
+3) train_resplit.txt / val_resplit.txt (이미지 경로 목록), data_resplit.yaml, resplit_report.json 작성
+   원본 폴더는 그대로 (Ultralytics는 txt 경로 목록을 split으로 받을 수 있음)
+
+사용 예:
+    python resplit_groups.py C:\\ROKEY\\recycle_yolo
+    python resplit_groups.py C:\\ROKEY\\recycle_yolo --val-frac 0.15 --hamming 6 --prefix-regex "^(.*?)[_-]?\\d+$"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from weighted_sampler import build_index, write_data_yaml
+
+SPLITS = ["train", "val"]
+VAL_FRAC = 0.1
+HAMMING = 4            # dHash 해밍 거리 이하면 같은 장면으로 봄 (64bit 중)
+MAX_BUCKET = 512       # band 값이 같은 이미지가 이보다 많으면 (단색 배경 등) 그 band는 비교 안 함
+PREFIX_REGEX = ""                    # 기본: 파일 이름 접두어 그룹 안 씀 (dHash만)
+SEQ_PREFIX_REGEX = r"^(.*?)[_-]?\d+$"  # 예: 끝의 촬영 번호를 뗀 부분이 접두어 (매칭 안 되면 stem 전체)
+SEED = 42
+CHUNK = 256
+
+
+# =========================
+# 지각 해시
+# =========================
+
+def dhash(path: str) -> int:
+    """9x8 흑백으로 줄인 뒤 가로로 이웃한 픽셀 밝기 비교 -> 64bit"""
+    from PIL import Image
+
+    with Image.open(path) as im:
+        im.draft("L", (64, 64))  # JPEG는 축소 디코딩
+        px = np.asarray(im.convert("L").resize((9, 8), Image.Resampling.BILINEAR), dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _hash_chunk(paths: list[str]) -> list[int | None]:
+    out = []
+    for p in paths:
+        try:
+            out.append(dhash(p))
+        except Exception:
+            out.append(None)  # 못 읽은 이미지는 해시 그룹에서 제외
+    return out
+
+
+def hash_images(paths: list[str], cache: Path, workers: int) -> tuple[np.ndarray, np.ndarray]:
+    """returns: (해시 uint64, 읽기 성공 여부)"""
+    sig = []
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:  # 인덱싱 뒤에 지워지거나 옮겨진 이미지 (lint_labels --fix 격리 등)는 해시 그룹에서 제외
+            sig.append("")
+            continue
+        sig.append(f"{p}|{st.st_size}|{st.st_mtime_ns}")
+    old = {}
+    if cache.exists():
+        z = np.load(cache, allow_pickle=False)
+        old = dict(zip(z["sig"].tolist(), zip(z["hash"].tolist(), z["ok"].tolist())))
+
+    hashes = np.zeros(len(paths), np.uint64)
+    ok = np.zeros(len(paths), bool)
+    todo = []
+    for i, s in enumerate(sig):
+        if s in old:
+            hashes[i], ok[i] = old[s]
+        elif s:
+            todo.append(i)
+    print(f"[HASH] {len(paths)} images | cached {len(paths) - len(todo)} | new {len(todo)}")
+    if todo:
+        t0 = time.perf_counter()
+        chunks = [todo[i:i + CHUNK] for i in range(0, len(todo), CHUNK)]
+        with ProcessPoolExecutor(max(1, workers)) as ex:
+            for idx, hs in zip(chunks, ex.map(_hash_chunk, [[paths[i] for i in c] for c in chunks])):
+                for i, h in zip(idx, hs):
+                    if h is not None:
+                        hashes[i], ok[i] = h, True
+        print(f"[HASH] {len(todo) / (time.perf_counter() - t0):.0f} images/s")
+        np.savez(cache, sig=np.array(sig), hash=hashes, ok=ok)
+    return hashes, ok
+
+
+# =========================
+# union-find 그룹
+# =========================
+
+class UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, x: int) -> int:
+        p = self.parent
+        root = x
+        while p[root] != root:
+            root = p[root]
+        while p[x] != root:  # 경로 압축
+            p[x], x = root, p[x]
+        return root
+
+    def union_pairs(self, a: np.ndarray, b: np.ndarray) -> None:
+        for x, y in zip(a.tolist(), b.tolist()):
+            rx, ry = self.find(x), self.find(y)
+            if rx != ry:
+                self.parent[max(rx, ry)] = min(rx, ry)
+
+    def labels(self) -> np.ndarray:
+        return np.array([self.find(i) for i in range(len(self.parent))])
+
+
+def prefix_pairs(stems: list[str], pattern: str) -> tuple[np.ndarray, np.ndarray]:
+    rx = re.compile(pattern)
+    keys = []
+    for s in stems:
+        m = rx.match(s)
+        keys.append(m.group(1) if m and m.group(1) else s)
+    _, inv = np.unique(np.array(keys), return_inverse=True)
+    first = np.full(inv.max(initial=-1) + 1, -1)
+    first[inv[::-1]] = np.arange(len(inv))[::-1]  # 그룹마다 처음 나온 이미지
+    a = np.arange(len(inv))
+    keep = first[inv] != a
+    return a[keep], first[inv][keep]
+
+
+def hash_pairs(hashes: np.ndarray, ok: np.ndarray, hamming: int,
+               max_bucket: int) -> tuple[np.ndarray, np.ndarray, int]:
+    """band 값이 같은 이미지끼리만 해밍 거리 계산. returns: (a, b, 건너뛴 band 묶음 수)"""
+    valid = np.flatnonzero(ok)
+    h = hashes[valid]
+    n_bands = hamming + 1
+    widths = [64 // n_bands + (1 if i < 64 % n_bands else 0) for i in range(n_bands)]
+    pa, pb, skipped = [], [], 0
+    shift = 0
+    for w in widths:
+        band = (h >> np.uint64(shift)) & np.uint64((1 << w) - 1)
+        shift += w
+        order = np.argsort(band, kind="stable")
+        sb = band[order]
+        _, start, cnt = np.unique(sb, return_index=True, return_counts=True)
+        big = cnt > max_bucket
+        skipped += int(big.sum())
+        small = np.repeat(~big, cnt)  # 너무 큰 묶음은 제외
+        # 정렬된 상태에서 d칸 떨어진 이웃끼리 비교 (같은 band 값인 동안만)
+        for d in range(1, int(cnt[~big].max(initial=1))):
+            same = (sb[d:] == sb[:-d]) & small[d:] & small[:-d]
+            if not same.any():
+                break
+            i = np.flatnonzero(same)
+            x, y = order[i], order[i + d]
+            dist = np.unpackbits((h[x] ^ h[y]).view(np.uint8).reshape(-1, 8), axis=1).sum(1)
+            close = dist <= hamming
+            pa.append(valid[x[close]])
+            pb.append(valid[y[close]])
+    if not pa:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), skipped
+    return np.concatenate(pa), np.concatenate(pb), skipped
+
+
+# =========================
+# 그룹 단위 층화 분할
+# =========================
+
+def stratified_group_split(group: np.ndarray, classes: list[list[int]], nc: int, val_frac: float,
+                           seed: int) -> np.ndarray:
+    """returns: 이미지별 is_val (bool)"""
+    gids, inv = np.unique(group, return_inverse=True)
+    G = len(gids)
+    onehot = np.zeros((len(group), nc + 1), np.float64)  # 마지막 열 = 이미지 수
+    for i, cs in enumerate(classes):
+        onehot[i, [c for c in cs if 0 <= c < nc]] = 1
+    onehot[:, nc] = 1
+    gcount = np.zeros((G, nc + 1))
+    np.add.at(gcount, inv, onehot)
+
+    total = gcount.sum(0)
+    target = total * val_frac
+    scale = 1.0 / np.maximum(total, 1)
+
+    rng = random.Random(seed)
+    order = list(range(G))
+    rng.shuffle(order)  # 같은 크기끼리는 랜덤
+    order.sort(key=lambda g: -gcount[g, nc])
+
+    val = np.zeros(nc + 1)
+    trn = np.zeros(nc + 1)
+    is_val_g = np.zeros(G, bool)
+    for g in order:
+        c = gcount[g]
+        # val에 넣었을 때 / train에 넣었을 때 목표 비율과의 차이 (클래스별로 정규화한 제곱합)
+        e_val = (((val + c - target) * scale) ** 2).sum() + (((trn - (total - target)) * scale) ** 2).sum()
+        e_trn = (((val - target) * scale) ** 2).sum() + (((trn + c - (total - target)) * scale) ** 2).sum()
+        if e_val < e_trn:
+            val += c
+            is_val_g[g] = True
+        else:
+            trn += c
+    return is_val_g[inv]
+
+
+def leakage(group: np.ndarray, is_val: np.ndarray) -> tuple[int, int]:
+    """train과 val에 동시에 걸친 그룹 수, 그 그룹에 속한 val 이미지 수"""
+    n = int(group.max(initial=-1)) + 1
+    in_val = np.bincount(group, weights=is_val, minlength=n) > 0
+    in_trn = np.bincount(group, weights=~is_val, minlength=n) > 0
+    leaky = in_val & in_trn
+    return int(leaky.sum()), int((is_val & leaky[group]).sum())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset_root", help="YOLO 데이터셋 폴더 (images/, labels/, data.yaml)")
+    ap.add_argument("--splits", nargs="+", default=SPLITS, help="합쳐서 다시 나눌 split")
+    ap.add_argument("--val-frac", type=float, default=VAL_FRAC)
+    ap.add_argument("--hamming", type=int, default=HAMMING, help="dHash 해밍 거리 (0~15, 음수면 해시 그룹 안 씀)")
+    ap.add_argument("--max-bucket", type=int, default=MAX_BUCKET)
+    ap.add_argument("--prefix-regex", default=PREFIX_REGEX,
+                    help=f"group(1)이 같은 stem끼리 같은 그룹 (기본 안 씀, 예: '{SEQ_PREFIX_REGEX}')")
+    ap.add_argument("--force", action="store_true", help="가장 큰 그룹이 val 목표 수보다 커도 그대로 분할")
+    ap.add_argument("--seed", type=int, default=SEED)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--reindex", action="store_true", help="캐시된 클래스 인덱스 무시하고 다시 읽기")
+    args = ap.parse_args()
+
+    root = Path(args.dataset_root)
+    items, orig = [], []
+    for split in args.splits:
+        its = build_index(root, split, args.reindex)
+        items += its
+        orig += [split] * len(its)
+    paths = [it["img"] for it in items]
+    stems = [Path(p).stem for p in paths]
+    classes = [it["classes"] for it in items]
+    nc = max((c for cs in classes for c in cs), default=-1) + 1
+    print(f"[INFO] images {len(items)} ({dict(Counter(orig))}), classes {nc}")
+
+    t0 = time.perf_counter()
+    uf = UnionFind(len(items))
+    n_prefix = n_hash = skipped = 0
+    if args.prefix_regex:
+        a, b = prefix_pairs(stems, args.prefix_regex)
+        uf.union_pairs(a, b)
+        n_prefix = len(a)
+    if args.hamming >= 0:
+        hashes, ok = hash_images(paths, root / "dhash_cache.npz", args.workers)
+        a, b, skipped = hash_pairs(hashes, ok, args.hamming, args.max_bucket)
+        uf.union_pairs(a, b)
+        n_hash = len(a)
+    group = uf.labels()
+    sizes = np.bincount(group)
+    sizes = sizes[sizes > 0]
+    print(f"[GROUP] prefix links {n_prefix} | hash links {n_hash} | groups {len(sizes)} | "
+          f"largest {sizes.max(initial=0)} | singletons {(sizes == 1).sum()} | {time.perf_counter() - t0:.1f}s")
+    if skipped:
+        print(f"[WARN] band 값이 너무 흔한 묶음 {skipped}개는 비교에서 제외 (--max-bucket)")
+    largest, val_target = int(sizes.max(initial=0)), args.val_frac * len(items)
+    if largest > val_target:
+        msg = (f"가장 큰 그룹 {largest}장이 val 목표 {val_target:.0f}장보다 큽니다. "
+               f"그룹 규칙이 너무 느슨합니다 (--prefix-regex / --hamming 확인).")
+        if not args.force:
+            raise SystemExit(f"[ERROR] {msg} 그래도 나누려면 --force")
+        print(f"[WARN] {msg}")
+
+    # 원래 split 기준 누수: train과 val에 동시에 걸친 그룹
+    orig_val = np.array([s != args.splits[0] for s in orig])
+    leaky_groups, leaky_val = leakage(group, orig_val)
+    print(f"[LEAK] 원래 분할: train/val에 걸친 그룹 {leaky_groups}개, "
+          f"그 그룹에 속한 val 이미지 {leaky_val} / {int(orig_val.sum())}")
+
+    is_val = stratified_group_split(group, classes, nc, args.val_frac, args.seed)
+    after_groups, after_val = leakage(group, is_val)
+    print(f"[LEAK] 새 분할: train/val에 걸친 그룹 {after_groups}개, val 이미지 {after_val}")
+
+    # 결과
+    train_list, val_list = root / "train_resplit.txt", root / "val_resplit.txt"
+    train_list.write_text("\n".join(p for p, v in zip(paths, is_val) if not v) + "\n", encoding="utf-8")
+    val_list.write_text("\n".join(p for p, v in zip(paths, is_val) if v) + "\n", encoding="utf-8")
+    yaml_path = root / "data_resplit.yaml"
+    write_data_yaml(root, yaml_path, train_list, "val")
+    text = yaml_path.read_text(encoding="utf-8").replace("val: images/val", f"val: {val_list.resolve().as_posix()}")
+    yaml_path.write_text(text, encoding="utf-8")
+
+    cnt_t, cnt_v = Counter(), Counter()
+    for cs, v in zip(classes, is_val):
+        (cnt_v if v else cnt_t).update(cs)
+    print("=" * 50)
+    print("class |  train |    val | val 비율")
+    per_class = {}
+    for c in range(nc):
+        t, v = cnt_t[c], cnt_v[c]
+        per_class[c] = {"train": t, "val": v, "val_frac": round(v / max(t + v, 1), 4)}
+        print(f"{c:>5} | {t:>6} | {v:>6} | {v / max(t + v, 1):8.1%}")
+    moved = int((is_val != orig_val).sum())
+    print(f"images train {int((~is_val).sum())} | val {int(is_val.sum())} | split이 바뀐 이미지 {moved}")
+    print("=" * 50)
+
+    report = {
+        "images": len(items), "groups": int(len(sizes)), "largest_group": int(sizes.max(initial=0)),
+        "prefix_regex": args.prefix_regex, "hamming": args.hamming, "val_frac": args.val_frac, "seed": args.seed,
+        "leakage_before": {"groups": leaky_groups, "val_images": leaky_val},
+        "leakage_after": {"groups": after_groups, "val_images": after_val},
+        "moved_images": moved, "per_class": per_class,
+    }
+    (root / "resplit_report.json").write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"[OK] {train_list}\n[OK] {val_list}\n[OK] {yaml_path}\n[OK] {root / 'resplit_report.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+YOLO 데이터셋을 tar shard(WebDataset 형식)로 묶고, 순차 읽기로 학습 데이터를 공급
+
+NAS / 오브젝트 스토리지 볼륨에서는 수만 개의 작은 파일을 랜덤으로 읽는 게 느리므로
+images/<split> + labels/<split> 를 일정 크기의 tar 파일로 묶어서 큰 파일 순차 읽기로 바꿈.
+
+- export : 이미지 + 라벨을 <stem>.jpg / <stem>.txt 쌍으로 shard-000000.tar ... 에 저장
+           index.json 에 shard별 샘플 수와 각 멤버의 (offset, size)를 기록 (랜덤 접근 가능)
+- reader : shard 순서를 섞고, 한 프로세스가 tar를 순차로 읽고, 버퍼 안에서 섞은 뒤
+           디코딩(JPEG -> numpy)은 worker 프로세스들이 병렬로 처리
+- bench  : 같은 데이터를 (1) 디렉터리 구조 (2) shard 로 읽을 때 처리량 비교
+           읽기 전에 page cache를 비움 (posix_fadvise DONTNEED, Linux / macOS 일부만 가능)
+
+사용 예:
+    python tar_shards.py export C:\\ROKEY\\recycle_yolo --split train --out C:\\ROKEY\\shards --shard-size 512
+    python tar_shards.py bench C:\\ROKEY\\recycle_yolo --split train --shards C:\\ROKEY\\shards\\train
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+import tarfile
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterator
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+# =========================
+# export
+# =========================
+
+def list_pairs(root: Path, split: str) -> list[tuple[Path, Path]]:
+    img_dir = root / "images" / split
+    lbl_dir = root / "labels" / split
+    if not img_dir.exists():
+        raise FileNotFoundError(f"경로가 없습니다: {img_dir}")
+    imgs = sorted((p for p in img_dir.iterdir() if p.is_file() and p.suffix.lower() in IMG_EXTS),
+                  key=lambda p: p.name)
+    return [(p, lbl_dir / f"{p.stem}.txt") for p in imgs]
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes, mtime: float) -> int:
+    """멤버를 추가하고 데이터 시작 위치(offset)를 돌려줌"""
+    ti = tarfile.TarInfo(name)
+    ti.size = len(data)
+    ti.mtime = int(mtime)
+    header = len(ti.tobuf(tar.format, tar.encoding, tar.errors))
+    offset = tar.offset + header
+    tar.addfile(ti, io.BytesIO(data))
+    return offset
+
+
+def export_shards(root: Path, split: str, out_dir: Path, shard_size: int = 512, max_bytes: int = 1 << 30,
+                  shuffle: bool = True, seed: int = 0) -> dict:
+    """
+    shard_size 샘플 또는 max_bytes 중 먼저 닿는 쪽에서 다음 shard로 넘어감.
+    export 시점에 한 번 섞어두면 shard 단위 셔플만으로도 클래스/촬영 순서 편향이 줄어듦.
+    """
+    pairs = list_pairs(root, split)
+    if shuffle:
+        random.Random(seed).shuffle(pairs)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    shards = []
+    tar = None
+    cur = {}
+    missing_label = 0
+
+    def close():
+        nonlocal tar
+        if tar is not None:
+            tar.close()
+            tmp = out_dir / (cur["name"] + ".tmp")
+            os.replace(tmp, out_dir / cur["name"])
+            cur["bytes"] = (out_dir / cur["name"]).stat().st_size
+            shards.append(dict(cur))
+            tar = None
+
+    for i, (img, lbl) in enumerate(pairs):
+        if tar is None or cur["count"] >= shard_size or cur["bytes"] >= max_bytes:
+            close()
+            name = f"shard-{len(shards):06d}.tar"
+            cur = {"name": name, "count": 0, "bytes": 0, "members": []}
+            tar = tarfile.open(out_dir / (name + ".tmp"), "w", format=tarfile.USTAR_FORMAT)
+
+        img_bytes = img.read_bytes()
+        if lbl.exists():
+            lbl_bytes = lbl.read_bytes()
+        else:
+            lbl_bytes = b""
+            missing_label += 1
+        key = img.stem
+        mtime = img.stat().st_mtime
+
+        img_off = _add_bytes(tar, key + img.suffix.lower(), img_bytes, mtime)
+        lbl_off = _add_bytes(tar, key + ".txt", lbl_bytes, mtime)
+        # 데이터 위치 (랜덤 접근용)
+        cur["members"].append([key, img.suffix.lower(), img_off, len(img_bytes), lbl_off, len(lbl_bytes)])
+        cur["count"] += 1
+        cur["bytes"] += len(img_bytes) + len(lbl_bytes) + 1024
+        if (i + 1) % 2000 == 0:
+            print(f"  progress: {i + 1}/{len(pairs)}")
+    close()
+
+    index = {
+        "split": split, "source": str(root.resolve()), "samples": len(pairs), "missing_label": missing_label,
+        "shards": shards,
+    }
+    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+    return index
+
+
+# =========================
+# streaming reader
+# =========================
+
+def _iter_tar(path: Path) -> Iterator[tuple[str, bytes, bytes]]:
+    """tar를 처음부터 끝까지 순차로 읽으며 (key, 이미지 bytes, 라벨 bytes) 생성"""
+    pending: dict[str, dict] = {}
+    with tarfile.open(path, "r|") as tar:  # 스트림 모드: seek 없이 순차 읽기
+        for m in tar:
+            if not m.isfile():
+                continue
+            key, ext = os.path.splitext(m.name)
+            data = tar.extractfile(m).read()
+            d = pending.setdefault(key, {})
+            d["txt" if ext == ".txt" else "img"] = data
+            if "txt" in d and "img" in d:
+                yield key, d["img"], d["txt"]
+                del pending[key]
+
+
+def decode_sample(sample: tuple[str, bytes, bytes]):
+    """(key, 이미지, 라벨) -> (key, HxWx3 uint8 RGB, [[cls, cx, cy, w, h], ...])"""
+    import numpy as np
+    from PIL import Image
+
+    key, img_bytes, lbl_bytes = sample
+    im = Image.open(io.BytesIO(img_bytes))
+    im.draft("RGB", im.size)  # JPEG이면 디코더가 바로 RGB로 출력
+    arr = np.asarray(im.convert("RGB"))
+    labels = [[float(v) for v in line.split()] for line in lbl_bytes.decode("utf-8").splitlines() if line.strip()]
+    return key, arr, labels
+
+
+def _decode_chunk(args):
+    decode, samples = args
+    return [decode(s) for s in samples]
+
+
+class ShardReader:
+    """
+    for key, image, labels in ShardReader("shards/train", workers=4, shuffle_buffer=1000): ...
+
+    - 에포크마다 shard 순서를 섞고 (set_epoch), 읽은 샘플은 shuffle_buffer 크기 버퍼에서 무작위로 꺼냄
+    - tar 읽기는 현재 프로세스에서 순차로, 디코딩은 workers 개 프로세스에서 병렬로
+    - workers=0 이면 디코딩도 현재 프로세스에서 (디버깅용)
+    - 디코딩 중인 샘플은 최대 prefetch * chunksize 개 (기본 prefetch = workers * 2)
+      소비가 느려도 tar를 앞서 다 읽어서 메모리에 쌓지 않음
+    - decode=None 이면 디코딩 없이 (key, 이미지 bytes, 라벨 bytes) 그대로
+    """
+
+    def __init__(self, shard_dir: str | Path, workers: int = 4, shuffle_buffer: int = 1000, seed: int = 0,
+                 decode=decode_sample, chunksize: int = 16, prefetch: int | None = None):
+        self.shard_dir = Path(shard_dir)
+        self.index = json.loads((self.shard_dir / "index.json").read_text(encoding="utf-8"))
+        self.workers = workers
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.decode = decode
+        self.chunksize = chunksize
+        self.prefetch = prefetch or max(1, workers) * 2
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __len__(self):
+        return self.index["samples"]
+
+    def _raw(self) -> Iterator[tuple[str, bytes, bytes]]:
+        rng = random.Random(self.seed + self.epoch)
+        shards = [s["name"] for s in self.index["shards"]]
+        if self.shuffle_buffer > 1:
+            rng.shuffle(shards)
+        buf = []
+        for name in shards:
+            for sample in _iter_tar(self.shard_dir / name):
+                if self.shuffle_buffer <= 1:
+                    yield sample
+                    continue
+                buf.append(sample)
+                if len(buf) >= self.shuffle_buffer:
+                    j = rng.randrange(len(buf))
+                    buf[j], buf[-1] = buf[-1], buf[j]
+                    yield buf.pop()
+        rng.shuffle(buf)
+        yield from buf
+
+    def __iter__(self):
+        if self.decode is None:
+            yield from self._raw()
+        elif self.workers <= 0:
+            for s in self._raw():
+                yield self.decode(s)
+        else:
+            # pool.imap은 입력 generator를 끝까지 미리 읽어 버리므로, 처리 중인 chunk 수를 prefetch로 제한
+            raw = self._raw()
+            pending = deque()
+            with Pool(self.workers) as pool:
+                while True:
+                    while len(pending) < self.prefetch:
+                        chunk = list(islice(raw, self.chunksize))
+                        if not chunk:
+                            break
+                        pending.append(pool.apply_async(_decode_chunk, ((self.decode, chunk),)))
+                    if not pending:
+                        break
+                    yield from pending.popleft().get()
+
+    def read_one(self, shard: int, i: int) -> tuple[str, bytes, bytes]:
+        """index.json의 offset으로 특정 샘플만 바로 읽기"""
+        s = self.index["shards"][shard]
+        key, _, img_off, img_size, lbl_off, lbl_size = s["members"][i]
+        with open(self.shard_dir / s["name"], "rb") as f:
+            f.seek(img_off)
+            img = f.read(img_size)
+            f.seek(lbl_off)
+            lbl = f.read(lbl_size)
+        return key, img, lbl
+
+
+# =========================
+# benchmark
+# =========================
+
+def drop_cache(paths: list[Path]) -> bool:
+    """파일들을 page cache에서 내림. 지원하지 않는 OS면 False (warm cache 결과가 됨)"""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for p in paths:
+        try:
+            fd = os.open(p, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+def _read_pair(pair: tuple[Path, Path]) -> tuple[str, bytes, bytes]:
+    img, lbl = pair
+    return img.stem, img.read_bytes(), lbl.read_bytes() if lbl.exists() else b""
+
+
+def bench(root: Path, split: str, shard_dir: Path, workers: int, limit: int, decode: bool) -> None:
+    pairs = list_pairs(root, split)
+    rng = random.Random(0)
+    rng.shuffle(pairs)  # 디렉터리 방식은 학습처럼 랜덤 순서로 읽음
+    index = json.loads((shard_dir / "index.json").read_text(encoding="utf-8"))
+    shard_files = [shard_dir / s["name"] for s in index["shards"]]
+    if limit:
+        pairs = pairs[:limit]
+
+    dec = decode_sample if decode else None
+    results = {}
+
+    cold = drop_cache([p for pair in pairs for p in pair])
+    t0 = time.perf_counter()
+    n = nbytes = 0
+    if dec is None:
+        for s in map(_read_pair, pairs):
+            n += 1
+            nbytes += len(s[1]) + len(s[2])
+    else:
+        with Pool(max(1, workers)) as pool:
+            for key, arr, _ in pool.imap(_read_and_decode, pairs, chunksize=16):
+                n += 1
+    results["directory"] = (n, time.perf_counter() - t0, nbytes)
+
+    drop_cache(shard_files)
+    t0 = time.perf_counter()
+    n = nbytes = 0
+    reader = ShardReader(shard_dir, workers=workers, shuffle_buffer=1000, decode=dec)
+    for s in reader:
+        n += 1
+        if dec is None:
+            nbytes += len(s[1]) + len(s[2])
+        if limit and n >= limit:
+            break
+    results["shards"] = (n, time.perf_counter() - t0, nbytes)
+
+    print(f"\n[BENCH] split={split} decode={decode} workers={workers} "
+          f"page cache={'cold (fadvise)' if cold else 'WARM (이 OS에서는 캐시를 비울 수 없음)'}")
+    for name, (n, dt, nb) in results.items():
+        mbs = f" | {nb / dt / 1e6:8.1f} MB/s" if nb else ""
+        print(f"  {name:<10}: {n:>7} samples in {dt:6.2f}s | {n / dt:9.1f} samples/s{mbs}")
+
+
+def _read_and_decode(pair):
+    return decode_sample(_read_pair(pair))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    e = sub.add_parser("export", help="images/labels -> tar shards")
+    e.add_argument("dataset_root", help="YOLO 데이터셋 폴더 (images/, labels/)")
+    e.add_argument("--split", default="train")
+    e.add_argument("--out", required=True, help="shard 출력 폴더 (split 이름 폴더가 아래에 생김)")
+    e.add_argument("--shard-size", type=int, default=512, help="shard당 샘플 수")
+    e.add_argument("--max-mb", type=int, default=1024, help="shard당 최대 크기(MB)")
+    e.add_argument("--no-shuffle", action="store_true")
+    e.add_argument("--seed", type=int, default=0)
+
+    b = sub.add_parser("bench", help="디렉터리 vs shard 읽기 처리량 비교")
+    b.add_argument("dataset_root")
+    b.add_argument("--split", default="train")
+    b.add_argument("--shards", required=True, help="export로 만든 split shard 폴더")
+    b.add_argument("--workers", type=int, default=4)
+    b.add_argument("--limit", type=int, default=0, help="읽을 샘플 수 (0=전체)")
+    b.add_argument("--decode", action="store_true", help="이미지 디코딩까지 포함해서 측정")
+    args = ap.parse_args()
+
+    if args.cmd == "export":
+        out = Path(args.out) / args.split
+        t0 = time.perf_counter()
+        idx = export_shards(Path(args.dataset_root), args.split, out, args.shard_size, args.max_mb << 20,
+                            shuffle=not args.no_shuffle, seed=args.seed)
+        total = sum(s["bytes"] for s in idx["shards"])
+        print(f"[OK] {idx['samples']} samples -> {len(idx['shards'])} shards ({total / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - t0:.1f}s | missing labels: {idx['missing_label']}")
+        print(f"[OK] index: {out / 'index.json'}")
+    else:
+        bench(Path(args.dataset_root), args.split, Path(args.shards), args.workers, args.limit, args.decode)
+
+
+if __name__ == "__main__":
+    main()
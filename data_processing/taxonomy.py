@@ -0,0 +1,53 @@
+"""
+taxonomy.yaml 읽기 (클래스 목록 / 변환 체계)
+
+02 는 details(), 04 는 names() 를 사용하고, remap_classes.py 는 build_lut() 로 class id 변환표를 만듦.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+TAXONOMY_FILE = Path(__file__).resolve().parent / "taxonomy.yaml"
+
+
+def load(path: Path = TAXONOMY_FILE) -> dict:
+    return yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+
+
+def names(path: Path = TAXONOMY_FILE) -> list[str]:
+    return [c["name"] for c in load(path)["classes"]]
+
+
+def details(path: Path = TAXONOMY_FILE) -> list[str]:
+    return [c["details"] for c in load(path)["classes"]]
+
+
+def build_lut(src_names: list[str], scheme: dict) -> tuple[np.ndarray, list[str]]:
+    """
+    src_names(현재 데이터셋의 클래스 이름) -> scheme 의 새 class id 변환표
+    returns: (lut[원래 id] = 새 id, 지울 클래스는 -1), 새 names
+    """
+    new_names = list(scheme["names"])
+    new_id = {n: i for i, n in enumerate(new_names)}
+    mapping = scheme.get("map") or {}
+    drop = set(scheme.get("drop") or [])
+    if len(new_id) != len(new_names):
+        raise ValueError("scheme names에 중복된 이름이 있습니다")
+
+    lut = np.full(len(src_names), -1, dtype=np.int32)
+    unknown = []
+    for i, n in enumerate(src_names):
+        if n in drop:
+            continue
+        target = mapping.get(n, n)
+        if target not in new_id:
+            unknown.append(f"{n} -> {target}")
+            continue
+        lut[i] = new_id[target]
+    if unknown:
+        raise ValueError(f"새 체계에 없는 클래스 (map 또는 drop에 추가 필요): {unknown}")
+    return lut, new_names
@@ -0,0 +1,242 @@
+"""
+파일을 복사/삭제하지 않고 클래스 균형 맞추기 (가중 샘플링)
+
+03(prune, 삭제) / 05(subset, 복사) 대신:
+1) YOLO 데이터셋(images/<split>, labels/<split>)의 라벨을 한 번만 읽어서 이미지별 클래스 집합을 인덱싱
+   (class_index_<split>.json 으로 캐시. 라벨 파일마다 (크기, 수정 시각)을 같이 저장해서 바뀐 라벨만 다시 읽고,
+    없어진 이미지는 빠짐. --reindex 는 전부 다시 읽기)
+2) 각 클래스가 목표 빈도에 가까워지도록 이미지별 샘플링 가중치를 계산
+3) 가중치로 뽑은 이미지 경로 목록(txt)과 그 목록을 train으로 쓰는 data yaml을 생성
+   -> Ultralytics는 txt 경로 목록을 train으로 받을 수 있으므로 원본 데이터셋은 그대로 둠
+
+사용 예:
+    python weighted_sampler.py C:\\ROKEY\\recycle_yolo --epoch-size 15000
+    python weighted_sampler.py C:\\ROKEY\\recycle_yolo --target-power 0.3 --epochs 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+from collections import Counter
+from pathlib import Path
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+INDEX_VERSION = 2
+
+
+def read_classes_from_yolo_txt(txt_path: Path) -> list[int]:
+    classes = set()
+    if not txt_path.exists():
+        return []
+    with txt_path.open("r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            try:
+                classes.add(int(float(parts[0])))
+            except ValueError:
+                continue
+    return sorted(classes)
+
+
+def build_index(root: Path, split: str, reindex: bool = False) -> list[dict]:
+    """
+    returns: [{"img": 이미지 경로, "classes": [클래스 id ...]}]
+    이미지 목록은 매번 scandir로 다시 만들고, 라벨은 (크기, 수정 시각)이 캐시와 같을 때만 캐시 값을 씀
+    (remap_classes / lint_labels --fix 뒤에 예전 class id나 없어진 경로를 쓰지 않도록)
+    """
+    cache = root / f"class_index_{split}.json"
+    img_dir = root / "images" / split
+    lbl_dir = root / "labels" / split
+    if not img_dir.exists():
+        raise FileNotFoundError(f"경로가 없습니다: {img_dir}")
+
+    old = {}
+    if cache.exists() and not reindex:
+        data = json.loads(cache.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and data.get("version") == INDEX_VERSION:  # 예전 형식(list)은 다시 인덱싱
+            old = {it["img"]: it for it in data["items"]}
+
+    labels = {}
+    if lbl_dir.exists():
+        with os.scandir(lbl_dir) as it:
+            for e in it:
+                if e.name.endswith(".txt") and e.is_file():
+                    st = e.stat()
+                    labels[e.name[:-4]] = f"{st.st_size}|{st.st_mtime_ns}"
+    with os.scandir(img_dir) as it:
+        images = sorted((e.name for e in it if e.is_file() and os.path.splitext(e.name)[1].lower() in IMG_EXTS))
+
+    base = str(img_dir.resolve())
+    entries, reread = [], 0
+    for name in images:
+        stem = os.path.splitext(name)[0]
+        img, sig = os.path.join(base, name), labels.get(stem, "")
+        prev = old.get(img)
+        if prev is not None and prev["label"] == sig:
+            entries.append(prev)
+            continue
+        classes = read_classes_from_yolo_txt(lbl_dir / f"{stem}.txt") if sig else []
+        entries.append({"img": img, "classes": classes, "label": sig})
+        reread += 1
+
+    if reread or len(entries) != len(old):
+        tmp = cache.with_name(cache.name + ".tmp")
+        tmp.write_text(json.dumps({"version": INDEX_VERSION, "items": entries}, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, cache)
+    return [{"img": e["img"], "classes": e["classes"]} for e in entries]
+
+
+def class_counts(items: list[dict], weights: list[float] | None = None) -> Counter:
+    cnt = Counter()
+    for i, it in enumerate(items):
+        w = 1.0 if weights is None else weights[i]
+        for c in it["classes"]:
+            cnt[c] += w
+    return cnt
+
+
+def compute_weights(items: list[dict], target_power: float = 0.0, background_weight: float = 0.0,
+                    iters: int = 20) -> list[float]:
+    """
+    각 클래스의 (가중) 등장 빈도가 n_c ** target_power 비율이 되도록 이미지 가중치를 계산.
+      target_power = 0 -> 모든 클래스 같은 빈도
+      target_power = 1 -> 원래 분포 그대로
+    이미지 한 장에 여러 클래스가 있으므로 반복 비례 조정(IPF)으로 맞춤:
+    매 반복마다 클래스별 (목표 / 현재) 비율을 구하고, 이미지 가중치에 그 이미지 클래스들의 기하평균을 곱함.
+    라벨 없는 이미지(배경)는 background_weight * (평균 가중치) 로 고정.
+    """
+    counts = class_counts(items)
+    if not counts:
+        raise ValueError("라벨이 있는 이미지가 없습니다.")
+
+    target = {c: n ** target_power for c, n in counts.items()}
+    t_sum = sum(target.values())
+    target = {c: v / t_sum for c, v in target.items()}
+
+    # 초기값: 이미지에 있는 클래스 중 가장 희귀한 클래스 기준
+    w = [max((1.0 / counts[c] for c in it["classes"]), default=0.0) for it in items]
+
+    for _ in range(iters):
+        cur = class_counts(items, w)
+        c_sum = sum(cur.values())
+        factor = {c: target[c] / (cur[c] / c_sum) for c in cur if cur[c] > 0}
+        for i, it in enumerate(items):
+            if it["classes"]:
+                w[i] *= math.exp(sum(math.log(factor[c]) for c in it["classes"]) / len(it["classes"]))
+
+    labeled = [x for x in w if x > 0]
+    mean_w = sum(labeled) / len(labeled)
+    for i, it in enumerate(items):
+        if not it["classes"]:
+            w[i] = background_weight * mean_w
+
+    total = sum(w)
+    return [x / total for x in w]
+
+
+class WeightedEpochSampler:
+    """
+    에포크마다 가중치로 인덱스를 새로 뽑는 샘플러 (torch Sampler와 같은 인터페이스).
+    직접 만든 DataLoader에서 sampler=WeightedEpochSampler(...) 로 쓰고, 매 에포크 set_epoch(e) 호출.
+    """
+
+    def __init__(self, weights: list[float], num_samples: int, seed: int = 0):
+        self.weights = weights
+        self.num_samples = num_samples
+        self.seed = seed
+        self.epoch = 0
+        self._cum = list(_accumulate(weights))
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def __len__(self):
+        return self.num_samples
+
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        idx = range(len(self.weights))
+        return iter(rng.choices(idx, cum_weights=self._cum, k=self.num_samples))
+
+
+def _accumulate(ws):
+    s = 0.0
+    for w in ws:
+        s += w
+        yield s
+
+
+def write_data_yaml(root: Path, out_yaml: Path, train_list: Path, val_split: str) -> None:
+    # 원본 data.yaml의 names를 그대로 가져오고 train만 목록 파일로 교체
+    names_block = []
+    src = root / "data.yaml"
+    if src.exists():
+        lines = src.read_text(encoding="utf-8").splitlines()
+        keep = False
+        for line in lines:
+            if line.startswith(("nc:", "names:")):
+                keep = True
+            elif line and not line.startswith((" ", "-", "\t")):
+                keep = False
+            if keep:
+                names_block.append(line)
+
+    lines = [
+        f"path: {root.resolve().as_posix()}",
+        f"train: {train_list.resolve().as_posix()}",
+        f"val: images/{val_split}",
+    ] + names_block
+    out_yaml.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset_root", help="04/05로 만든 YOLO 데이터셋 폴더 (images/, labels/, data.yaml)")
+    ap.add_argument("--split", default="train")
+    ap.add_argument("--val-split", default="val")
+    ap.add_argument("--epoch-size", type=int, default=0, help="목록에 넣을 이미지 수 (0이면 원본 이미지 수)")
+    ap.add_argument("--epochs", type=int, default=1, help="에포크별로 다른 목록을 몇 개 만들지")
+    ap.add_argument("--target-power", type=float, default=0.0, help="0=클래스 균등, 1=원래 분포")
+    ap.add_argument("--background-weight", type=float, default=0.0, help="라벨 없는 이미지의 상대 가중치")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reindex", action="store_true", help="캐시된 클래스 인덱스 무시하고 다시 읽기")
+    args = ap.parse_args()
+
+    root = Path(args.dataset_root)
+    items = build_index(root, args.split, args.reindex)
+    print(f"[INFO] {args.split} images indexed: {len(items)}")
+
+    weights = compute_weights(items, args.target_power, args.background_weight)
+    n = args.epoch_size or len(items)
+
+    before = class_counts(items)
+    after = class_counts(items, weights)
+    b_sum, a_sum = sum(before.values()), sum(after.values())
+    print("\nclass |   원래 비율 | 샘플링 후 기대 비율")
+    for c in sorted(before):
+        print(f"{c:>5} | {before[c] / b_sum:10.2%} | {after[c] / a_sum:10.2%}")
+
+    sampler = WeightedEpochSampler(weights, n, seed=args.seed)
+    for e in range(args.epochs):
+        sampler.set_epoch(e)
+        suffix = "" if args.epochs == 1 else f"_e{e}"
+        list_path = root / f"{args.split}_weighted{suffix}.txt"
+        list_path.write_text("\n".join(items[i]["img"] for i in sampler) + "\n", encoding="utf-8")
+
+        yaml_path = root / f"data_weighted{suffix}.yaml"
+        write_data_yaml(root, yaml_path, list_path, args.val_split)
+        print(f"\n[OK] {list_path} ({n} images)")
+        print(f"[OK] {yaml_path}")
+
+    uniq = len({i for i in sampler})
+    print(f"\n[INFO] 마지막 목록의 고유 이미지 수: {uniq} / {len(items)} (파일 복사/삭제 없음)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+"""
+YOLO11m(teacher) -> nano/small(student) 지식 증류 (CPU 키오스크 배포용)
+
+1) cache  : teacher(best.pt)로 train split을 한 번만 추론해서 npz로 저장
+            박스는 float16 (x, y, w, h 정규화), 클래스 확률 벡터는 uint8 (0~255) 로 양자화
+            -> student를 여러 번 학습해도 teacher는 다시 돌리지 않음
+2) train  : student를 GT 라벨 + teacher soft target으로 학습
+            teacher 박스는 데이터셋 라벨에 "nc + 캐시 행 번호" 클래스로 끼워 넣어서 mosaic / 원근 변환을 GT와 똑같이 받고,
+            DistillLoss가 그 행들을 골라내서 같은 assigner로 앵커를 배정한 뒤 teacher 확률 벡터와의 BCE(kd_loss)를 더함
+3) report : teacher / student 의 CPU 지연 시간(이미지 1장) vs mAP50 / mAP50-95 비교표 (distill_report.json)
+
+--synthetic : 작은 합성 데이터셋으로 teacher 학습 -> cache -> student 증류 -> report 를 CPU에서 끝까지 실행 (동작 확인용)
+
+사용 예:
+    python distill.py cache --teacher best.pt --data data_final.yaml
+    python distill.py train --teacher best.pt --data data_final.yaml --student yolo11n.pt --epochs 30
+    python distill.py report --data data_final.yaml --models best.pt Recycle_Distill/yolo11n_kd/weights/best.pt
+    python distill.py synthetic
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import evaluate as ev
+
+STUDENT = "yolo11n.pt"
+KD_WEIGHT = 1.0      # kd_loss 가중치 (cls_loss와 같은 스케일)
+KD_CONF = 0.25       # 학습에 쓸 teacher 박스의 최소 확률 (캐시는 CACHE_CONF까지 저장해 두고 학습 때 거름)
+CACHE_CONF = 0.05
+CACHE_IOU = 0.6
+PROJECT = "Recycle_Distill"
+# DistillLoss는 v8DetectionLoss 내부(get_assigned_targets_and_loss, preds의 boxes/scores/feats dict)에 기대므로
+# 확인한 Ultralytics 버전 범위 밖이면 학습 전에 중단
+ULTRALYTICS_RANGE = ((8, 4), (8, 5))  # [이상, 미만)
+
+
+def check_ultralytics() -> None:
+    import ultralytics
+    from ultralytics.utils.loss import v8DetectionLoss
+
+    v = tuple(int(x) for x in ultralytics.__version__.split(".")[:2])
+    lo, hi = ULTRALYTICS_RANGE
+    if not (lo <= v < hi) or not hasattr(v8DetectionLoss, "get_assigned_targets_and_loss"):
+        raise RuntimeError(f"distill 학습은 ultralytics {lo[0]}.{lo[1]}.x 에서만 확인했습니다 (설치: {ultralytics.__version__}). "
+                           f"pip install 'ultralytics>={lo[0]}.{lo[1]},<{hi[0]}.{hi[1]}'")
+
+
+def torch_device(device: str | None):
+    """'cpu' / '' -> cpu, '0' -> cuda:0, '0,1' -> 첫 번째 GPU (캐시 추론은 프로세스 하나), 'cuda:1' / 'mps' 는 그대로"""
+    import torch
+
+    device = str(device or "cpu").strip()
+    if "," in device:
+        first = device.split(",")[0].strip()
+        print(f"[INFO] teacher 캐시는 GPU 하나로 추론합니다: {device} -> {first}")
+        device = first
+    if device.isdigit():
+        return torch.device(f"cuda:{device}")
+    return torch.device(device)
+
+
+# =========================
+# 1) teacher 예측 캐시
+# =========================
+
+def cache_path(teacher: str, split: str) -> Path:
+    return Path(teacher).with_name(f"teacher_cache_{split}.npz")
+
+
+def _signature(teacher: str, images: list[Path], imgsz: int, conf: float, iou: float) -> dict:
+    t = Path(teacher).stat()
+    latest = max((p.stat().st_mtime_ns for p in images), default=0)
+    return {"teacher": [str(Path(teacher).resolve()), t.st_size, t.st_mtime_ns],
+            "images": [len(images), latest], "imgsz": imgsz, "conf": conf, "iou": iou}
+
+
+def load_teacher_cache(path: Path, meta: dict | None = None) -> dict | None:
+    """meta가 주어지면 같을 때만 사용"""
+    if not path.exists():
+        return None
+    z = np.load(path, allow_pickle=False)
+    if meta is not None and json.loads(str(z["meta"])) != meta:
+        return None
+    return {"files": z["files"].tolist(), "offsets": z["offsets"], "boxes": z["boxes"], "probs": z["probs"]}
+
+
+def cached_thresholds(path: Path) -> tuple[float, float] | None:
+    """기존 캐시를 만들 때 쓴 (conf, iou). train 에서 임계값을 안 주면 이 값으로 검사해서 cache 로 만든 파일을 그대로 씀"""
+    if not path.exists():
+        return None
+    meta = json.loads(str(np.load(path, allow_pickle=False)["meta"]))
+    return meta["conf"], meta["iou"]
+
+
+def _letterbox(path: Path, imgsz: int):
+    import cv2
+    from ultralytics.data.augment import LetterBox
+
+    im0 = cv2.imread(str(path))
+    im = LetterBox((imgsz, imgsz), auto=False)(image=im0)
+    return im[..., ::-1].transpose(2, 0, 1), im0.shape[:2]  # BGR -> RGB, HWC -> CHW
+
+
+def cache_teacher(teacher: str, images: list[Path], out: Path, imgsz: int, batch: int, device: str,
+                  conf: float = CACHE_CONF, iou: float = CACHE_IOU) -> dict:
+    """
+    NMS를 할 때 클래스 확률 벡터를 추가 채널로 붙여서 넘기면 살아남은 박스마다 전체 확률 벡터가 같이 나옴
+    (Ultralytics NMS는 4 + nc 뒤의 채널을 마스크 계수처럼 그대로 전달함)
+    """
+    import torch
+    from ultralytics import YOLO
+    from ultralytics.utils.ops import scale_boxes
+
+    try:
+        from ultralytics.utils.nms import non_max_suppression
+    except ImportError:  # 예전 버전
+        from ultralytics.utils.ops import non_max_suppression
+
+    meta = _signature(teacher, images, imgsz, conf, iou)
+    cached = load_teacher_cache(out, meta)
+    if cached is not None:
+        print(f"[CACHE] {out} (teacher 다시 안 돌림)")
+        return cached
+
+    dev = torch_device(device)
+    model = YOLO(teacher).model.fuse().eval().to(dev)
+    half = dev.type == "cuda"
+    if half:
+        model.half()
+    nc = len(model.names)
+
+    files, counts, boxes, probs = [], [], [], []
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(4) as pool, torch.inference_mode():
+        for i in range(0, len(images), batch):
+            chunk = images[i:i + batch]
+            loaded = list(pool.map(lambda p: _letterbox(p, imgsz), chunk))
+            x = torch.from_numpy(np.stack([im for im, _ in loaded])).to(dev)
+            x = (x.half() if half else x.float()) / 255
+
+            y = model(x)
+            y = y[0] if isinstance(y, (list, tuple)) else y            # (B, 4 + nc, A)
+            y = torch.cat([y, y[:, 4:4 + nc]], 1)                       # 확률 벡터를 추가 채널로
+            for p, (_, shape), det in zip(chunk, loaded, non_max_suppression(y, conf, iou, nc=nc, max_det=300)):
+                det = det.float()
+                det[:, :4] = scale_boxes(x.shape[2:], det[:, :4], shape)
+                h, w = shape
+                xyxy = det[:, :4].cpu().numpy()
+                xywhn = np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2 / w, (xyxy[:, 1] + xyxy[:, 3]) / 2 / h,
+                                  (xyxy[:, 2] - xyxy[:, 0]) / w, (xyxy[:, 3] - xyxy[:, 1]) / h], 1)
+                files.append(str(Path(p).resolve()))
+                counts.append(len(det))
+                boxes.append(xywhn.astype(np.float16))
+                probs.append(np.round(det[:, 6:6 + nc].clamp(0, 1).cpu().numpy() * 255).astype(np.uint8))
+            if (i // batch) % 50 == 0:
+                print(f"  teacher: {min(i + batch, len(images))}/{len(images)}")
+
+    data = {
+        "files": files,
+        "offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "boxes": np.concatenate(boxes) if boxes else np.zeros((0, 4), np.float16),
+        "probs": np.concatenate(probs) if probs else np.zeros((0, nc), np.uint8),
+    }
+    out.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(out, meta=json.dumps(meta), files=np.array(files), offsets=data["offsets"],
+                        boxes=data["boxes"], probs=data["probs"])
+    dt = time.perf_counter() - t0
+    print(f"[OK] {out} | images {len(files)} | boxes {len(data['boxes'])} | "
+          f"{out.stat().st_size / 1e6:.1f} MB | {len(files) / dt:.1f} images/s")
+    return data
+
+
+# =========================
+# 2) student 학습
+# =========================
+
+def attach_teacher(dataset, cache: dict, nc: int, kd_conf: float) -> int:
+    """
+    데이터셋 라벨에 teacher 박스를 추가. 클래스 값 = nc + 캐시 행 번호 (GT는 0 ~ nc-1 그대로)
+    -> cls 모양이 (n, 1) 그대로라서 mosaic / perspective / albumentations / collate 를 손대지 않아도 됨
+    """
+    index = {f: i for i, f in enumerate(cache["files"])}
+    keep = cache["probs"].max(1) >= round(kd_conf * 255)
+    added = 0
+    for lb in dataset.labels:
+        i = index.get(str(Path(lb["im_file"]).resolve()))
+        if i is None:
+            continue
+        rows = np.arange(cache["offsets"][i], cache["offsets"][i + 1])
+        rows = rows[keep[rows]]
+        if not len(rows):
+            continue
+        lb["cls"] = np.concatenate([lb["cls"].reshape(-1, 1), (nc + rows).astype(np.float32).reshape(-1, 1)])
+        lb["bboxes"] = np.concatenate([lb["bboxes"], cache["boxes"][rows].astype(np.float32)])
+        added += len(rows)
+    return added
+
+
+def _gt_only(batch: dict, nc: int) -> dict:
+    m = batch["cls"].view(-1) < nc
+    return {**batch, "cls": batch["cls"][m], "bboxes": batch["bboxes"][m], "batch_idx": batch["batch_idx"][m]}
+
+
+def make_loss_class():
+    import torch
+    from ultralytics.utils.loss import v8DetectionLoss
+    from ultralytics.utils.tal import make_anchors
+
+    class DistillLoss(v8DetectionLoss):
+        """GT 라벨은 기존 v8 loss 그대로, teacher 행(cls >= nc)은 teacher 확률 벡터와의 BCE (kd_loss)"""
+
+        def __init__(self, model, soft: np.ndarray, kd_weight: float):
+            super().__init__(model)
+            self.soft_u8 = torch.from_numpy(soft)
+            self.soft = None
+            self.kd_weight = kd_weight
+
+        def loss(self, preds, batch):
+            bs = preds["boxes"].shape[0]
+            is_kd = batch["cls"].view(-1) >= self.nc
+            gt = {k: batch[k][~is_kd] for k in ("batch_idx", "cls", "bboxes")}
+            _, loss, items = self.get_assigned_targets_and_loss(preds, gt)
+
+            kd = torch.zeros((), device=self.device)
+            if is_kd.any():
+                kd = self.kd_loss(preds, batch["batch_idx"][is_kd], batch["cls"].view(-1)[is_kd] - self.nc,
+                                  batch["bboxes"][is_kd]) * self.kd_weight * self.hyp.cls
+            items["kd_loss"] = kd.detach()
+            return torch.cat([loss, kd.view(1)]) * bs, items
+
+        def kd_loss(self, preds, batch_idx, rows, bboxes):
+            if self.soft is None:
+                self.soft = self.soft_u8.to(self.device).float() / 255
+            pred_distri = preds["boxes"].permute(0, 2, 1).contiguous()
+            pred_scores = preds["scores"].permute(0, 2, 1).contiguous()
+            anchor_points, stride_tensor = make_anchors(preds["feats"], self.stride, 0.5)
+            dtype = pred_scores.dtype
+            imgsz = torch.tensor(preds["feats"][0].shape[2:], device=self.device, dtype=dtype) * self.stride[0]
+
+            # teacher 박스도 GT와 같은 방식으로 앵커 배정 (라벨은 teacher 확률이 가장 높은 클래스)
+            soft = self.soft[rows.long()]
+            targets = torch.cat([batch_idx.view(-1, 1), soft.argmax(1, keepdim=True).to(bboxes.dtype), bboxes,
+                                 rows.view(-1, 1).to(bboxes.dtype)], 1)
+            targets = self.preprocess(targets.to(self.device), pred_scores.shape[0], imgsz[[1, 0, 1, 0]])
+            labels, gt_bboxes, row_pad = targets.split((1, 4, 1), 2)
+            mask_gt = gt_bboxes.sum(2, keepdim=True).gt_(0.0)
+            pred_bboxes = self.bbox_decode(anchor_points, pred_distri)
+            _, _, target_scores, fg_mask, target_gt_idx = self.assigner(
+                pred_scores.detach().sigmoid(),
+                (pred_bboxes.detach() * stride_tensor).type(gt_bboxes.dtype),
+                anchor_points * stride_tensor, labels, gt_bboxes, mask_gt,
+            )
+            # 앵커마다 배정된 teacher 박스의 확률 벡터, 가중치는 assigner의 정렬 점수
+            assigned = row_pad.squeeze(-1).long().gather(1, target_gt_idx)
+            soft_t = self.soft[assigned]
+            w = target_scores.sum(-1) * fg_mask
+            bce = self.bce(pred_scores, soft_t.to(dtype)).sum(-1)
+            return (bce * w).sum() / w.sum().clamp(min=1)
+
+    return DistillLoss
+
+
+def make_trainer_class():
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    DistillLoss = make_loss_class()
+
+    class DistillTrainer(DetectionTrainer):
+        def __init__(self, overrides: dict, cache: dict, kd_weight: float = KD_WEIGHT, kd_conf: float = KD_CONF):
+            super().__init__(overrides=overrides)
+            self.kd_cache = cache
+            self.kd_weight = kd_weight
+            self.kd_conf = kd_conf
+
+        def build_dataset(self, img_path, mode="train", batch=None):
+            ds = super().build_dataset(img_path, mode, batch)
+            if mode == "train":
+                n = attach_teacher(ds, self.kd_cache, self.data["nc"], self.kd_conf)
+                print(f"[KD] teacher boxes added: {n} (conf >= {self.kd_conf})")
+            return ds
+
+        def set_class_weights(self):
+            super().set_class_weights()
+            # v8DetectionLoss 는 만들 때 model.class_weights 를 읽으므로 cls_pw 가중치가 정해진 뒤에 만듦
+            # EMA는 이후에 복사되므로 여기서 붙이면 검증 loss도 같은 항목(kd_loss 포함)으로 나옴, 저장할 때는 빠짐
+            self.model.criterion = DistillLoss(self.model, self.kd_cache["probs"], self.kd_weight)
+
+        def get_class_counts(self):
+            classes = np.concatenate([lb["cls"].flatten() for lb in self.train_loader.dataset.labels], 0)
+            classes = classes[classes < self.data["nc"]]
+            return np.bincount(classes.astype(int), minlength=self.data["nc"]).astype(np.float32)
+
+        def plot_training_samples(self, batch, ni):
+            super().plot_training_samples(_gt_only(batch, self.data["nc"]), ni)
+
+        def plot_training_labels(self):
+            pass  # teacher 행이 섞여 있어서 라벨 분포 그림은 생략
+
+    return DistillTrainer
+
+
+def train_student(teacher: str, data: str, student: str, cache_file: Path, epochs: int, imgsz: int, batch: int,
+                  device: str, workers: int, project: str, name: str, kd_weight: float, kd_conf: float,
+                  plots: bool = True) -> Path:
+    cache = load_teacher_cache(cache_file)
+    if cache is None:
+        raise FileNotFoundError(f"teacher 캐시가 없습니다. 먼저 cache 를 실행하세요: {cache_file}")
+    if "," in str(device):  # DDP는 trainer를 새 프로세스에서 다시 만들기 때문에 함수 안에서 만든 DistillTrainer / 캐시를 못 가져감
+        raise ValueError(f"distill 학습은 GPU 하나만 지원합니다: --device {device} (예: --device 0)")
+    check_ultralytics()
+    overrides = {"model": student, "data": data, "epochs": epochs, "imgsz": imgsz, "batch": batch, "device": device,
+                 "workers": workers, "project": project, "name": name, "exist_ok": True, "plots": plots}
+    trainer = make_trainer_class()(overrides, cache, kd_weight, kd_conf)
+    trainer.train()
+    print(f"[OK] student: {trainer.best}")
+    return Path(trainer.best)
+
+
+# =========================
+# 3) 지연 시간 vs mAP
+# =========================
+
+def report(models: list[str], data: str, imgsz: int, device: str, n_latency: int = 50, out: Path | None = None) -> list[dict]:
+    from ultralytics import YOLO
+
+    val_imgs = ev.split_images(Path(data), "val")[:n_latency]
+    rows = []
+    for w in models:
+        model = YOLO(w)
+        m = model.val(data=data, imgsz=imgsz, batch=16, device=device, plots=False, verbose=False)
+        for p in val_imgs[:3]:  # 워밍업
+            model.predict(str(p), imgsz=imgsz, device=device, verbose=False)
+        lat = []
+        for p in val_imgs:
+            t0 = time.perf_counter()
+            model.predict(str(p), imgsz=imgsz, device=device, verbose=False)
+            lat.append((time.perf_counter() - t0) * 1000)
+        rows.append({
+            "model": str(w), "params_M": round(sum(x.numel() for x in model.model.parameters()) / 1e6, 2),
+            "map50": round(float(m.box.map50), 4), "map50_95": round(float(m.box.map), 4),
+            "latency_p50_ms": round(float(np.percentile(lat, 50)), 1),
+            "latency_p95_ms": round(float(np.percentile(lat, 95)), 1),
+        })
+
+    print("\n" + "=" * 50)
+    print(f"{'model':<40} {'params':>7} {'mAP50':>7} {'mAP50-95':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in rows:
+        name = r["model"] if len(r["model"]) <= 40 else "..." + r["model"][-37:]
+        print(f"{name:<40} {r['params_M']:>6}M "
+              f"{r['map50']:>7.4f} {r['map50_95']:>9.4f} {r['latency_p50_ms']:>8.1f} {r['latency_p95_ms']:>8.1f}")
+    print("=" * 50)
+    if out:
+        out.write_text(json.dumps(rows, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"[OK] {out}")
+    return rows
+
+
+# =========================
+# 합성 데이터로 끝까지 실행 (CPU)
+# =========================
+
+def make_synthetic(root: Path, n_train: int = 48, n_val: int = 16, size: int = 160, seed: int = 0) -> Path:
+    """빨강 / 초록 / 파랑 사각형 3클래스, 노이즈 배경"""
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(seed)
+    colors = [(220, 40, 40), (40, 200, 40), (40, 60, 220)]
+    for split, n in (("train", n_train), ("val", n_val)):
+        (root / "images" / split).mkdir(parents=True, exist_ok=True)
+        (root / "labels" / split).mkdir(parents=True, exist_ok=True)
+        for i in range(n):
+            img = Image.fromarray(rng.integers(90, 160, (size, size, 3), dtype=np.uint8))
+            d = ImageDraw.Draw(img)
+            lines = []
+            for _ in range(rng.integers(1, 4)):
+                c = int(rng.integers(0, 3))
+                w, h = rng.integers(size // 6, size // 3, 2)
+                x, y = rng.integers(0, size - w), rng.integers(0, size - h)
+                d.rectangle([x, y, x + w, y + h], fill=colors[c])
+                lines.append(f"{c} {(x + w / 2) / size:.6f} {(y + h / 2) / size:.6f} {w / size:.6f} {h / size:.6f}")
+            img.save(root / "images" / split / f"{i:04d}.jpg", quality=95)
+            (root / "labels" / split / f"{i:04d}.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    data = root / "data.yaml"
+    data.write_text(f"path: {root.resolve().as_posix()}\ntrain: images/train\nval: images/val\n"
+                    "names:\n  0: red\n  1: green\n  2: blue\n", encoding="utf-8")
+    return data
+
+
+def run_synthetic(root: Path, epochs: int, teacher_epochs: int) -> None:
+    from ultralytics import YOLO
+
+    data = make_synthetic(root)
+    common = {"imgsz": 160, "batch": 8, "device": "cpu", "workers": 0, "plots": False}
+    print("\n[1/4] teacher 학습 (yolo11s, 처음부터)")
+    t = YOLO("yolo11s.yaml")
+    t.train(data=str(data), epochs=teacher_epochs, project=str(root / "runs"), name="teacher", exist_ok=True, **common)
+    teacher = str(root / "runs" / "teacher" / "weights" / "best.pt")
+
+    print("\n[2/4] teacher 예측 캐시")
+    cache_file = cache_path(teacher, "train")
+    cache_teacher(teacher, ev.split_images(data, "train"), cache_file, 160, 8, "cpu")
+    cache_teacher(teacher, ev.split_images(data, "train"), cache_file, 160, 8, "cpu")  # 두 번째는 캐시 사용
+
+    print("\n[3/4] student 증류 (yolo11n, 처음부터)")
+    student = train_student(teacher, str(data), "yolo11n.yaml", cache_file, epochs, 160, 8, "cpu", 0,
+                            str(root / "runs"), "student_kd", KD_WEIGHT, KD_CONF, plots=False)
+
+    print("\n[4/4] 지연 시간 vs mAP")
+    report([teacher, str(student)], str(data), 160, "cpu", n_latency=16, out=root / "distill_report.json")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    c = sub.add_parser("cache", help="teacher 예측을 npz로 캐시")
+    c.add_argument("--teacher", default="best.pt")
+    c.add_argument("--data", required=True)
+    c.add_argument("--split", default="train")
+    c.add_argument("--out", default=None, help="기본: teacher 옆 teacher_cache_<split>.npz")
+    c.add_argument("--imgsz", type=int, default=640)
+    c.add_argument("--batch", type=int, default=16)
+    c.add_argument("--device", default="0")
+    c.add_argument("--conf", type=float, default=CACHE_CONF)
+    c.add_argument("--iou", type=float, default=CACHE_IOU)
+
+    t = sub.add_parser("train", help="student 증류 학습 (캐시가 없으면 먼저 만듦)")
+    t.add_argument("--teacher", default="best.pt")
+    t.add_argument("--data", required=True)
+    t.add_argument("--student", default=STUDENT)
+    t.add_argument("--cache", default=None)
+    t.add_argument("--conf", type=float, default=None, help=f"기본: 기존 캐시를 만들 때 쓴 값 (캐시가 없으면 {CACHE_CONF})")
+    t.add_argument("--iou", type=float, default=None, help=f"기본: 기존 캐시를 만들 때 쓴 값 (캐시가 없으면 {CACHE_IOU})")
+    t.add_argument("--epochs", type=int, default=30)
+    t.add_argument("--imgsz", type=int, default=640)
+    t.add_argument("--batch", type=int, default=16)
+    t.add_argument("--device", default="0")
+    t.add_argument("--workers", type=int, default=4)
+    t.add_argument("--project", default=PROJECT)
+    t.add_argument("--name", default=None, help="기본: <student 이름>_kd")
+    t.add_argument("--kd-weight", type=float, default=KD_WEIGHT)
+    t.add_argument("--kd-conf", type=float, default=KD_CONF)
+    t.add_argument("--report", action="store_true", help="학습 후 teacher / student 비교표 출력")
+
+    r = sub.add_parser("report", help="지연 시간 vs mAP 비교")
+    r.add_argument("--data", required=True)
+    r.add_argument("--models", nargs="+", required=True)
+    r.add_argument("--imgsz", type=int, default=640)
+    r.add_argument("--device", default="cpu", help="배포 환경과 같게 (기본 cpu)")
+    r.add_argument("--n", type=int, default=50, help="지연 시간 측정 이미지 수")
+    r.add_argument("--out", default="distill_report.json")
+
+    s = sub.add_parser("synthetic", help="합성 데이터로 CPU에서 전체 과정 실행")
+    s.add_argument("--root", default="distill_synthetic")
+    s.add_argument("--epochs", type=int, default=3, help="student 에포크")
+    s.add_argument("--teacher-epochs", type=int, default=40, help="teacher가 박스를 내기 시작할 만큼은 학습해야 kd_loss가 생김")
+    args = ap.parse_args()
+
+    if args.cmd == "cache":
+        out = Path(args.out) if args.out else cache_path(args.teacher, args.split)
+        cache_teacher(args.teacher, ev.split_images(Path(args.data), args.split), out, args.imgsz, args.batch,
+                      args.device, args.conf, args.iou)
+    elif args.cmd == "train":
+        cache_file = Path(args.cache) if args.cache else cache_path(args.teacher, "train")
+        # cache --conf/--iou 로 만든 캐시가 기본 임계값과 달라서 teacher를 다시 돌리고 덮어쓰는 일이 없게
+        # 임계값을 안 주면 기존 캐시의 값을 씀 (teacher / 이미지 / imgsz 가 바뀌었을 때만 다시 만듦)
+        conf, iou = cached_thresholds(cache_file) or (CACHE_CONF, CACHE_IOU)
+        conf = conf if args.conf is None else args.conf
+        iou = iou if args.iou is None else args.iou
+        cache_teacher(args.teacher, ev.split_images(Path(args.data), "train"), cache_file, args.imgsz, args.batch,
+                      args.device, conf, iou)
+        name = args.name or f"{Path(args.student).stem}_kd"
+        best = train_student(args.teacher, args.data, args.student, cache_file, args.epochs, args.imgsz, args.batch,
+                             args.device, args.workers, args.project, name, args.kd_weight, args.kd_conf)
+        if args.report:
+            report([args.teacher, str(best)], args.data, args.imgsz, "cpu",
+                   out=Path(args.project) / name / "distill_report.json")
+    elif args.cmd == "report":
+        report(args.models, args.data, args.imgsz, args.device, args.n, Path(args.out))
+    else:
+        run_synthetic(Path(args.root), args.epochs, args.teacher_epochs)
+
+
+if __name__ == "__main__":
+    main()
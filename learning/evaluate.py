@@ -0,0 +1,582 @@
+"""
+독립 평가 도구 (Ultralytics 학습 로그 없이 mAP / 클래스별 P,R / confusion matrix 계산)
+
+입력:
+- 정답: data.yaml 의 split(val 등) 이미지에 대응하는 YOLO 라벨(labels/<split>/*.txt)
+- 예측: 둘 중 하나
+    --pred-dir : `yolo predict save_txt=True save_conf=True` 로 만든 txt (cls cx cy w h conf)
+    --weights  : best.pt로 직접 추론 (conf=0.001 로 한 번만 돌리고 캐시)
+
+정답/예측은 한 번 읽은 뒤 npz 캐시로 저장 -> 임계값을 바꿔서 다시 채점할 때 추론/파싱이 필요 없음.
+IoU와 매칭은 이미지 단위 반복문 없이 전체 데이터셋을 한 번에 NumPy로 계산.
+--crosscheck 를 주면 같은 캐시를 Ultralytics 구현(reference)으로도 채점해서 차이를 출력.
+(합성 데이터로 같은 비교를 하는 테스트: tests/test_evaluate.py)
+
+사용 예:
+    python evaluate.py --data data_final.yaml --weights Recycle_Final_Project/YOLO11m_HighRes/weights/best.pt
+    python evaluate.py --data data_final.yaml --pred-dir runs/detect/predict/labels --conf 0.3 --json eval.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+IOUV = np.linspace(0.5, 0.95, 10)
+
+
+# =========================
+# 데이터 읽기 / 캐시
+# =========================
+
+def read_data_yaml(data_yaml: Path) -> tuple[dict, list[str]]:
+    data = yaml.safe_load(data_yaml.read_text(encoding="utf-8"))
+    names = data["names"]
+    if isinstance(names, dict):
+        names = [names[k] for k in sorted(names)]
+    return data, list(names)
+
+
+def split_images(data_yaml: Path, split: str) -> list[Path]:
+    data, _ = read_data_yaml(data_yaml)
+    base = Path(data.get("path") or data_yaml.parent)
+    if not base.is_absolute():
+        base = data_yaml.parent / base
+    entries = data[split] if isinstance(data[split], list) else [data[split]]
+
+    files: list[Path] = []
+    for e in entries:
+        p = Path(e) if Path(e).is_absolute() else base / e
+        if p.is_dir():
+            files += sorted(f for f in p.rglob("*") if f.suffix.lower() in IMG_EXTS)
+        elif p.suffix == ".txt":
+            for line in p.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    f = Path(line.strip())
+                    files.append(f if f.is_absolute() else p.parent / f)
+    return files
+
+
+def label_path(img: Path) -> Path:
+    # Ultralytics 규칙: .../images/... -> .../labels/...
+    parts = list(img.parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == "images":
+            parts[i] = "labels"
+            break
+    return Path(*parts).with_suffix(".txt")
+
+
+def read_yolo_txts(paths: list[Path], cols: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    여러 txt를 한 번에 읽어서 (rows, cols) 배열과 이미지 번호 배열로 돌려줌.
+    파일이 없으면 빈 라벨로 처리. 열 수가 다른 줄(세그멘테이션 등)은 버림.
+    """
+    chunks, owners = [], []
+    for i, p in enumerate(paths):
+        try:
+            text = p.read_text(encoding="utf-8", errors="ignore")
+        except FileNotFoundError:
+            continue
+        toks = text.split()
+        if not toks:
+            continue
+        if len(toks) % cols == 0:
+            arr = np.array(toks, dtype=np.float32).reshape(-1, cols)
+        else:
+            rows = [ln.split() for ln in text.splitlines()]
+            rows = [r for r in rows if len(r) == cols]
+            if not rows:
+                continue
+            arr = np.array(rows, dtype=np.float32)
+        chunks.append(arr)
+        owners.append(np.full(len(arr), i, dtype=np.int32))
+
+    if not chunks:
+        return np.zeros((0, cols), np.float32), np.zeros(0, np.int32)
+    return np.concatenate(chunks), np.concatenate(owners)
+
+
+def xywh2xyxy(b: np.ndarray) -> np.ndarray:
+    out = np.empty_like(b)
+    out[:, 0] = b[:, 0] - b[:, 2] / 2
+    out[:, 1] = b[:, 1] - b[:, 3] / 2
+    out[:, 2] = b[:, 0] + b[:, 2] / 2
+    out[:, 3] = b[:, 1] + b[:, 3] / 2
+    return out
+
+
+def load_ground_truth(images: list[Path]) -> dict:
+    rows, owner = read_yolo_txts([label_path(p) for p in images], cols=5)
+    return {
+        "stems": np.array([p.stem for p in images]),
+        "gt_img": owner,
+        "gt_cls": rows[:, 0].astype(np.int32),
+        "gt_box": xywh2xyxy(rows[:, 1:5]),
+    }
+
+
+def load_txt_predictions(images: list[Path], pred_dir: Path) -> dict:
+    rows, owner = read_yolo_txts([pred_dir / f"{p.stem}.txt" for p in images], cols=6)
+    return {
+        "pr_img": owner,
+        "pr_cls": rows[:, 0].astype(np.int32),
+        "pr_box": xywh2xyxy(rows[:, 1:5]),
+        "pr_conf": rows[:, 5],
+    }
+
+
+def run_predictions(images: list[Path], weights: str, imgsz: int, batch: int, device: str,
+                    conf: float = 0.001, iou: float = 0.7, max_det: int = 300) -> dict:
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    img, cls, box, cf = [], [], [], []
+    t0 = time.perf_counter()
+    for start in range(0, len(images), batch):
+        chunk = [str(p) for p in images[start:start + batch]]
+        results = model.predict(chunk, imgsz=imgsz, conf=conf, iou=iou, max_det=max_det,
+                                device=device, verbose=False)
+        for j, r in enumerate(results):
+            b = r.boxes
+            n = len(b)
+            img.append(np.full(n, start + j, dtype=np.int32))
+            cls.append(b.cls.cpu().numpy().astype(np.int32))
+            box.append(b.xyxyn.cpu().numpy().astype(np.float32))
+            cf.append(b.conf.cpu().numpy().astype(np.float32))
+        print(f"  predict: {min(start + batch, len(images))}/{len(images)}", end="\r")
+    print(f"  predict: {len(images)} images in {time.perf_counter() - t0:.1f}s")
+    return {
+        "pr_img": np.concatenate(img) if img else np.zeros(0, np.int32),
+        "pr_cls": np.concatenate(cls) if cls else np.zeros(0, np.int32),
+        "pr_box": np.concatenate(box) if box else np.zeros((0, 4), np.float32),
+        "pr_conf": np.concatenate(cf) if cf else np.zeros(0, np.float32),
+    }
+
+
+def save_cache(path: Path, data: dict, meta: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        meta=np.array(json.dumps(meta)),
+        stems=data["stems"],
+        gt_img=data["gt_img"], gt_cls=data["gt_cls"].astype(np.int16), gt_box=data["gt_box"].astype(np.float16),
+        pr_img=data["pr_img"], pr_cls=data["pr_cls"].astype(np.int16), pr_box=data["pr_box"].astype(np.float16),
+        pr_conf=data["pr_conf"].astype(np.float16),
+    )
+
+
+def load_cache(path: Path, meta: dict) -> dict | None:
+    """meta(입력 경로/파일 수/수정 시각)가 같을 때만 캐시 사용"""
+    if not path.exists():
+        return None
+    z = np.load(path, allow_pickle=False)
+    if json.loads(str(z["meta"])) != meta:
+        return None
+    return {
+        "stems": z["stems"],
+        "gt_img": z["gt_img"], "gt_cls": z["gt_cls"].astype(np.int32), "gt_box": z["gt_box"].astype(np.float32),
+        "pr_img": z["pr_img"], "pr_cls": z["pr_cls"].astype(np.int32), "pr_box": z["pr_box"].astype(np.float32),
+        "pr_conf": z["pr_conf"].astype(np.float32),
+    }
+
+
+def dir_signature(p: Path) -> list:
+    # 파일 수 + 최신 수정 시각 (내용이 바뀌면 캐시 무효)
+    if p.is_file():
+        return [1, p.stat().st_mtime_ns]
+    n, latest = 0, 0
+    with os.scandir(p) as it:
+        for e in it:
+            if e.is_file():
+                n += 1
+                latest = max(latest, e.stat().st_mtime_ns)
+    return [n, latest]
+
+
+# =========================
+# 채점 (벡터화)
+# =========================
+
+def box_iou_pairs(a: np.ndarray, b: np.ndarray, eps: float = 1e-7) -> np.ndarray:
+    """a[i] 와 b[i] 끼리의 IoU (쌍 단위)"""
+    iw = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+    ih = np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a + area_b - inter + eps)
+
+
+def group_pairs(pr_key: np.ndarray, gt_key: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    같은 key(이미지 또는 이미지+클래스)에 속한 (예측, 정답) 쌍을 전부 만듦.
+    gt_key는 정렬되어 있어야 함.
+    """
+    lo = np.searchsorted(gt_key, pr_key, side="left")
+    hi = np.searchsorted(gt_key, pr_key, side="right")
+    cnt = hi - lo
+    p_idx = np.repeat(np.arange(len(pr_key)), cnt)
+    offs = np.repeat(np.cumsum(cnt) - cnt, cnt)
+    g_idx = np.repeat(lo, cnt) + (np.arange(cnt.sum()) - offs)
+    return p_idx, g_idx
+
+
+def sort_predictions(data: dict) -> dict:
+    """이미지 순, 같은 이미지 안에서는 confidence 내림차순 (Ultralytics NMS 출력 순서와 동일)"""
+    order = np.lexsort((-data["pr_conf"], data["pr_img"]))
+    out = dict(data)
+    for k in ("pr_img", "pr_cls", "pr_box", "pr_conf"):
+        out[k] = data[k][order]
+    return out
+
+
+def match_tp(data: dict, iouv: np.ndarray = IOUV) -> np.ndarray:
+    """
+    예측별 TP 여부 (P, len(iouv)).
+    매칭 규칙은 Ultralytics/COCO와 같음: 같은 이미지+클래스 안에서 confidence 높은 예측부터
+    아직 안 잡힌 정답 중 IoU가 가장 큰 것을 가져감.
+
+    이미지마다 돌지 않고, "각 (이미지, 클래스) 그룹의 r번째 예측"을 한 라운드로 묶어서
+    모든 그룹을 동시에 처리 -> 라운드 수 = 그룹당 최대 예측 수.
+    """
+    nc = int(max(data["gt_cls"].max(initial=-1), data["pr_cls"].max(initial=-1))) + 1
+    P, T = len(data["pr_cls"]), len(iouv)
+    tp = np.zeros((P, T), dtype=bool)
+    if P == 0 or len(data["gt_cls"]) == 0:
+        return tp
+
+    pr_key = data["pr_img"].astype(np.int64) * nc + data["pr_cls"]
+    gt_key = data["gt_img"].astype(np.int64) * nc + data["gt_cls"]
+    g_order = np.argsort(gt_key, kind="stable")
+    p_idx, g_sorted = group_pairs(pr_key, gt_key[g_order])
+    g_idx = g_order[g_sorted]
+    if len(p_idx) == 0:
+        return tp
+    iou = box_iou_pairs(data["pr_box"][p_idx], data["gt_box"][g_idx])
+
+    # 그룹 안에서의 순위 (예측은 이미지 순 + conf 내림차순으로 정렬되어 있어야 함)
+    k_order = np.argsort(pr_key, kind="stable")
+    sorted_key = pr_key[k_order]
+    first = np.searchsorted(sorted_key, sorted_key, side="left")
+    rank = np.empty(P, dtype=np.int64)
+    rank[k_order] = np.arange(P) - first
+
+    # 쌍을 (순위, 예측) 순으로 정렬 -> 라운드별 연속 구간
+    order = np.lexsort((p_idx, rank[p_idx]))
+    p_idx, g_idx, iou = p_idx[order], g_idx[order], iou[order]
+    pair_rank = rank[p_idx]
+    bounds = np.searchsorted(pair_rank, np.arange(pair_rank.max() + 2))
+
+    claimed = np.zeros((len(data["gt_cls"]), T), dtype=bool)
+    for r in range(len(bounds) - 1):
+        s, e = bounds[r], bounds[r + 1]
+        if s == e:
+            continue
+        pp, gg = p_idx[s:e], g_idx[s:e]
+        avail = np.where(claimed[gg], 0.0, iou[s:e, None])  # (k, T)
+
+        seg_start = np.flatnonzero(np.r_[True, pp[1:] != pp[:-1]])
+        seg_len = np.diff(np.r_[seg_start, len(pp)])
+        best = np.maximum.reduceat(avail, seg_start, axis=0)  # (n_pred, T)
+        hit = best >= iouv
+        # 최댓값을 가진 첫 번째 정답 위치
+        is_best = avail == np.repeat(best, seg_len, axis=0)
+        pos = np.where(is_best, np.arange(len(pp))[:, None], len(pp))
+        arg = np.minimum.reduceat(pos, seg_start, axis=0)
+
+        preds = pp[seg_start]
+        tp[preds] = hit
+        rows, cols = np.nonzero(hit)
+        claimed[gg[arg[rows, cols]], cols] = True
+    return tp
+
+
+def smooth(y: np.ndarray, f: float = 0.05) -> np.ndarray:
+    nf = round(len(y) * f * 2) // 2 + 1
+    p = np.ones(nf // 2)
+    yp = np.concatenate((p * y[0], y, p * y[-1]), 0)
+    return np.convolve(yp, np.ones(nf) / nf, mode="valid")
+
+
+_trapezoid = getattr(np, "trapezoid", None) or np.trapz  # numpy 2 에서 trapz -> trapezoid 로 이름 변경
+
+
+def compute_ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    # COCO 101-point 보간
+    mrec = np.concatenate(([0.0], recall, [recall[-1] if len(recall) else 1.0], [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0], [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(_trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def ap_per_class(tp: np.ndarray, conf: np.ndarray, pred_cls: np.ndarray, target_cls: np.ndarray,
+                 nc: int, conf_thres: float | None = None, eps: float = 1e-16) -> dict:
+    """
+    클래스별 AP (nc, T) 와 P / R.
+    conf_thres가 None이면 (Ultralytics처럼) 평균 F1이 가장 높은 confidence에서의 P / R.
+    """
+    i = np.argsort(-conf)  # Ultralytics와 같은 정렬 (conf 동점 순서까지 맞추기 위해)
+    tp, conf, pred_cls = tp[i], conf[i], pred_cls[i]
+
+    n_gt = np.bincount(target_cls, minlength=nc)
+    x = np.linspace(0, 1, 1000)
+    ap = np.zeros((nc, tp.shape[1]))
+    p_curve = np.zeros((nc, 1000))
+    r_curve = np.zeros((nc, 1000))
+    for c in range(nc):
+        m = pred_cls == c
+        n_l, n_p = n_gt[c], m.sum()
+        if n_p == 0 or n_l == 0:
+            continue
+        fpc = (1 - tp[m]).cumsum(0)
+        tpc = tp[m].cumsum(0)
+        recall = tpc / (n_l + eps)
+        precision = tpc / (tpc + fpc)
+        r_curve[c] = np.interp(-x, -conf[m], recall[:, 0], left=0)
+        p_curve[c] = np.interp(-x, -conf[m], precision[:, 0], left=1)
+        for j in range(tp.shape[1]):
+            ap[c, j] = compute_ap(recall[:, j], precision[:, j])
+
+    f1_curve = 2 * p_curve * r_curve / (p_curve + r_curve + eps)
+    present = n_gt > 0
+    if conf_thres is None:
+        k = int(smooth(f1_curve[present].mean(0), 0.1).argmax()) if present.any() else 0
+    else:
+        k = int(np.clip(np.searchsorted(x, conf_thres), 0, 999))
+    return {
+        "ap": ap, "p": p_curve[:, k], "r": r_curve[:, k], "f1": f1_curve[:, k],
+        "conf": float(x[k]), "n_gt": n_gt, "present": present,
+        "x": x, "p_curve": p_curve, "r_curve": r_curve, "f1_curve": f1_curve,
+    }
+
+
+def confusion_matrix(data: dict, nc: int, conf: float = 0.25, iou_thres: float = 0.45) -> np.ndarray:
+    """
+    (nc+1, nc+1) 행렬, 행 = 예측 클래스, 열 = 정답 클래스, 마지막 = background (Ultralytics와 같은 방향).
+    매칭은 클래스 무관 IoU > iou_thres, IoU 큰 쌍부터 1:1.
+    """
+    m = np.zeros((nc + 1, nc + 1), dtype=np.int64)
+    keep = data["pr_conf"] > conf
+    pr_img, pr_cls, pr_box = data["pr_img"][keep], data["pr_cls"][keep], data["pr_box"][keep]
+    gt_img, gt_cls = data["gt_img"], data["gt_cls"]
+
+    g_order = np.argsort(gt_img, kind="stable")
+    p_idx, g_sorted = group_pairs(pr_img.astype(np.int64), gt_img[g_order].astype(np.int64))
+    g_idx = g_order[g_sorted]
+    iou = box_iou_pairs(pr_box[p_idx], data["gt_box"][g_idx])
+    ok = iou > iou_thres
+    p_idx, g_idx, iou = p_idx[ok], g_idx[ok], iou[ok]
+
+    # IoU 큰 순으로 예측당 1개, 다시 IoU 큰 순으로 정답당 1개
+    o = np.argsort(-iou, kind="stable")
+    p_idx, g_idx, iou = p_idx[o], g_idx[o], iou[o]
+    _, u = np.unique(p_idx, return_index=True)
+    p_idx, g_idx, iou = p_idx[u], g_idx[u], iou[u]
+    o = np.argsort(-iou, kind="stable")
+    p_idx, g_idx = p_idx[o], g_idx[o]
+    _, u = np.unique(g_idx, return_index=True)
+    p_idx, g_idx = p_idx[u], g_idx[u]
+
+    np.add.at(m, (pr_cls[p_idx], gt_cls[g_idx]), 1)
+    gt_hit = np.zeros(len(gt_cls), dtype=bool)
+    gt_hit[g_idx] = True
+    np.add.at(m, (np.full((~gt_hit).sum(), nc), gt_cls[~gt_hit]), 1)
+    pr_hit = np.zeros(len(pr_cls), dtype=bool)
+    pr_hit[p_idx] = True
+    np.add.at(m, (pr_cls[~pr_hit], np.full((~pr_hit).sum(), nc)), 1)
+    return m
+
+
+def drop_unknown_classes(data: dict, nc: int) -> dict:
+    """
+    class id가 0 ~ nc-1 밖인 정답 / 예측 제거 (taxonomy를 바꾼 뒤 남은 예전 라벨 등)
+    그대로 두면 클래스별 배열 크기가 nc와 안 맞아서 채점 중 IndexError
+    """
+    out = dict(data)
+    for p in ("gt", "pr"):
+        if f"{p}_cls" not in data:
+            continue
+        ok = (data[f"{p}_cls"] >= 0) & (data[f"{p}_cls"] < nc)
+        if ok.all():
+            continue
+        bad = np.unique(data[f"{p}_cls"][~ok]).tolist()
+        print(f"[WARN] {'정답' if p == 'gt' else '예측'} 박스 {int((~ok).sum())}개의 class id {bad} 가 "
+              f"data.yaml 범위(0~{nc - 1}) 밖이라 제외")
+        for k in [k for k in data if k.startswith(f"{p}_")]:
+            out[k] = data[k][ok]
+    return out
+
+
+def evaluate(data: dict, nc: int, conf: float | None = None, cm_conf: float = 0.25, cm_iou: float = 0.45) -> dict:
+    data = sort_predictions(drop_unknown_classes(data, nc))
+    tp = match_tp(data)
+    stats = ap_per_class(tp, data["pr_conf"], data["pr_cls"], data["gt_cls"], nc, conf_thres=conf)
+    stats["cm"] = confusion_matrix(data, nc, cm_conf, cm_iou)
+    stats["tp"] = tp
+    present = stats["present"]
+    stats["map50"] = float(stats["ap"][present, 0].mean()) if present.any() else 0.0
+    stats["map"] = float(stats["ap"][present].mean()) if present.any() else 0.0
+    return stats
+
+
+# =========================
+# Ultralytics 구현과 비교 (reference)
+# =========================
+
+def crosscheck(data: dict, nc: int, ours: dict) -> dict:
+    import torch
+    from ultralytics.models.yolo.detect import DetectionValidator
+    from ultralytics.utils.metrics import ConfusionMatrix, ap_per_class as ref_ap_per_class, box_iou
+
+    data = sort_predictions(data)
+    v = DetectionValidator()
+    v.iouv = torch.from_numpy(IOUV)
+    cm = ConfusionMatrix(names={i: str(i) for i in range(nc)})
+
+    n_img = len(data["stems"])
+    pr_bounds = np.searchsorted(data["pr_img"], np.arange(n_img + 1))
+    g_order = np.argsort(data["gt_img"], kind="stable")
+    gt_bounds = np.searchsorted(data["gt_img"][g_order], np.arange(n_img + 1))
+
+    tps = []
+    for i in range(n_img):
+        ps = slice(pr_bounds[i], pr_bounds[i + 1])
+        gi = g_order[gt_bounds[i]:gt_bounds[i + 1]]
+        pb = torch.from_numpy(data["pr_box"][ps])
+        pc = torch.from_numpy(data["pr_cls"][ps]).float()
+        pf = torch.from_numpy(data["pr_conf"][ps])
+        gb = torch.from_numpy(data["gt_box"][gi])
+        gc = torch.from_numpy(data["gt_cls"][gi]).float()
+        if len(gc) == 0 or len(pc) == 0:
+            tps.append(np.zeros((len(pc), len(IOUV)), dtype=bool))
+        else:
+            tps.append(v.match_predictions(pc, gc, box_iou(gb, pb)).numpy())
+        cm.process_batch({"bboxes": pb, "conf": pf, "cls": pc}, {"bboxes": gb, "cls": gc})
+
+    tp_ref = np.concatenate(tps) if tps else np.zeros((0, len(IOUV)), dtype=bool)
+    ref = ref_ap_per_class(tp_ref, data["pr_conf"], data["pr_cls"], data["gt_cls"])
+    ref_ap, ref_cls = ref[5], ref[6].astype(int)
+    return {
+        "tp_mismatch": int((tp_ref != ours["tp"]).sum()),
+        "ap_max_abs_diff": float(np.abs(ref_ap - ours["ap"][ref_cls]).max()) if len(ref_cls) else 0.0,
+        "map50_ref": float(ref_ap[:, 0].mean()) if len(ref_cls) else 0.0,
+        "map_ref": float(ref_ap.mean()) if len(ref_cls) else 0.0,
+        "cm_mismatch": int(np.abs(cm.matrix.astype(np.int64) - ours["cm"]).sum()),
+    }
+
+
+# =========================
+# 출력
+# =========================
+
+def print_report(stats: dict, names: list[str], n_img: int) -> None:
+    print(f"\n{'Class':>20} {'Instances':>10} {'P':>7} {'R':>7} {'mAP50':>7} {'mAP50-95':>9}")
+    pres = stats["present"]
+    print(f"{'all':>20} {int(stats['n_gt'].sum()):>10} {stats['p'][pres].mean():7.3f} {stats['r'][pres].mean():7.3f} "
+          f"{stats['map50']:7.3f} {stats['map']:9.3f}")
+    for c, name in enumerate(names):
+        if not pres[c]:
+            continue
+        print(f"{name:>20} {int(stats['n_gt'][c]):>10} {stats['p'][c]:7.3f} {stats['r'][c]:7.3f} "
+              f"{stats['ap'][c, 0]:7.3f} {stats['ap'][c].mean():9.3f}")
+    print(f"\nimages: {n_img} | P/R at conf={stats['conf']:.3f}")
+
+    print("\nconfusion matrix (행=예측, 열=정답, 마지막=background)")
+    labels = [str(i) for i in range(len(names))] + ["bg"]
+    print("     " + "".join(f"{s:>6}" for s in labels))
+    for i, row in enumerate(stats["cm"]):
+        print(f"{labels[i]:>5}" + "".join(f"{v:>6}" for v in row))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", required=True, help="data.yaml (names, split 경로)")
+    ap.add_argument("--split", default="val")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--pred-dir", help="예측 txt 폴더 (cls cx cy w h conf)")
+    src.add_argument("--weights", help="추론에 쓸 모델 (예: best.pt)")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--batch", type=int, default=16)
+    ap.add_argument("--device", default="")
+    ap.add_argument("--cache", help="npz 캐시 경로 (기본: 예측 폴더/모델 옆)")
+    ap.add_argument("--conf", type=float, default=None, help="클래스별 P/R 계산 confidence (기본: 최대 F1 지점)")
+    ap.add_argument("--cm-conf", type=float, default=0.25)
+    ap.add_argument("--cm-iou", type=float, default=0.45)
+    ap.add_argument("--json", help="결과를 json으로 저장할 경로")
+    ap.add_argument("--crosscheck", action="store_true", help="Ultralytics 구현으로도 채점해서 비교")
+    args = ap.parse_args()
+
+    data_yaml = Path(args.data)
+    _, names = read_data_yaml(data_yaml)
+    nc = len(names)
+
+    t0 = time.perf_counter()
+    images = split_images(data_yaml, args.split)
+    src_path = Path(args.pred_dir or args.weights)
+    cache = Path(args.cache) if args.cache else src_path.parent / f"{src_path.stem}_{args.split}_eval_cache.npz"
+    label_dir = label_path(images[0]).parent if images else Path()
+    meta = {
+        "data": str(data_yaml.resolve()), "split": args.split, "n_images": len(images),
+        "source": str(src_path.resolve()), "source_sig": dir_signature(src_path),
+        "labels_sig": dir_signature(label_dir) if label_dir.exists() else None,
+        "imgsz": args.imgsz if args.weights else None,
+    }
+
+    data = load_cache(cache, meta)
+    if data is None:
+        print(f"[INFO] 캐시 없음 -> 정답/예측 읽는 중 ({len(images)} images)")
+        data = load_ground_truth(images)
+        if args.pred_dir:
+            data.update(load_txt_predictions(images, Path(args.pred_dir)))
+        else:
+            data.update(run_predictions(images, args.weights, args.imgsz, args.batch, args.device))
+        save_cache(cache, data, meta)
+        data = load_cache(cache, meta)  # 캐시와 같은 정밀도(float16)로 채점
+        print(f"[INFO] 캐시 저장: {cache}")
+    else:
+        print(f"[INFO] 캐시 사용: {cache}")
+    t_load = time.perf_counter() - t0
+    data = drop_unknown_classes(data, nc)  # crosscheck도 같은 데이터로
+
+    t1 = time.perf_counter()
+    stats = evaluate(data, nc, args.conf, args.cm_conf, args.cm_iou)
+    t_eval = time.perf_counter() - t1
+
+    print_report(stats, names, len(images))
+    print(f"\nload {t_load:.2f}s | eval {t_eval:.2f}s "
+          f"({len(data['pr_cls'])} predictions, {len(data['gt_cls'])} labels)")
+
+    if args.crosscheck:
+        cc = crosscheck(data, nc, stats)
+        print("\n[CROSSCHECK] Ultralytics reference")
+        for k, v in cc.items():
+            print(f"  {k}: {v}")
+
+    if args.json:
+        out = {
+            "map50": stats["map50"], "map50_95": stats["map"], "conf": stats["conf"],
+            "per_class": {
+                names[c]: {
+                    "instances": int(stats["n_gt"][c]), "precision": float(stats["p"][c]),
+                    "recall": float(stats["r"][c]), "ap50": float(stats["ap"][c, 0]),
+                    "ap50_95": float(stats["ap"][c].mean()),
+                }
+                for c in range(nc) if stats["present"][c]
+            },
+            "confusion_matrix": stats["cm"].tolist(),
+        }
+        Path(args.json).write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"[OK] {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+어려운 이미지 찾기 (hard example mining) -> 05 서브셋 선택 우선순위
+
+05_subset_yolo_per_class.py 는 클래스 목표 수만 보고 랜덤 순서로 고르기 때문에
+모델이 이미 잘 맞히는 쉬운 이미지에도 학습 예산이 쓰임.
+아직 학습에 안 쓴 이미지(pool)를 현재 best.pt로 배치 추론해서 이미지마다 점수를 매김:
+
+- missed : 정답 박스인데 DET_CONF 이상으로 잡힌 같은 클래스 예측(IoU >= 0.5)이 없음      -> W_MISS
+- weak   : 잡히긴 했지만 confidence가 STRONG_CONF 미만 (낮을수록 큰 점수)                 -> W_WEAK * (0~1)
+- fp     : DET_CONF 이상인데 어느 정답과도 매칭 안 된 예측 (다른 클래스로 잘못 본 경우 포함) -> W_FP * conf
+
+점수 = 위 항목의 합. 결과는 stem,score,missed,weak,fp csv (점수 내림차순)로 저장하고,
+05 / pipeline.py subset stage가 이 파일을 받아서 클래스 목표 수는 그대로 지키면서 점수가 높은 이미지를 먼저 뽑음.
+
+추론 결과(conf MINE_CONF 이상)는 evaluate.py 와 같은 npz 캐시로 저장 -> 가중치만 바꿔서 다시 점수 매길 때는 추론 없음.
+
+사용 예:
+    python hard_mining.py --data C:\\ROKEY\\recycle_yolo\\data.yaml --split train --weights best.pt \\
+        --exclude C:\\ROKEY\\recycle_yolo_small\\images\\train --out hard_examples.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+import numpy as np
+
+import evaluate as ev
+
+MINE_CONF = 0.05     # 캐시에 남길 최소 confidence (weak 판단에 필요한 낮은 박스까지)
+MATCH_IOU = 0.5
+DET_CONF = 0.25      # 배포(app.py) 기본 임계값: 이보다 낮으면 못 잡은 것으로 봄
+STRONG_CONF = 0.5    # 이 이상이면 확실하게 맞힌 것
+
+W_MISS = 1.0
+W_WEAK = 0.5
+W_FP = 0.5
+
+
+def read_stems(paths: list[str]) -> set[str]:
+    """이미 학습에 쓰는 이미지: 이미지 폴더 또는 경로 목록 txt"""
+    stems = set()
+    for s in paths:
+        p = Path(s)
+        if p.is_dir():
+            stems |= {f.stem for f in p.rglob("*") if f.suffix.lower() in ev.IMG_EXTS}
+        elif p.exists():
+            stems |= {Path(ln.strip()).stem for ln in p.read_text(encoding="utf-8").splitlines() if ln.strip()}
+        else:
+            print(f"[WARN] 없음: {p}")
+    return stems
+
+
+def score_images(data: dict, n_img: int, det_conf: float = DET_CONF, strong_conf: float = STRONG_CONF,
+                 w_miss: float = W_MISS, w_weak: float = W_WEAK, w_fp: float = W_FP) -> dict:
+    """이미지별 점수와 항목별 개수 (전부 벡터화, 이미지 반복문 없음)"""
+    if not strong_conf > det_conf:  # weak 점수가 (strong_conf - det_conf)로 나눔
+        raise ValueError(f"strong_conf({strong_conf})는 det_conf({det_conf})보다 커야 합니다")
+    nc = int(max(data["gt_cls"].max(initial=-1), data["pr_cls"].max(initial=-1))) + 1
+
+    # 정답마다 "IoU >= 0.5인 같은 클래스 예측의 최고 confidence"
+    gt_conf = np.zeros(len(data["gt_cls"]), np.float32)
+    if len(gt_conf) and len(data["pr_cls"]):
+        pr_key = data["pr_img"].astype(np.int64) * nc + data["pr_cls"]
+        gt_key = data["gt_img"].astype(np.int64) * nc + data["gt_cls"]
+        g_order = np.argsort(gt_key, kind="stable")
+        p_idx, g_sorted = ev.group_pairs(pr_key, gt_key[g_order])
+        g_idx = g_order[g_sorted]
+        ok = ev.box_iou_pairs(data["pr_box"][p_idx], data["gt_box"][g_idx]) >= MATCH_IOU
+        np.maximum.at(gt_conf, g_idx[ok], data["pr_conf"][p_idx[ok]])
+
+    missed = gt_conf < det_conf
+    weak = ~missed & (gt_conf < strong_conf)
+    weak_score = np.where(weak, (strong_conf - gt_conf) / (strong_conf - det_conf), 0.0)
+
+    # 배포 임계값 기준 FP (COCO 방식 매칭: conf 높은 예측부터 정답 하나씩)
+    keep = data["pr_conf"] >= det_conf
+    det = ev.sort_predictions({**data, **{k: data[k][keep] for k in ("pr_img", "pr_cls", "pr_box", "pr_conf")}})
+    fp = ~ev.match_tp(det, np.array([MATCH_IOU]))[:, 0]
+
+    def per_image(owner: np.ndarray, w: np.ndarray) -> np.ndarray:
+        return np.bincount(owner, weights=w, minlength=n_img)[:n_img]
+
+    n_miss = per_image(data["gt_img"], missed.astype(np.float64))
+    n_weak = per_image(data["gt_img"], weak.astype(np.float64))
+    n_fp = per_image(det["pr_img"], fp.astype(np.float64))
+    score = (w_miss * n_miss + w_weak * per_image(data["gt_img"], weak_score)
+             + w_fp * per_image(det["pr_img"], np.where(fp, det["pr_conf"], 0.0)))
+    return {
+        "score": score, "missed": n_miss.astype(np.int32), "weak": n_weak.astype(np.int32),
+        "fp": n_fp.astype(np.int32), "missed_cls": np.bincount(data["gt_cls"][missed], minlength=nc),
+    }
+
+
+def write_priority(path: Path, stems: np.ndarray, s: dict) -> None:
+    order = np.argsort(-s["score"], kind="stable")
+    lines = ["stem,score,missed,weak,fp"]
+    lines += [f"{stems[i]},{s['score'][i]:.4f},{s['missed'][i]},{s['weak'][i]},{s['fp'][i]}" for i in order]
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", required=True, help="pool 데이터셋의 data.yaml (04 결과 등, 전체 이미지)")
+    ap.add_argument("--split", default="train")
+    ap.add_argument("--weights", required=True, help="현재 모델 (best.pt)")
+    ap.add_argument("--exclude", nargs="*", default=[], help="이미 학습에 쓰는 이미지 폴더 / 목록 txt (pool에서 제외)")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--batch", type=int, default=16)
+    ap.add_argument("--device", default="")
+    ap.add_argument("--cache", help="예측 npz 캐시 경로 (기본: 결과 파일 옆)")
+    ap.add_argument("--det-conf", type=float, default=DET_CONF)
+    ap.add_argument("--strong-conf", type=float, default=STRONG_CONF)
+    ap.add_argument("--w-miss", type=float, default=W_MISS)
+    ap.add_argument("--w-weak", type=float, default=W_WEAK)
+    ap.add_argument("--w-fp", type=float, default=W_FP)
+    ap.add_argument("--out", default="hard_examples.csv", help="05 / pipeline.py subset.priority 에 넣을 파일")
+    args = ap.parse_args()
+    if not args.strong_conf > args.det_conf:
+        ap.error(f"--strong-conf({args.strong_conf})는 --det-conf({args.det_conf})보다 커야 합니다")
+
+    data_yaml = Path(args.data)
+    _, names = ev.read_data_yaml(data_yaml)
+    images = ev.split_images(data_yaml, args.split)
+    used = read_stems(args.exclude)
+    pool = [p for p in images if p.stem not in used]
+    print(f"[INFO] {args.split}: {len(images)} images, 이미 사용 중 {len(images) - len(pool)}, pool {len(pool)}")
+    if not pool:
+        raise SystemExit("[ERROR] pool이 비어 있습니다.")
+
+    out = Path(args.out)
+    weights = Path(args.weights)
+    cache = Path(args.cache) if args.cache else out.with_name(f"{out.stem}_preds.npz")
+    label_dir = ev.label_path(pool[0]).parent
+    meta = {
+        "data": str(data_yaml.resolve()), "split": args.split, "n_images": len(pool),
+        "pool": hashlib.sha1("\n".join(str(p) for p in pool).encode("utf-8")).hexdigest(),
+        "source": str(weights.resolve()), "source_sig": ev.dir_signature(weights),
+        "labels_sig": ev.dir_signature(label_dir) if label_dir.exists() else None,
+        "imgsz": args.imgsz, "conf": MINE_CONF,
+    }
+
+    data = ev.load_cache(cache, meta)
+    if data is None:
+        print(f"[INFO] 예측 캐시 없음 -> 추론 ({len(pool)} images)")
+        data = ev.load_ground_truth(pool)
+        data.update(ev.run_predictions(pool, args.weights, args.imgsz, args.batch, args.device, conf=MINE_CONF))
+        ev.save_cache(cache, data, meta)
+        data = ev.load_cache(cache, meta)
+        print(f"[INFO] 캐시 저장: {cache} ({cache.stat().st_size / 1e6:.1f} MB)")
+    else:
+        print(f"[INFO] 캐시 사용: {cache}")
+
+    t0 = time.perf_counter()
+    s = score_images(data, len(pool), args.det_conf, args.strong_conf, args.w_miss, args.w_weak, args.w_fp)
+    dt = time.perf_counter() - t0
+    write_priority(out, data["stems"], s)
+
+    hard = int((s["score"] > 0).sum())
+    print("=" * 50)
+    print(f"scored {len(pool)} images in {dt * 1000:.1f} ms | score > 0: {hard} ({hard / len(pool):.0%})")
+    print(f"missed {int(s['missed'].sum())} | weak {int(s['weak'].sum())} | fp {int(s['fp'].sum())} "
+          f"(labels {len(data['gt_cls'])}, det_conf {args.det_conf})")
+    if hard:
+        q = np.percentile(s["score"][s["score"] > 0], [50, 90, 99])
+        print(f"score p50 {q[0]:.2f} | p90 {q[1]:.2f} | p99 {q[2]:.2f} | max {s['score'].max():.2f}")
+    top = [(names[c] if c < len(names) else str(c), int(n)) for c, n in enumerate(s["missed_cls"]) if n]
+    for name, n in sorted(top, key=lambda x: -x[1])[:10]:
+        print(f"  missed {name:<20} {n}")
+    print("=" * 50)
+    print(f"[OK] {out}")
+
+
+if __name__ == "__main__":
+    main()
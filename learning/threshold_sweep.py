@@ -0,0 +1,229 @@
+"""
+클래스별 confidence / NMS IoU 임계값 탐색
+
+1) val split을 best.pt로 "한 번만" 추론 (conf=0.001, NMS IoU=0.95 로 거의 원본 박스 유지)
+   -> evaluate.py 와 같은 npz 캐시(float16)로 저장
+2) 메모리에서 IoU 후보마다 클래스별 NMS를 다시 돌리고 (벡터화),
+   각 클래스의 confidence-F1 곡선에서 가장 좋은 (iou, conf) 조합을 고름
+   (NMS는 클래스별로 따로 돌기 때문에 클래스마다 다른 iou를 골라도 서로 영향 없음)
+3) 결과를 thresholds.json 으로 저장 -> web/app.py 가 읽어서 사용
+
+참고: 캐시된 박스는 이미 IoU 0.95 NMS를 한 번 거친 것이므로, 더 낮은 IoU의 NMS 결과는
+원본 박스에 바로 돌린 것과 아주 드물게 다를 수 있음 (0.95 이상 겹치는 박스끼리의 연쇄 억제).
+
+사용 예:
+    python threshold_sweep.py --data data_final.yaml --weights Recycle_Final_Project/YOLO11m_HighRes/weights/best.pt
+    python threshold_sweep.py --data data_final.yaml --weights best.pt --out ../web/thresholds.json --beta 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+import evaluate as ev
+
+RAW_CONF = 0.001
+RAW_IOU = 0.95
+DEFAULT_CONF = 0.25  # 튜닝 결과가 없는 클래스에 쓸 conf (Ultralytics 기본값)
+PAIR_CHUNK = 1_000_000  # nms_pairs: 한 번에 IoU를 계산할 쌍 수 (메모리 상한, 남는 쌍만 모음)
+IOU_GRID = [0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9]
+
+
+# =========================
+# 벡터화 NMS
+# =========================
+
+def nms_pairs(data: dict, iou_min: float) -> dict:
+    """
+    같은 (이미지, 클래스) 안에서 (높은 conf 박스, 낮은 conf 박스) 쌍을 전부 만들고 IoU를 한 번만 계산.
+    IoU 후보가 바뀌어도 이 결과를 그대로 재사용. (iou_min = IoU 후보 중 가장 작은 값)
+    그룹 크기 n이면 쌍은 n^2/2 개 (conf 0.001 캐시는 이미지당 수만 개)라서 PAIR_CHUNK 쌍씩 나눠 계산하고
+    iou > iou_min 인 쌍만 남김
+    """
+    nc = int(data["pr_cls"].max(initial=-1)) + 1
+    key = data["pr_img"].astype(np.int64) * max(nc, 1) + data["pr_cls"]
+    order = np.lexsort((-data["pr_conf"], key))
+    skey = key[order]
+    start = np.searchsorted(skey, skey, side="left")
+    rank_sorted = np.arange(len(skey)) - start  # 그룹 안에서의 conf 순위
+
+    cnt = rank_sorted  # 순위 r인 박스는 자기보다 conf 높은 r개와 쌍
+    csum = np.cumsum(cnt)
+    out_hi, out_lo, out_iou = [], [], []
+    s = 0
+    while s < len(skey):
+        # 정렬 위치 s..e 의 박스가 lo인 쌍 (쌍 수가 PAIR_CHUNK를 넘지 않게)
+        done = csum[s - 1] if s else 0
+        e = max(int(np.searchsorted(csum, done + PAIR_CHUNK, side="right")), s + 1)
+        c = cnt[s:e]
+        lo_pos = np.repeat(np.arange(s, e), c)
+        offs = np.repeat(np.cumsum(c) - c, c)
+        hi_pos = np.repeat(start[s:e], c) + (np.arange(c.sum()) - offs)
+
+        hi, lo = order[hi_pos], order[lo_pos]
+        iou = ev.box_iou_pairs(data["pr_box"][hi], data["pr_box"][lo])
+        # 조금이라도 겹치는 쌍만 남김 (대부분의 쌍은 IoU 0)
+        keep = iou > iou_min
+        out_hi.append(hi[keep])
+        out_lo.append(lo[keep])
+        out_iou.append(iou[keep])
+        s = e
+
+    rank = np.empty(len(key), dtype=np.int64)
+    rank[order] = rank_sorted
+    if not out_hi:
+        return {"hi": np.zeros(0, np.int64), "lo": np.zeros(0, np.int64), "iou": np.zeros(0, np.float32),
+                "rank": rank, "n": len(key)}
+    return {"hi": np.concatenate(out_hi), "lo": np.concatenate(out_lo), "iou": np.concatenate(out_iou),
+            "rank": rank, "n": len(key)}
+
+
+def nms_keep(pairs: dict, iou_thres: float | np.ndarray, cls: np.ndarray | None = None) -> np.ndarray:
+    """
+    greedy NMS 결과 (살아남는 박스 mask).
+    conf 순위 r인 박스는 순위가 더 높은(이미 결정된) 박스 중 살아남은 것과 IoU > thres 이면 제거.
+    순위별로 한 라운드씩, 모든 이미지/클래스를 동시에 처리.
+    iou_thres 를 클래스별 배열로 주면 cls(예측 클래스)로 골라서 적용.
+    """
+    thr = iou_thres if np.isscalar(iou_thres) else np.asarray(iou_thres)[cls[pairs["lo"]]]
+    m = pairs["iou"] > thr
+    hi, lo = pairs["hi"][m], pairs["lo"][m]
+    kept = np.ones(pairs["n"], dtype=bool)
+    if len(lo) == 0:
+        return kept
+
+    r = pairs["rank"][lo]
+    o = np.argsort(r, kind="stable")
+    hi, lo, r = hi[o], lo[o], r[o]
+    bounds = np.flatnonzero(np.r_[True, r[1:] != r[:-1], True])
+    for s, e in zip(bounds[:-1], bounds[1:]):
+        sup = lo[s:e][kept[hi[s:e]]]
+        kept[sup] = False
+    return kept
+
+
+def subset(data: dict, mask: np.ndarray) -> dict:
+    out = dict(data)
+    for k in ("pr_img", "pr_cls", "pr_box", "pr_conf"):
+        out[k] = data[k][mask]
+    return out
+
+
+# =========================
+# 탐색
+# =========================
+
+def sweep(data: dict, nc: int, iou_grid: list[float], beta: float = 1.0) -> tuple[dict, list[dict]]:
+    """
+    returns: (클래스별 최적값, IoU 후보별 요약)
+    점수는 F-beta (beta<1 이면 precision 중시, beta>1 이면 recall 중시), IoU 0.5 매칭 기준.
+    """
+    pairs = nms_pairs(data, min(iou_grid))
+    best = {c: None for c in range(nc)}
+    summary = []
+    for t in iou_grid:
+        sub = ev.sort_predictions(subset(data, nms_keep(pairs, t)))
+        tp = ev.match_tp(sub)
+        st = ev.ap_per_class(tp, sub["pr_conf"], sub["pr_cls"], sub["gt_cls"], nc)
+        p, r, x = st["p_curve"], st["r_curve"], st["x"]
+        fb = (1 + beta ** 2) * p * r / (beta ** 2 * p + r + 1e-16)
+
+        pres = st["present"]
+        summary.append({
+            "iou": t, "map50": float(st["ap"][pres, 0].mean()) if pres.any() else 0.0,
+            "map50_95": float(st["ap"][pres].mean()) if pres.any() else 0.0,
+            "mean_best_f": float(fb[pres].max(1).mean()) if pres.any() else 0.0,
+        })
+
+        for c in np.flatnonzero(pres):
+            k = int(fb[c].argmax())
+            cand = {
+                "iou": t, "conf": round(float(x[k]), 4), "f": float(fb[c, k]),
+                "precision": float(p[c, k]), "recall": float(r[c, k]),
+                "ap50": float(st["ap"][c, 0]), "ap50_95": float(st["ap"][c].mean()),
+            }
+            cur = best[int(c)]
+            if cur is None or (cand["f"], cand["ap50_95"]) > (cur["f"], cur["ap50_95"]):
+                best[int(c)] = cand
+    return best, summary
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", required=True)
+    ap.add_argument("--weights", required=True)
+    ap.add_argument("--split", default="val")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--batch", type=int, default=16)
+    ap.add_argument("--device", default="")
+    ap.add_argument("--cache", help="원본 예측 npz 캐시 경로 (기본: 모델 옆)")
+    ap.add_argument("--iou-grid", type=float, nargs="+", default=IOU_GRID)
+    ap.add_argument("--beta", type=float, default=1.0, help="F-beta의 beta (기본 F1)")
+    ap.add_argument("--out", default="thresholds.json", help="app.py가 읽을 결과 파일")
+    args = ap.parse_args()
+
+    data_yaml = Path(args.data)
+    _, names = ev.read_data_yaml(data_yaml)
+    nc = len(names)
+    images = ev.split_images(data_yaml, args.split)
+
+    weights = Path(args.weights)
+    cache = Path(args.cache) if args.cache else weights.parent / f"{weights.stem}_{args.split}_raw_preds.npz"
+    label_dir = ev.label_path(images[0]).parent if images else Path()
+    meta = {
+        "data": str(data_yaml.resolve()), "split": args.split, "n_images": len(images),
+        "source": str(weights.resolve()), "source_sig": ev.dir_signature(weights),
+        "labels_sig": ev.dir_signature(label_dir) if label_dir.exists() else None,
+        "imgsz": args.imgsz, "raw_conf": RAW_CONF, "raw_iou": RAW_IOU,
+    }
+
+    data = ev.load_cache(cache, meta)
+    if data is None:
+        print(f"[INFO] 원본 예측 캐시 없음 -> 추론 1회 ({len(images)} images)")
+        data = ev.load_ground_truth(images)
+        data.update(ev.run_predictions(images, args.weights, args.imgsz, args.batch, args.device,
+                                       conf=RAW_CONF, iou=RAW_IOU))
+        ev.save_cache(cache, data, meta)
+        data = ev.load_cache(cache, meta)
+        print(f"[INFO] 캐시 저장: {cache} ({cache.stat().st_size / 1e6:.1f} MB)")
+    else:
+        print(f"[INFO] 캐시 사용: {cache}")
+
+    data = ev.drop_unknown_classes(data, nc)
+    t0 = time.perf_counter()
+    best, summary = sweep(data, nc, sorted(args.iou_grid), args.beta)
+    dt = time.perf_counter() - t0
+
+    print(f"\n[SWEEP] {len(args.iou_grid)} IoU 후보 x 1000 conf 지점, {len(data['pr_cls'])} boxes, {dt:.2f}s")
+    print(f"{'iou':>6} {'mAP50':>7} {'mAP50-95':>9} {'meanF':>7}")
+    for s in summary:
+        print(f"{s['iou']:>6.2f} {s['map50']:7.3f} {s['map50_95']:9.3f} {s['mean_best_f']:7.3f}")
+    overall = max(summary, key=lambda s: (s["mean_best_f"], s["map50_95"]))
+
+    print(f"\n{'class':>20} {'iou':>5} {'conf':>6} {'F':>6} {'P':>6} {'R':>6}")
+    classes = {}
+    for c, name in enumerate(names):
+        b = best[c]
+        if b is None or b["f"] <= 0:
+            continue  # 맞춘 박스가 없는 클래스는 기본값 사용
+        classes[name] = b
+        print(f"{name:>20} {b['iou']:5.2f} {b['conf']:6.3f} {b['f']:6.3f} {b['precision']:6.3f} {b['recall']:6.3f}")
+
+    out = {
+        "weights": str(weights), "split": args.split, "beta": args.beta,
+        "iou": overall["iou"],  # 클래스 정보가 없을 때 쓸 기본값
+        "conf": DEFAULT_CONF,
+        "classes": classes,
+        "sweep": summary,
+    }
+    Path(args.out).write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n[OK] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,341 @@
-# from ultralytics import YOLO
+"""
+YOLO11m 재활용 분류 모델 학습 실행기 (설정 파일 기반)
 
+- 설정은 train_config.yaml 에서 읽고, CLI의 --set key=value 로 덮어씀
+- resume: auto 이면 last.pt가 있을 때만 이어서 학습하고, 없으면 처음부터 학습
+- autotune 이 켜져 있으면 짧은 측정으로 samples/s가 가장 높은 batch / workers를 골라서 사용
+  (선택 결과는 <project>/<name>/autotune.json 에 같이 기록)
 
+사용 예:
+    python yolo11m_learning.py
+    python yolo11m_learning.py --config train_config.yaml --set device=cpu --set epochs=5
+    python yolo11m_learning.py --no-autotune --resume false
+"""
 
+from __future__ import annotations
 
+import argparse
+import json
+import os
+import time
+from pathlib import Path
 
-# def main():
-#     # 1. 모델 체급 상향 (Medium 모델)
-#     model = YOLO('Recycle_Final_Project/YOLO11m_HighRes/weights/last.pt') # 반드시 last.pt 사용
-#     model.train(resume=True)
-#     print("\n" + "="*50)
-#     print("재활용 분류 모델 학습 시작")
-#     print(f" 클래스 수: 12개 / 학습 이미지: 15,000장 / 목표 시간: 90분")
-#     print("="*50)
-#     # 2. 고성능 단거리 질주 학습 (50 에포크)
-#     model.train(
-#         data='data_final.yaml',      # 기존 정제 데이터 사용
-#         epochs=30,                   # 시간 관계상 30회 집중 학습
-#         imgsz=640,                   # 시력(해상도) 상향은 포기할 수 없는 핵심!
-#         batch=8,                     # VRAM 부하 방지용
-#         patience=10,                 # 10회 연속 개선 없으면 조기 종료
-#         device='0',                  # GPU 4060 가동
-#         workers=4,                   # CPU 발열 관리 모드
-#         project='Recycle_Final_Project',
-#         name='YOLO11m_HighRes', # 최종 버전 이름
-#         exist_ok=True,
-#         optimizer='AdamW',
-#         seed=0,
-#         close_mosaic=5              # 마지막 10회는 정밀 사격 모드 유지
-#     )
+import yaml
 
+DEFAULT_CONFIG = Path(__file__).with_name("train_config.yaml")
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
 
-# if __name__ == '__main__':
-#     main()
 
+# =========================
+# 설정 읽기
+# =========================
 
-from ultralytics import YOLO
+def load_config(path: Path, overrides: list[str]) -> dict:
+    cfg = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    cfg.setdefault("train", {})
+    cfg.setdefault("autotune", {})
+
+    # --set key=value : 최상위 키(model/data/resume)가 아니면 train 쪽으로 들어감
+    # autotune.xxx=value 처럼 점으로 구분하면 해당 섹션으로 들어감
+    for item in overrides:
+        if "=" not in item:
+            raise ValueError(f"--set 형식은 key=value 입니다: {item}")
+        key, raw = item.split("=", 1)
+        value = yaml.safe_load(raw)
+        if "." in key:
+            section, sub = key.split(".", 1)
+            cfg.setdefault(section, {})[sub] = value
+        elif key in ("model", "data", "resume"):
+            cfg[key] = value
+        else:
+            cfg["train"][key] = value
+    return cfg
+
+
+def run_dir(cfg: dict) -> Path:
+    t = cfg["train"]
+    return Path(t.get("project", "runs")) / t.get("name", "train")
+
+
+# =========================
+# resume 판단
+# =========================
+
+def resume_checkpoint(cfg: dict) -> Path | None:
+    """
+    이어서 학습할 last.pt를 돌려줌. 처음부터 학습해야 하면 None.
+    """
+    mode = str(cfg.get("resume", "auto")).lower()
+    if mode == "false":
+        return None
+
+    last = run_dir(cfg) / "weights" / "last.pt"
+    if not last.exists():
+        if mode == "true":
+            raise FileNotFoundError(f"resume=true 인데 last.pt가 없습니다: {last}")
+        print(f"[INFO] last.pt가 없어서 처음부터 학습합니다: {last}")
+        return None
+
+    import torch
+
+    try:
+        ckpt = torch.load(last, map_location="cpu", weights_only=False)
+    except Exception as e:
+        if mode == "true":
+            raise
+        print(f"[WARN] last.pt를 읽을 수 없어 처음부터 학습합니다: {e}")
+        return None
+
+    # 학습이 끝난 체크포인트는 epoch가 -1로 저장됨 -> 이어서 할 게 없음
+    if ckpt.get("epoch", -1) == -1:
+        if mode == "true":
+            raise RuntimeError(f"이미 학습이 끝난 체크포인트입니다: {last}")
+        print(f"[INFO] {last} 는 이미 끝난 학습입니다. 처음부터 새로 학습합니다.")
+        return None
+
+    print(f"[INFO] {ckpt['epoch'] + 1} 에포크까지 진행된 체크포인트에서 이어서 학습합니다: {last}")
+    return last
+
+
+# =========================
+# autotune (batch / workers)
+# =========================
+
+def pick_best(results: list[tuple[int, float]], tolerance: float, prefer_large: bool) -> int:
+    """
+    results: [(후보값, samples/s)]
+    최고 처리량 대비 tolerance 이내인 후보 중에서 큰 값(또는 작은 값)을 고름
+    """
+    best = max(r[1] for r in results)
+    ok = [v for v, sps in results if sps >= best * (1.0 - tolerance)]
+    return max(ok) if prefer_large else min(ok)
+
+
+def probe_batch(cfg: dict) -> tuple[int, list[tuple[int, float]]]:
+    import torch
+    from ultralytics import YOLO
+    from ultralytics.utils.torch_utils import select_device
+
+    t = cfg["train"]
+    at = cfg["autotune"]
+    imgsz = int(t.get("imgsz", 640))
+    steps = int(at.get("probe_steps", 5))
+    mem_frac = float(at.get("memory_fraction", 0.85))
+    device = select_device(str(t.get("device", "")), verbose=False)
+
+    net = YOLO(cfg["model"]).model.to(device).float()
+    for p in net.parameters():
+        p.requires_grad_(True)
+    net.train()
+    opt = torch.optim.SGD(net.parameters(), lr=0.0)
+
+    def tensors(out):
+        # 버전에 따라 head 출력이 tensor / list / dict 로 다름
+        if torch.is_tensor(out):
+            yield out
+        elif isinstance(out, dict):
+            for v in out.values():
+                yield from tensors(v)
+        elif isinstance(out, (list, tuple)):
+            for v in out:
+                yield from tensors(v)
+
+    def step(x):
+        # 실제 loss 대신 출력 합으로 forward + backward 비용만 측정
+        loss = sum(o.float().sum() for o in tensors(net(x)))
+        opt.zero_grad(set_to_none=True)
+        loss.backward()
+
+    results = []
+    for b in sorted(int(v) for v in at.get("batch_candidates", [8])):
+        try:
+            x = torch.rand(b, 3, imgsz, imgsz, device=device)
+            if device.type == "cuda":
+                torch.cuda.empty_cache()
+                torch.cuda.reset_peak_memory_stats(device)
+            step(x)  # warmup
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            t0 = time.perf_counter()
+            for _ in range(steps):
+                step(x)
+            if device.type == "cuda":
+                torch.cuda.synchronize(device)
+            dt = time.perf_counter() - t0
+        except RuntimeError as e:  # torch.cuda.OutOfMemoryError 도 RuntimeError
+            if "out of memory" not in str(e).lower():
+                raise
+            print(f"  batch {b:>3}: OOM -> 중단")
+            break
+        finally:
+            if device.type == "cuda":
+                torch.cuda.empty_cache()
+
+        sps = b * steps / dt
+        if device.type == "cuda":
+            used = torch.cuda.max_memory_allocated(device) / torch.cuda.get_device_properties(device).total_memory
+            print(f"  batch {b:>3}: {sps:8.1f} samples/s | mem {used:.0%}")
+            if used > mem_frac:
+                print(f"  batch {b:>3}: 메모리 {used:.0%} > {mem_frac:.0%} -> 제외하고 중단")
+                break
+        else:
+            print(f"  batch {b:>3}: {sps:8.1f} samples/s")
+        results.append((b, sps))
+
+    del net, opt
+    if not results:
+        raise RuntimeError("batch 후보가 모두 실패했습니다. batch_candidates를 줄여보세요.")
+    return pick_best(results, float(at.get("tolerance", 0.05)), prefer_large=True), results
+
+
+def list_train_images(data_yaml: Path, limit: int) -> list[Path]:
+    data = yaml.safe_load(data_yaml.read_text(encoding="utf-8"))
+    base = Path(data.get("path") or data_yaml.parent)
+    if not base.is_absolute():
+        base = data_yaml.parent / base
+    entries = data["train"] if isinstance(data["train"], list) else [data["train"]]
+
+    files: list[Path] = []
+    for e in entries:
+        p = Path(e) if Path(e).is_absolute() else base / e
+        if p.is_dir():
+            files += [f for f in p.rglob("*") if f.suffix.lower() in IMG_EXTS]
+        elif p.suffix == ".txt" and p.exists():
+            for line in p.read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if line:
+                    f = Path(line)
+                    files.append(f if f.is_absolute() else p.parent / f)
+        if len(files) >= limit:
+            break
+    return files[:limit]
+
+
+class _DecodeDataset:
+    """workers 측정용: 실제 학습과 같은 decode + resize 비용만 재현"""
+
+    def __init__(self, files: list[Path], imgsz: int):
+        self.files = files
+        self.imgsz = imgsz
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, i):
+        import cv2
+        import numpy as np
+        import torch
+
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        im = cv2.imread(str(self.files[i]))
+        if im is not None:
+            h, w = im.shape[:2]
+            r = self.imgsz / max(h, w)
+            im = cv2.resize(im, (max(1, int(w * r)), max(1, int(h * r))))
+            canvas[: im.shape[0], : im.shape[1]] = im
+        return torch.from_numpy(canvas).permute(2, 0, 1)
+
+
+def probe_workers(cfg: dict, batch: int) -> tuple[int, list[tuple[int, float]]]:
+    from torch.utils.data import DataLoader
+
+    t = cfg["train"]
+    at = cfg["autotune"]
+    files = list_train_images(Path(cfg["data"]), int(at.get("probe_images", 256)))
+    if not files:
+        print("  [WARN] 학습 이미지를 찾지 못해 workers 측정을 건너뜁니다.")
+        return int(t.get("workers", 4)), []
+
+    ds = _DecodeDataset(files, int(t.get("imgsz", 640)))
+    max_workers = os.cpu_count() or 1
+    results = []
+    for w in sorted(set(int(v) for v in at.get("worker_candidates", [0, 2, 4, 8]))):
+        if w > max_workers:
+            continue
+        loader = DataLoader(ds, batch_size=batch, num_workers=w, shuffle=False)
+        t0 = time.perf_counter()
+        n = 0
+        for out in loader:
+            n += len(out)
+        sps = n / (time.perf_counter() - t0)
+        print(f"  workers {w:>2}: {sps:8.1f} images/s")
+        results.append((w, sps))
+
+    return pick_best(results, float(at.get("tolerance", 0.05)), prefer_large=False), results
+
+
+def autotune(cfg: dict) -> dict:
+    print("\n[AUTOTUNE] batch 측정")
+    batch, batch_res = probe_batch(cfg)
+    print(f"[AUTOTUNE] batch = {batch}")
+
+    print("\n[AUTOTUNE] workers 측정")
+    workers, worker_res = probe_workers(cfg, batch)
+    print(f"[AUTOTUNE] workers = {workers}")
+
+    log = {
+        "batch": batch,
+        "workers": workers,
+        "imgsz": cfg["train"].get("imgsz"),
+        "device": str(cfg["train"].get("device")),
+        "batch_probe": [{"batch": b, "samples_per_s": round(s, 2)} for b, s in batch_res],
+        "worker_probe": [{"workers": w, "images_per_s": round(s, 2)} for w, s in worker_res],
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    out = run_dir(cfg)
+    out.mkdir(parents=True, exist_ok=True)
+    (out / "autotune.json").write_text(json.dumps(log, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"[AUTOTUNE] 기록: {out / 'autotune.json'}")
+    return log
+
+
+# =========================
+# main
+# =========================
 
 def main():
-    # 1. 멈췄던 시점의 모델 불러오기 (경로는 본인의 환경에 맞게 확인)
-    # 22 에포크 진행 중 멈췄으므로 last.pt에 모든 기록이 남아있습니다.
-    model = YOLO('Recycle_Final_Project/YOLO11m_HighRes/weights/last.pt')
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default=str(DEFAULT_CONFIG), help="학습 설정 yaml")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="설정 덮어쓰기 (여러 번 가능)")
+    ap.add_argument("--resume", choices=["auto", "true", "false"], help="설정 파일의 resume 값 덮어쓰기")
+    ap.add_argument("--no-autotune", action="store_true", help="batch/workers 자동 측정 끄기")
+    args = ap.parse_args()
+
+    cfg = load_config(Path(args.config), args.set)
+    if args.resume:
+        cfg["resume"] = args.resume
+    if args.no_autotune:
+        cfg["autotune"]["enabled"] = False
+
+    from ultralytics import YOLO
+
+    # 1. 멈췄던 시점의 모델이 있으면 이어서 학습
+    last = resume_checkpoint(cfg)
+    if last is not None:
+        print("\n" + "="*50)
+        print("중단된 학습을 재개합니다 (Resume Mode)")
+        print("이전 설정값(에포크, batch, workers 등)이 체크포인트에서 그대로 로드됩니다.")
+        print("="*50)
+        YOLO(str(last)).train(resume=True)
+        return
+
+    # 2. 처음부터 학습: 필요하면 batch / workers 자동 선택
+    train_args = dict(cfg["train"])
+    if cfg["autotune"].get("enabled", False):
+        tuned = autotune(cfg)
+        train_args["batch"] = tuned["batch"]
+        train_args["workers"] = tuned["workers"]
 
     print("\n" + "="*50)
-    print("중단된 학습을 재개합니다 (Resume Mode)")
-    print("이전 설정값(30 에포크, 640 해상도 등)이 그대로 유지됩니다.")
+    print("재활용 분류 모델 학습 시작")
+    print(f" 모델: {cfg['model']} / 데이터: {cfg['data']}")
+    print(f" epochs={train_args.get('epochs')} imgsz={train_args.get('imgsz')} "
+          f"batch={train_args.get('batch')} workers={train_args.get('workers')} device={train_args.get('device')}")
     print("="*50)
 
-    # 2. 재개(Resume) 실행
-    # 이 한 줄이면 이전에 설정했던 30 에포크, batch, workers 등이 자동으로 로드됩니다.
-    model.train(resume=True)
+    model = YOLO(cfg["model"])
+    model.train(data=cfg["data"], **train_args)
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
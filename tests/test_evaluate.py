@@ -0,0 +1,92 @@
+"""
+learning/evaluate.py 를 Ultralytics 구현(reference)과 비교
+
+고정 seed로 만든 합성 데이터 (GT를 흔든 예측 + 클래스 틀린 예측 + 아무 데나 FP + 놓친 GT)에서
+TP 행렬, confusion matrix, 클래스별 AP가 evaluate.crosscheck 결과와 같은지 확인.
+실행: python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "learning"))
+import evaluate as ev  # noqa: E402
+
+pytest.importorskip("ultralytics")
+
+NC = 5
+
+
+def synthetic(seed: int, n_img: int = 60) -> dict:
+    rng = np.random.default_rng(seed)
+    gt_img, gt_cls, gt_box, pr_img, pr_cls, pr_box, pr_conf = [], [], [], [], [], [], []
+    for i in range(n_img):
+        n = rng.integers(0, 8)
+        xy = rng.uniform(0, 560, (n, 2))
+        wh = rng.uniform(8, 120, (n, 2))
+        boxes = np.concatenate([xy, xy + wh], 1)
+        cls = rng.integers(0, NC, n)
+        gt_img += [i] * n
+        gt_cls += cls.tolist()
+        gt_box += boxes.tolist()
+        for b, c in zip(boxes, cls):
+            if rng.random() < 0.15:  # 놓친 GT
+                continue
+            for _ in range(rng.integers(1, 3)):  # 중복 예측 포함
+                jitter = rng.normal(0, 0.08, 4) * np.r_[wh.mean(0), wh.mean(0)]
+                pr_img.append(i)
+                pr_cls.append(int(c) if rng.random() > 0.1 else int(rng.integers(0, NC)))
+                pr_box.append((b + jitter).tolist())
+                pr_conf.append(rng.uniform(0.05, 1.0))
+        for _ in range(rng.integers(0, 4)):  # 배경 FP
+            xy = rng.uniform(0, 560, 2)
+            pr_img.append(i)
+            pr_cls.append(int(rng.integers(0, NC)))
+            pr_box.append([*xy, *(xy + rng.uniform(8, 120, 2))])
+            pr_conf.append(rng.uniform(0.001, 0.6))
+    return {
+        "stems": np.array([f"img{i:04d}" for i in range(n_img)]),
+        "gt_img": np.array(gt_img, dtype=np.int64),
+        "gt_cls": np.array(gt_cls, dtype=np.int32),
+        "gt_box": np.array(gt_box, dtype=np.float32).reshape(-1, 4),
+        "pr_img": np.array(pr_img, dtype=np.int64),
+        "pr_cls": np.array(pr_cls, dtype=np.int32),
+        "pr_box": np.array(pr_box, dtype=np.float32).reshape(-1, 4),
+        "pr_conf": np.array(pr_conf, dtype=np.float32),
+    }
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_matches_ultralytics(seed):
+    data = synthetic(seed)
+    stats = ev.evaluate(data, NC)
+    cc = ev.crosscheck(data, NC, stats)
+    assert cc["tp_mismatch"] == 0
+    assert cc["cm_mismatch"] == 0
+    assert cc["ap_max_abs_diff"] < 1e-6
+    assert stats["map50"] == pytest.approx(cc["map50_ref"], abs=1e-6)
+    assert stats["map"] == pytest.approx(cc["map_ref"], abs=1e-6)
+
+
+def test_compute_ap_matches_ultralytics():
+    from ultralytics.utils.metrics import compute_ap as ref_compute_ap
+
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        recall = np.sort(rng.uniform(0, 1, 30))
+        precision = np.sort(rng.uniform(0, 1, 30))[::-1]
+        assert ev.compute_ap(recall, precision) == pytest.approx(ref_compute_ap(recall, precision)[0], abs=1e-9)
+
+
+def test_out_of_range_gt_classes_are_dropped():
+    data = synthetic(0)
+    stale = data["gt_cls"].copy()
+    stale[:5] = NC + 2  # taxonomy 변경 전 class id 가 남은 라벨
+    data["gt_cls"] = stale
+    stats = ev.evaluate(data, NC)
+    assert stats["ap"].shape[0] == NC
+    clean = ev.drop_unknown_classes(data, NC)
+    assert len(clean["gt_cls"]) == len(stale) - 5 and len(clean["gt_box"]) == len(clean["gt_cls"])
@@ -1,8 +1,32 @@
+import os
+import sys
+import time
+from pathlib import Path
+
 import streamlit as st
 from ultralytics import YOLO
 from PIL import Image
 import numpy as np
 
+from model_server import ModelClient, apply_class_thresholds, load_thresholds as read_thresholds, loosest_args, parse_address
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import metrics  # noqa: E402
+
+# learning/threshold_sweep.py 로 만든 클래스별 임계값 (없으면 Ultralytics 기본값 사용)
+THRESHOLDS_FILE = Path(__file__).with_name("thresholds.json")
+# model_server.py serve 로 띄운 모델 서버 주소 (예: 127.0.0.1:6000). 비어 있으면 이 프로세스에서 직접 모델 로드
+MODEL_SERVER = os.environ.get("YOLO_MODEL_SERVER", "")
+# /metrics (Prometheus 텍스트), /metrics.json 을 띄울 포트. 비어 있으면 안 띄움 (프로세스 여러 개면 포트도 각각)
+METRICS_PORT = os.environ.get("METRICS_PORT", "")
+# 기본은 이 컴퓨터에서만 접속 가능. 다른 호스트의 Prometheus가 수집해야 하면 METRICS_HOST=0.0.0.0
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+# APP_PROFILE=1 일 때만 주소 뒤에 ?profile=cprofile 또는 ?profile=sample 을 붙이면 그 요청의 분석 부분만
+# 프로파일링해서 여기에 저장 (ngrok으로 공유 중에는 끄기, 파일은 최근 PROFILE_KEEP개만 유지)
+PROFILE_ENABLED = os.environ.get("APP_PROFILE", "") == "1"
+PROFILE_DIR = Path(__file__).with_name("profiles")
+PROFILE_KEEP = 50
+
 # --- 1. 페이지 설정 ---
 st.set_page_config(page_title="AI 쓰레기 분류기", layout="centered")
 
@@ -13,11 +37,45 @@ def load_yolo_model():
     model = YOLO("best.pt") 
     return model
 
-try:
-    model = load_yolo_model()
-except Exception as e:
-    st.error(f"모델 파일을 찾을 수 없습니다. 'best.pt' 파일이 같은 폴더에 있는지 확인하세요. 에러: {e}")
-    st.stop()
+@st.cache_resource
+def get_model_client():
+    # 프로세스당 연결 1개 (세션들이 같이 씀), 모델은 서버 프로세스에만 있음
+    return ModelClient(parse_address(MODEL_SERVER))
+
+@st.cache_resource
+def load_thresholds():
+    return read_thresholds(THRESHOLDS_FILE)
+
+@st.cache_resource
+def start_metrics_server():
+    # 모듈 전역 값이라 세션 / rerun 과 관계없이 프로세스 단위로 누적됨
+    return metrics.start_http_server(int(METRICS_PORT), METRICS_HOST)
+
+
+def requested_profile():
+    # 꺼져 있거나 모르는 값이면 프로파일링 안 함 (방문자가 주소로 에러를 낼 수 없게)
+    mode = st.query_params.get("profile") if PROFILE_ENABLED else None
+    return mode if mode in metrics.PROFILE_MODES else None
+
+
+client, model = None, None
+if MODEL_SERVER:
+    try:
+        client = get_model_client()
+    except Exception as e:
+        st.error(f"모델 서버({MODEL_SERVER})에 연결할 수 없습니다. 'python model_server.py serve'가 실행 중인지 확인하세요. 에러: {e}")
+        st.stop()
+else:
+    try:
+        model = load_yolo_model()
+    except Exception as e:
+        st.error(f"모델 파일을 찾을 수 없습니다. 'best.pt' 파일이 같은 폴더에 있는지 확인하세요. 에러: {e}")
+        st.stop()
+
+thresholds = load_thresholds()
+predict_args = loosest_args(thresholds)
+if METRICS_PORT:
+    start_metrics_server()
 
 # --- 3. UI 부분 ---
 st.title("♻️ 스마트 쓰레기 분리배출 도우미")
@@ -28,7 +86,9 @@ uploaded_file = st.file_uploader("분석할 쓰레기 사진을 업로드하세
 # --- 4. 메인 로직 ---
 if uploaded_file is not None:
     # 이미지 열기
-    image = Image.open(uploaded_file)
+    with metrics.timer("app_stage_seconds", stage="decode"):
+        image = Image.open(uploaded_file)
+        image.load()
     
     # 두 개의 칼럼으로 나누어 보기 좋게 배치
     col1, col2 = st.columns(2)
@@ -37,26 +97,56 @@ if uploaded_file is not None:
         st.image(image, caption="원본 이미지", use_container_width=True)
     
     # 분석 시작
-    with st.spinner("AI 분석 중..."):
-        results = model(image)
+    with st.spinner("AI 분석 중..."), metrics.profile(requested_profile(), PROFILE_DIR, keep=PROFILE_KEEP) as prof:
+        if client is not None:
+            # 모델 서버: 이미지는 공유 메모리로 보내고 결과 그림도 공유 메모리로 받음
+            # (preprocess / infer / nms / render 는 서버 쪽 /metrics 에 기록됨)
+            try:
+                with metrics.timer("app_stage_seconds", stage="server"):
+                    res_plotted, dets = client.predict(image)
+                detections = [(client.names[int(d[5])], d[4]) for d in dets]
+            except (EOFError, OSError, RuntimeError) as e:  # 연결 끊김 / 서버 쪽 추론 에러
+                get_model_client.clear()  # 서버가 재시작된 경우 다음 실행에서 다시 연결
+                st.warning(f"모델 서버 응답 실패, 이 프로세스에서 모델을 직접 불러 분석합니다. 에러: {e}")
+                client = None
+        if client is None:
+            if model is None:
+                try:
+                    model = load_yolo_model()
+                except Exception as e:
+                    st.error(f"모델 파일을 찾을 수 없습니다. 'best.pt' 파일이 같은 폴더에 있는지 확인하세요. 에러: {e}")
+                    st.stop()
+            results = model(image, **predict_args)
+            t0 = time.perf_counter()
+            results[0] = apply_class_thresholds(results[0], thresholds)
+            # Ultralytics가 잰 단계별 시간(ms), 클래스별 임계값 적용 시간은 nms에 포함
+            sp = results[0].speed
+            metrics.observe("app_stage_seconds", sp["preprocess"] / 1000, stage="preprocess")
+            metrics.observe("app_stage_seconds", sp["inference"] / 1000, stage="infer")
+            metrics.observe("app_stage_seconds", sp["postprocess"] / 1000 + time.perf_counter() - t0, stage="nms")
+            # 결과 이미지 그리기
+            with metrics.timer("app_stage_seconds", stage="render"):
+                res_plotted = results[0].plot()
+            detections = [(model.names[int(box.cls[0])], float(box.conf[0])) for box in results[0].boxes]
         
+    metrics.inc("app_requests_total", mode="server" if client is not None else "local")
+    for label, _ in detections:
+        metrics.inc("app_detections_total", cls=label)
+    if prof["path"]:
+        st.caption(f"프로파일 저장: {prof['path']}")
+
     with col2:
-        # 결과 이미지 그리기
-        res_plotted = results[0].plot()
         st.image(res_plotted, caption="분석 결과", use_container_width=True)
 
     # --- 5. 상세 탐지 결과 출력 ---
     st.divider()
     st.subheader("🔍 탐지된 물체 분석 결과")
     
-    boxes = results[0].boxes
-    if len(boxes) > 0:
+    if len(detections) > 0:
         # 결과 데이터를 테이블 형태로 보여주기 위한 리스트
         detection_data = []
         
-        for box in boxes:
-            label = model.names[int(box.cls[0])]
-            confidence = float(box.conf[0])
+        for label, confidence in detections:
             detection_data.append({
                 "물체 종류": label,
                 "확률(Confidence)": f"{confidence:.1%}"
@@ -67,7 +157,7 @@ if uploaded_file is not None:
         
         # 표 형식으로 정리해서 보여주기
         st.table(detection_data)
-        st.success(f"총 {len(boxes)}개의 물체를 성공적으로 분류했습니다.")
+        st.success(f"총 {len(detections)}개의 물체를 성공적으로 분류했습니다.")
     else:
         st.warning("탐지된 물체가 없습니다. 사진을 다시 찍어보세요.")
 
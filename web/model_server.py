@@ -0,0 +1,492 @@
+"""
+모델 서버 (호스트 하나에 YOLO 모델을 한 번만 올리고 여러 Streamlit 프로세스가 같이 사용)
+
+@st.cache_resource 는 한 프로세스 안에서만 공유되기 때문에, streamlit 프로세스를 여러 개 띄우면
+프로세스마다 모델이 따로 올라가서 메모리를 그만큼 더 씀.
+serve 모드로 추론 전용 프로세스를 하나 띄우고, app.py는 YOLO_MODEL_SERVER 가 설정되어 있으면 이 서버에 요청만 보냄.
+
+- 이미지 전달: multiprocessing.shared_memory 한 덩어리를 슬롯 N개로 나눈 링 버퍼
+  클라이언트는 접속할 때 슬롯 하나를 받고, 슬롯에 이미지를 쓰면 서버가 그 자리에서 읽어서 추론한 뒤
+  결과 그림(plot)을 같은 슬롯에 다시 씀 -> 소켓으로는 이미지 바이트가 오가지 않음
+- 제어 채널: multiprocessing.connection (크기, 박스 목록 같은 작은 메시지만)
+- 추론 스레드 1개가 밀려 있는 요청을 모아서 한 번에 배치 추론
+- thresholds.json 이 있으면 서버가 클래스별 conf / NMS 임계값까지 적용해서 돌려줌
+
+사용 예:
+    python model_server.py serve --weights best.pt --slots 8
+    set YOLO_MODEL_SERVER=127.0.0.1:6000      (리눅스: export ...) 후 streamlit run app.py --server.port 8501, 8502, ...
+    python model_server.py bench --weights best.pt --clients 1 2 4 8
+
+인증 키: YOLO_MODEL_SERVER_KEY 환경변수, 없으면 serve가 처음 뜰 때 ~/.yolo_recycle/model_server.key 에
+무작위 키를 만들고(본인만 읽기 가능) 같은 사용자의 app.py가 그 파일을 읽음. (기본 키 없음: 제어 채널은 pickle이라
+키를 아는 프로세스만 접속해야 함)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common import metrics  # noqa: E402
+
+HERE = Path(__file__).resolve().parent
+THRESHOLDS_FILE = HERE / "thresholds.json"
+
+ADDRESS = ("127.0.0.1", 6000)
+KEY_ENV = "YOLO_MODEL_SERVER_KEY"
+KEY_FILE = Path.home() / ".yolo_recycle" / "model_server.key"
+DEFAULT_CONF = 0.25  # thresholds.json에 튜닝 값이 없는 클래스는 Ultralytics 기본 conf
+SLOTS = 8          # 동시에 붙을 수 있는 클라이언트(앱 프로세스) 수
+MAX_SIDE = 2048    # 슬롯 하나 = MAX_SIDE * MAX_SIDE * 3 바이트, 더 큰 이미지는 클라이언트가 줄여서 보냄
+MAX_BATCH = 8
+BENCH_TIMEOUT = 600  # bench: 서버 기동 / 워커 결과를 기다리는 최대 시간(초)
+
+
+def parse_address(s: str) -> tuple[str, int]:
+    host, _, port = s.rpartition(":")
+    return host or ADDRESS[0], int(port)
+
+
+# =========================
+# 클래스별 임계값 (app.py 와 서버가 같이 사용)
+# =========================
+
+def auth_key(create: bool = False) -> bytes:
+    """
+    접속 인증 키: YOLO_MODEL_SERVER_KEY 환경변수 > KEY_FILE
+    서버(create=True)는 키 파일이 없으면 무작위 키로 만듦 (0600, 같은 사용자만 읽기)
+    """
+    env = os.environ.get(KEY_ENV)
+    if env:
+        return env.encode()
+    if create and not KEY_FILE.exists():
+        KEY_FILE.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        try:
+            fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(secrets.token_hex(32))
+        except FileExistsError:  # 다른 서버 프로세스가 먼저 만든 경우
+            pass
+    if not KEY_FILE.exists():
+        raise FileNotFoundError(f"인증 키 없음: {KEY_FILE} (서버를 먼저 띄우거나 {KEY_ENV} 설정)")
+    return KEY_FILE.read_text(encoding="utf-8").strip().encode()
+
+
+def load_thresholds(path: Path = THRESHOLDS_FILE):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def loosest_args(th) -> dict:
+    # 모델은 가장 느슨한 값(conf 최소, iou 최대)으로 돌리고, apply_class_thresholds에서 클래스마다 다시 거름
+    if th is None:
+        return {}
+    return {
+        "conf": min([th["conf"]] + [c["conf"] for c in th["classes"].values()]),
+        "iou": max([th["iou"]] + [c["iou"] for c in th["classes"].values()]),
+    }
+
+
+def apply_class_thresholds(result, th):
+    """
+    클래스별 conf / NMS IoU 적용.
+    모델은 가장 느슨한 값(conf 최소, iou 최대)으로 돌리고, 여기서 클래스마다 다시 거름.
+    """
+    import torch
+    from torchvision.ops import nms
+
+    boxes = result.boxes
+    if th is None or len(boxes) == 0:
+        return result
+
+    cls = boxes.cls.int().tolist()
+    keep = torch.zeros(len(boxes), dtype=torch.bool, device=boxes.cls.device)
+    for c in set(cls):
+        name = result.names[c]
+        ct = th["classes"].get(name, {})
+        idx = torch.nonzero(boxes.cls == c).flatten()
+        idx = idx[boxes.conf[idx] >= ct.get("conf", DEFAULT_CONF)]
+        if len(idx):
+            k = nms(boxes.xyxy[idx].float(), boxes.conf[idx].float(), ct.get("iou", th["iou"]))
+            keep[idx[k]] = True
+    return result[keep]
+
+
+# =========================
+# 서버
+# =========================
+
+class ModelServer:
+    def __init__(self, weights: str, address=ADDRESS, slots: int = SLOTS, max_side: int = MAX_SIDE,
+                 max_batch: int = MAX_BATCH, thresholds_file: Path = THRESHOLDS_FILE, device: str | None = None):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights)
+        self.th = load_thresholds(thresholds_file)
+        self.predict_args = loosest_args(self.th) | ({"device": device} if device else {})
+        self.max_side = max_side
+        self.max_batch = max_batch
+        self.slot_bytes = max_side * max_side * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self.free = list(range(slots))
+        self.lock = threading.Lock()
+        self.jobs: queue.Queue = queue.Queue()
+        self.stop = threading.Event()
+        self.stats = {"requests": 0, "batches": 0, "infer_sec": 0.0}
+        self.listener = Listener(address, authkey=auth_key(create=True))
+
+    def slot_array(self, slot: int, h: int, w: int) -> np.ndarray:
+        return np.ndarray((h, w, 3), np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def serve_forever(self) -> None:
+        threading.Thread(target=self._infer_loop, daemon=True).start()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"[OK] model server {self.listener.address} | shm {self.shm.name} "
+              f"({self.shm.size / 2 ** 20:.0f} MB, {len(self.free)} slots)")
+        try:
+            while not self.stop.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.listener.close()
+        self.shm.close()
+        self.shm.unlink()
+
+    def _accept_loop(self) -> None:
+        while not self.stop.is_set():
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn) -> None:
+        with self.lock:
+            slot = self.free.pop(0) if self.free else None
+        if slot is None:
+            conn.send({"error": "빈 슬롯이 없습니다 (--slots 늘리기)"})
+            conn.close()
+            return
+        try:
+            conn.send({"shm": self.shm.name, "slot": slot, "slot_bytes": self.slot_bytes,
+                       "max_side": self.max_side, "names": self.model.names})
+            while True:
+                msg = conn.recv()
+                if msg[0] == "predict":
+                    h, w = msg[1], msg[2]
+                    # 슬롯 밖(다른 클라이언트 슬롯)을 읽거나 쓰지 않도록 크기 확인 (max_side 이하면 slot_bytes 안에 들어감)
+                    if not all(type(v) is int and 0 < v <= self.max_side for v in (h, w)):
+                        conn.send(("error", f"이미지 크기 {h}x{w} 가 범위 밖입니다 (1 ~ {self.max_side})"))
+                        continue
+                    job = {"slot": slot, "h": h, "w": w, "done": threading.Event()}
+                    self.jobs.put(job)
+                    job["done"].wait()
+                    conn.send(job["reply"])
+                elif msg[0] == "stats":
+                    conn.send(dict(self.stats))
+                elif msg[0] == "shutdown":
+                    conn.send("bye")
+                    self.stop.set()
+                    return
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            with self.lock:
+                self.free.append(slot)
+
+    def _infer_loop(self) -> None:
+        while True:
+            batch = [self.jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            t0 = time.perf_counter()
+            try:
+                imgs = [self.slot_array(j["slot"], j["h"], j["w"]) for j in batch]
+                results = self.model(imgs, verbose=False, **self.predict_args)
+                for j, r in zip(batch, results):
+                    t1 = time.perf_counter()
+                    r = apply_class_thresholds(r, self.th)
+                    t2 = time.perf_counter()
+                    plotted = r.plot()
+                    ph, pw = plotted.shape[:2]
+                    self.slot_array(j["slot"], ph, pw)[:] = plotted
+                    # r.speed 는 배치 평균 (ms)
+                    metrics.observe("server_stage_seconds", r.speed["preprocess"] / 1000, stage="preprocess")
+                    metrics.observe("server_stage_seconds", r.speed["inference"] / 1000, stage="infer")
+                    metrics.observe("server_stage_seconds", r.speed["postprocess"] / 1000 + t2 - t1, stage="nms")
+                    metrics.observe("server_stage_seconds", time.perf_counter() - t2, stage="render")
+                    b = r.boxes
+                    dets = np.concatenate([b.xyxy.cpu().numpy(), b.conf.cpu().numpy()[:, None],
+                                           b.cls.cpu().numpy()[:, None]], axis=1)
+                    j["reply"] = ("ok", ph, pw, dets.tolist())
+                    for c in b.cls.int().tolist():
+                        metrics.inc("server_detections_total", cls=r.names[c])
+            except Exception as e:
+                for j in batch:
+                    j.setdefault("reply", ("error", repr(e)))
+
+            metrics.inc("server_requests_total", len(batch))
+            metrics.inc("server_batches_total")
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["infer_sec"] += time.perf_counter() - t0
+            for j in batch:
+                j["done"].set()
+
+
+# =========================
+# 클라이언트 (app.py 에서 사용)
+# =========================
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # 붙기만 하는 쪽은 종료할 때 공유 메모리를 지우면 안 됨 (3.13부터 track=False, 그 전엔 resource_tracker에서 제외)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ModelClient:
+    def __init__(self, address=ADDRESS, authkey: bytes | None = None):
+        self.conn = Client(address, authkey=authkey or auth_key())
+        info = self.conn.recv()
+        if "error" in info:
+            self.conn.close()
+            raise RuntimeError(info["error"])
+        self.shm = _attach(info["shm"])
+        self.offset = info["slot"] * info["slot_bytes"]
+        self.max_side = info["max_side"]
+        self.names = info["names"]
+        self.lock = threading.Lock()  # 한 프로세스 안의 여러 세션이 슬롯 하나를 같이 씀
+
+    def _slot(self, h: int, w: int) -> np.ndarray:
+        return np.ndarray((h, w, 3), np.uint8, buffer=self.shm.buf, offset=self.offset)
+
+    def predict(self, image) -> tuple[np.ndarray, list]:
+        """
+        image: PIL.Image
+        returns: (결과 그림 BGR, [[x1, y1, x2, y2, conf, cls], ...])
+        """
+        if max(image.size) > self.max_side:
+            image = image.copy()
+            image.thumbnail((self.max_side, self.max_side))
+        rgb = np.asarray(image.convert("RGB"))
+        h, w = rgb.shape[:2]
+        with self.lock:
+            self._slot(h, w)[:] = rgb[..., ::-1]  # Ultralytics는 numpy 입력을 BGR로 봄
+            self.conn.send(("predict", h, w))
+            reply = self.conn.recv()
+            if reply[0] != "ok":
+                raise RuntimeError(reply[1])
+            _, ph, pw, dets = reply
+            return self._slot(ph, pw).copy(), dets
+
+    def stats(self) -> dict:
+        with self.lock:
+            self.conn.send(("stats",))
+            return self.conn.recv()
+
+    def shutdown(self) -> None:
+        with self.lock:
+            self.conn.send(("shutdown",))
+            self.conn.recv()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.shm.close()
+
+
+# =========================
+# 벤치마크: 프로세스마다 모델 로드(local) vs 모델 서버(server)
+# =========================
+
+def mem_mb(pid: int) -> float | None:
+    """PSS (공유 페이지는 나눠서 계산, 리눅스) -> 없으면 psutil USS"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process(pid).memory_full_info().uss / 2 ** 20
+
+
+def _test_image(path: str | None):
+    from PIL import Image
+
+    if path:
+        return Image.open(path).convert("RGB")
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (960, 1280, 3), dtype=np.uint8))
+
+
+def _bench_worker(mode, weights, address, image_path, n_requests, out_q, release) -> None:
+    image = _test_image(image_path)
+    if mode == "server":
+        client = ModelClient(address)
+        run = lambda: client.predict(image)  # noqa: E731
+    else:
+        from ultralytics import YOLO
+
+        model = YOLO(weights)
+        th = load_thresholds()
+        args = loosest_args(th)
+
+        def run():
+            r = apply_class_thresholds(model(image, verbose=False, **args)[0], th)
+            return r.plot()
+
+    for _ in range(2):  # 워밍업
+        run()
+    lat = []
+    start = time.time()
+    for _ in range(n_requests):
+        t0 = time.perf_counter()
+        run()
+        lat.append(time.perf_counter() - t0)
+    out_q.put((os.getpid(), lat, start, time.time()))
+    release.wait()  # 모든 프로세스가 살아 있는 상태에서 메모리를 재야 하므로 부모가 잴 때까지 대기
+
+
+def bench(weights: str, clients: list[int], n_requests: int, image_path: str | None, address, device) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    rows = []
+    for n in clients:
+        for mode in ["local", "server"]:
+            server = None
+            if mode == "server":
+                # 실제 운영처럼 별도 프로세스로 띄움 (multiprocessing 자식이면 resource_tracker를 같이 써서 꼬임)
+                cmd = [sys.executable, str(Path(__file__).resolve()), "serve", "--weights", weights,
+                       "--address", f"{address[0]}:{address[1]}", "--slots", str(max(n, SLOTS))]
+                server = subprocess.Popen(cmd + (["--device", device] if device else []))
+                deadline = time.time() + BENCH_TIMEOUT
+                while True:  # 모델 로드 대기
+                    try:
+                        Client(address, authkey=auth_key()).close()
+                        break
+                    except OSError:  # 키 파일도 서버가 만들기 전에는 없음 (FileNotFoundError)
+                        if server.poll() is not None:
+                            raise RuntimeError(f"모델 서버가 종료됨 (exit {server.returncode}): {' '.join(cmd)}")
+                        if time.time() > deadline:
+                            server.kill()
+                            raise RuntimeError(f"모델 서버가 {BENCH_TIMEOUT}s 안에 접속을 받지 않음: {address}")
+                        time.sleep(0.1)
+
+            out_q, release = ctx.Queue(), ctx.Event()
+            procs = [ctx.Process(target=_bench_worker, args=(mode, weights, address, image_path, n_requests,
+                                                              out_q, release)) for _ in range(n)]
+            for p in procs:
+                p.start()
+            try:
+                got = [out_q.get(timeout=BENCH_TIMEOUT) for _ in procs]
+            except queue.Empty:  # 워커가 접속 / 모델 로드에 실패하고 죽은 경우
+                dead = [p.exitcode for p in procs if p.exitcode not in (None, 0)]
+                for p in procs:
+                    p.terminate()
+                if server:
+                    server.kill()
+                raise RuntimeError(f"bench 워커 결과를 {BENCH_TIMEOUT}s 동안 못 받음 ({mode}, 비정상 종료 {len(dead)}개)")
+            # 처리량은 모델 로드 / 워밍업을 뺀 측정 구간 기준
+            wall = max(g[3] for g in got) - min(g[2] for g in got)
+
+            pids = [g[0] for g in got] + ([server.pid] if server else [])
+            mems = [mem_mb(pid) for pid in pids]
+            release.set()
+            for p in procs:
+                p.join()
+            if server:
+                c = ModelClient(address)
+                c.shutdown()
+                c.close()
+                server.wait()
+
+            lat = np.array([x for g in got for x in g[1]]) * 1000
+            rows.append({
+                "mode": mode, "clients": n,
+                "mem_mb": round(sum(mems), 1) if None not in mems else None,
+                "p50_ms": round(float(np.percentile(lat, 50)), 1),
+                "p95_ms": round(float(np.percentile(lat, 95)), 1),
+                "img_per_s": round(n * n_requests / wall, 1),
+            })
+            print(json.dumps(rows[-1]))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve", help="모델 서버 실행")
+    s.add_argument("--weights", default=str(HERE / "best.pt"))
+    s.add_argument("--address", default=f"{ADDRESS[0]}:{ADDRESS[1]}")
+    s.add_argument("--slots", type=int, default=SLOTS)
+    s.add_argument("--max-side", type=int, default=MAX_SIDE)
+    s.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    s.add_argument("--device", default=None)
+    s.add_argument("--metrics-port", type=int, default=0, help="/metrics, /metrics.json 포트 (0이면 안 띄움)")
+    s.add_argument("--metrics-host", default="127.0.0.1", help="다른 호스트에서 수집할 때만 0.0.0.0")
+
+    b = sub.add_parser("bench", help="프로세스별 모델 vs 모델 서버: 호스트 메모리 / 지연 시간 비교")
+    b.add_argument("--weights", default=str(HERE / "best.pt"))
+    b.add_argument("--address", default=f"{ADDRESS[0]}:{ADDRESS[1] + 1}")
+    b.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4])
+    b.add_argument("--requests", type=int, default=20, help="클라이언트당 요청 수")
+    b.add_argument("--image", default=None, help="테스트 이미지 (없으면 1280x960 랜덤 이미지)")
+    b.add_argument("--device", default=None)
+    b.add_argument("--json", default=None, help="결과 저장 경로")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        if args.metrics_port:
+            metrics.start_http_server(args.metrics_port, args.metrics_host)
+        ModelServer(args.weights, parse_address(args.address), args.slots, args.max_side, args.max_batch,
+                    device=args.device).serve_forever()
+        return
+
+    rows = bench(args.weights, args.clients, args.requests, args.image, parse_address(args.address), args.device)
+    print("\n" + "=" * 50)
+    print(f"{'mode':>6} | {'clients':>7} | {'mem MB':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'img/s':>6}")
+    for r in rows:
+        mem = f"{r['mem_mb']:8.1f}" if r["mem_mb"] is not None else f"{'-':>8}"
+        print(f"{r['mode']:>6} | {r['clients']:>7} | {mem} | {r['p50_ms']:7.1f} | {r['p95_ms']:7.1f} | {r['img_per_s']:6.1f}")
+    print("=" * 50)
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()